@@ -54,10 +54,13 @@ echo "Initializing database..."
 python -c "
 import os
 from app import app, db
+from migrations import migrate
 
 with app.app_context():
     db.create_all()
     print('Database tables created successfully')
+    for description in migrate(db.engine):
+        print(f'Applied migration {description}')
 "
 
 echo "Starting Bike Race Game application..."
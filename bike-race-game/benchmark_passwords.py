@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark
+Reports login verifications per second per core for each hashing method,
+and the throughput of PasswordHasher with its concurrency cap across all cores.
+
+Usage: python3 benchmark_passwords.py [--methods pbkdf2:sha256:600000 scrypt:32768:8:1] [--seconds 2]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Modules shared by the apps live in the repository root's shared/ package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.passwords import PasswordHasher
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+
+def single_core_rate(stored_hash, seconds):
+    """Verifications per second on one thread"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        check_password_hash(stored_hash, 'correct horse battery staple')
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def pool_rate(hasher, stored_hash, seconds):
+    """Verifications per second with one client thread per hashing slot"""
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        count = 0
+        while time.perf_counter() < deadline:
+            hasher.verify(stored_hash, 'correct horse battery staple')
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hasher.workers) as clients:
+        total = sum(clients.map(lambda _: client(), range(hasher.workers)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f'{"Method":<24} {"ms/login":>9} {"logins/s/core":>14} {"pool logins/s":>14}')
+    print('-' * 64)
+    for method in args.methods:
+        stored_hash = generate_password_hash('correct horse battery staple', method)
+        hasher = PasswordHasher(method, args.workers)
+        per_core = single_core_rate(stored_hash, args.seconds)
+        pooled = pool_rate(hasher, stored_hash, args.seconds)
+        print(f'{method:<24} {1000 / per_core:>9.1f} {per_core:>14.1f} {pooled:>14.1f}')
+    print(f'\nConcurrent hashes: {args.workers}')
+
+
+if __name__ == '__main__':
+    main()
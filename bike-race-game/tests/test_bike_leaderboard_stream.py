@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+
+def first_snapshot(response):
+    for chunk in response.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        for message in chunk.split('\n\n'):
+            if message.startswith('event: snapshot') or '\nevent: snapshot' in message:
+                data = next(line for line in message.split('\n') if line.startswith('data: '))
+                return json.loads(data[len('data: '):])
+    return None
+
+
+def test_stream_starts_with_the_current_leaderboard(game_app):
+    with game_app.app.app_context():
+        game_app.db.create_all()
+        user = game_app.User(username='ana', email='ana@example.com', password_hash='x')
+        game_app.db.session.add(user)
+        game_app.db.session.flush()
+        game_app.db.session.add(game_app.Score(
+            user_id=user.id, score=120, distance=900, timestamp=datetime(2025, 1, 1, 12, 0),
+            ip_address='127.0.0.1'))
+        game_app.db.session.commit()
+
+    response = game_app.app.test_client().get('/leaderboard/stream', buffered=False)
+    try:
+        assert response.status_code == 200
+        snapshot = first_snapshot(response)
+    finally:
+        response.close()
+
+    assert snapshot['topic'] == 'leaderboard'
+    assert snapshot['state']['leaderboard']['1']['username'] == 'ana'
+    assert snapshot['state']['players'] == 1
+    assert game_app.change_hub.status()['topics']['leaderboard'] > 0
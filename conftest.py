@@ -0,0 +1,13 @@
+"""
+pytest configuration for the repository
+Run the tests from the repository root with `python -m pytest`. Tests of
+the shared/ package, and of host.py in tests/, import them from here; each
+app's tests/conftest.py puts the app's own directory on the path.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
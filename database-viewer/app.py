@@ -1,182 +1,243 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 import sqlite3
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 import json
 
+# Modules shared by the apps live in the repository root's shared/ package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.change_hub import ChangeHub, HubFull, SSE_HEADERS
+from shared.response_cache import ResponseCache
+from shared.temperature_store import TemperatureStore
+
+from readonly_db import ReadOnlyPool, QueryCache
+from pagination import Listing, fetch_page, page_size
+
 app = Flask(__name__)
 
-def get_bike_race_data():
-    """Get data from bike race database"""
-    db_path = '/home/sourav/bike-race-game/instance/bike_race.db'
-    
-    if not os.path.exists(db_path):
+BIKE_RACE_DB = os.environ.get('BIKE_RACE_DB', '/home/sourav/bike-race-game/instance/bike_race.db')
+SNAKE_GAME_DB = os.environ.get('SNAKE_GAME_DB', '/home/sourav/snake-game/instance/snake_game.db')
+TEMPERATURE_STORE = os.environ.get('TEMPERATURE_STORE', '/home/sourav/temperature-analysis/temperature_store')
+
+# Read-only connections and query results shared by all dashboard viewers
+bike_race_pool = ReadOnlyPool(BIKE_RACE_DB)
+snake_game_pool = ReadOnlyPool(SNAKE_GAME_DB)
+query_cache = QueryCache(ttl=int(os.environ.get('VIEWER_CACHE_TTL', 30)))
+
+# Written by the temperature dashboard; only its small latest-readings file is read here
+temperature_store = TemperatureStore(TEMPERATURE_STORE)
+
+# API bodies by data version: ETags for conditional GETs, gzip/Brotli encodings
+response_cache = ResponseCache()
+
+# Keyset-paginated tables, served page by page from /api/<game>/<listing>
+USERS = Listing("id, username, email, created_at", "user", "created_at", "id")
+LOGINS = Listing("u.username, l.login_time, l.ip_address",
+                 "login_log l JOIN user u ON l.user_id = u.id", "l.login_time", "l.id")
+LISTINGS = {
+    'bike-race': {
+        'users': USERS,
+        'scores': Listing("s.score, s.distance, u.username, s.timestamp, s.ip_address",
+                          "score s JOIN user u ON s.user_id = u.id", "s.score", "s.id"),
+        'logins': LOGINS,
+    },
+    'snake-game': {
+        'users': USERS,
+        'scores': Listing("s.score, u.username, s.timestamp, s.ip_address",
+                          "score s JOIN user u ON s.user_id = u.id", "s.score", "s.id"),
+        'logins': LOGINS,
+    },
+}
+POOLS = {'bike-race': bike_race_pool, 'snake-game': snake_game_pool}
+
+# Sources behind /api/database-data are loaded concurrently, each given at
+# most VIEWER_SOURCE_TIMEOUT seconds before the response goes out without it
+SOURCE_TIMEOUT = float(os.environ.get('VIEWER_SOURCE_TIMEOUT', 5))
+source_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('VIEWER_SOURCE_WORKERS', 8)),
+                                     thread_name_prefix='viewer-source')
+
+# First page sizes shown on the dashboard
+USERS_PAGE = 50
+SCORES_PAGE = 15
+LOGINS_PAGE = 10
+
+def cached_query(key, pool, load):
+    """Run load(conn) once per database change and share the result"""
+    if not pool.exists():
         return None
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    def compute():
+        with pool.connection() as conn:
+            return load(conn)
     
-    # Get users
-    cursor.execute("SELECT id, username, email, created_at FROM user ORDER BY created_at DESC")
-    users = cursor.fetchall()
+    return query_cache.get(key, pool.version(), compute)
+
+def read_score_summary(cursor, columns, single_pass_sql):
+    """Read the statistics row the game keeps up to date on every insert
+
+    Databases that have not been migrated yet fall back to computing the
+    same columns in a single pass over score.
+    """
+    try:
+        cursor.execute(f"SELECT {columns} FROM score_summary WHERE id = 1")
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row is None:
+        cursor.execute(single_pass_sql)
+        row = cursor.fetchone()
+    return row
+
+def average(total, count):
+    return round(total / count, 1) if count else 0
+
+def get_bike_race_data():
+    """Get data from bike race database"""
+    return cached_query('bike_race', bike_race_pool, load_bike_race_data)
+
+def load_bike_race_data(conn):
+    """Query the bike race database"""
+    cursor = conn.cursor()
     
-    # Get top scores
-    cursor.execute("""
-        SELECT s.score, s.distance, u.username, s.timestamp, s.ip_address 
-        FROM score s 
-        JOIN user u ON s.user_id = u.id 
-        ORDER BY s.score DESC 
-        LIMIT 15
-    """)
-    scores = cursor.fetchall()
+    listings = LISTINGS['bike-race']
     
-    # Get login logs
-    cursor.execute("""
-        SELECT u.username, l.login_time, l.ip_address 
-        FROM login_log l 
-        JOIN user u ON l.user_id = u.id 
-        ORDER BY l.login_time DESC 
-        LIMIT 10
-    """)
-    logins = cursor.fetchall()
+    # Get the first page of users, top scores and login logs
+    users, users_next = fetch_page(conn, listings['users'], limit=USERS_PAGE)
+    scores, scores_next = fetch_page(conn, listings['scores'], limit=SCORES_PAGE)
+    logins, logins_next = fetch_page(conn, listings['logins'], limit=LOGINS_PAGE)
     
     # Get statistics
-    cursor.execute("SELECT COUNT(*) FROM user")
-    user_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM score")
-    race_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT MAX(score), MAX(distance), AVG(score), AVG(distance) FROM score")
-    stats = cursor.fetchone()
-    
-    conn.close()
+    user_count, race_count, score_sum, max_score, distance_sum, max_distance = read_score_summary(
+        cursor,
+        "user_count, score_count, score_sum, max_score, distance_sum, max_distance",
+        """
+        SELECT (SELECT COUNT(*) FROM user), COUNT(*), COALESCE(SUM(score), 0), MAX(score),
+               COALESCE(SUM(distance), 0), MAX(distance)
+        FROM score
+        """
+    )
     
     return {
         'users': users,
         'scores': scores,
         'logins': logins,
+        'users_next_cursor': users_next,
+        'scores_next_cursor': scores_next,
+        'logins_next_cursor': logins_next,
         'stats': {
             'user_count': user_count,
             'race_count': race_count,
-            'max_score': stats[0] if stats[0] else 0,
-            'max_distance': stats[1] if stats[1] else 0,
-            'avg_score': round(stats[2], 1) if stats[2] else 0,
-            'avg_distance': round(stats[3], 1) if stats[3] else 0
+            'max_score': max_score or 0,
+            'max_distance': max_distance or 0,
+            'avg_score': average(score_sum, race_count),
+            'avg_distance': average(distance_sum, race_count)
         }
     }
 
 def get_snake_game_data():
     """Get data from snake game database"""
-    db_path = '/home/sourav/snake-game/instance/snake_game.db'
-    
-    if not os.path.exists(db_path):
-        return None
-    
-    conn = sqlite3.connect(db_path)
+    return cached_query('snake_game', snake_game_pool, load_snake_game_data)
+
+def load_snake_game_data(conn):
+    """Query the snake game database"""
     cursor = conn.cursor()
     
-    # Get users
-    cursor.execute("SELECT id, username, email, created_at FROM user ORDER BY created_at DESC")
-    users = cursor.fetchall()
+    listings = LISTINGS['snake-game']
     
-    # Get top scores
-    cursor.execute("""
-        SELECT s.score, u.username, s.timestamp, s.ip_address 
-        FROM score s 
-        JOIN user u ON s.user_id = u.id 
-        ORDER BY s.score DESC 
-        LIMIT 15
-    """)
-    scores = cursor.fetchall()
+    # Get the first page of users, top scores and login logs
+    users, users_next = fetch_page(conn, listings['users'], limit=USERS_PAGE)
+    scores, scores_next = fetch_page(conn, listings['scores'], limit=SCORES_PAGE)
+    logins, logins_next = fetch_page(conn, listings['logins'], limit=LOGINS_PAGE)
     
-    # Get login logs
-    cursor.execute("""
-        SELECT u.username, l.login_time, l.ip_address 
-        FROM login_log l 
-        JOIN user u ON l.user_id = u.id 
-        ORDER BY l.login_time DESC 
-        LIMIT 10
-    """)
-    logins = cursor.fetchall()
-    
-    # Get statistics
-    cursor.execute("SELECT COUNT(*) FROM user")
-    user_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM score")
-    game_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT MAX(score), AVG(score) FROM score")
-    stats = cursor.fetchone()
-    
-    # Get success rate (games with score > 0)
-    cursor.execute("SELECT COUNT(*) FROM score WHERE score > 0")
-    successful_games = cursor.fetchone()[0]
-    
-    conn.close()
+    # Get statistics, including success rate (games with score > 0)
+    user_count, game_count, score_sum, max_score, successful_games = read_score_summary(
+        cursor,
+        "user_count, score_count, score_sum, max_score, successful_games",
+        """
+        SELECT (SELECT COUNT(*) FROM user), COUNT(*), COALESCE(SUM(score), 0), MAX(score),
+               COUNT(CASE WHEN score > 0 THEN 1 END)
+        FROM score
+        """
+    )
     
     return {
         'users': users,
         'scores': scores,
         'logins': logins,
+        'users_next_cursor': users_next,
+        'scores_next_cursor': scores_next,
+        'logins_next_cursor': logins_next,
         'stats': {
             'user_count': user_count,
             'game_count': game_count,
-            'max_score': stats[0] if stats[0] else 0,
-            'avg_score': round(stats[1], 1) if stats[1] else 0,
+            'max_score': max_score or 0,
+            'avg_score': average(score_sum, game_count),
             'successful_games': successful_games,
             'success_rate': round((successful_games / game_count * 100), 1) if game_count > 0 else 0
         }
     }
 
 def get_temperature_data():
-    """Get temperature dashboard data"""
-    # Sample temperature data (same as in temperature dashboard)
-    INDIA_CITIES = {
-        'Mumbai': {'lat': 19.0760, 'lon': 72.8777, 'temp': 32.5},
-        'Delhi': {'lat': 28.7041, 'lon': 77.1025, 'temp': 35.2},
-        'Bangalore': {'lat': 12.9716, 'lon': 77.5946, 'temp': 28.8},
-        'Chennai': {'lat': 13.0827, 'lon': 80.2707, 'temp': 31.4},
-        'Kolkata': {'lat': 22.5726, 'lon': 88.3639, 'temp': 33.1},
-        'Hyderabad': {'lat': 17.3850, 'lon': 78.4867, 'temp': 30.7},
-        'Pune': {'lat': 18.5204, 'lon': 73.8567, 'temp': 29.3},
-        'Ahmedabad': {'lat': 23.0225, 'lon': 72.5714, 'temp': 36.8},
-        'Jaipur': {'lat': 26.9124, 'lon': 75.7873, 'temp': 37.2},
-        'Lucknow': {'lat': 26.8467, 'lon': 80.9462, 'temp': 34.6},
-        'Kanpur': {'lat': 26.4499, 'lon': 80.3319, 'temp': 35.1},
-        'Nagpur': {'lat': 21.1458, 'lon': 79.0882, 'temp': 32.9},
-        'Indore': {'lat': 22.7196, 'lon': 75.8577, 'temp': 31.8},
-        'Bhopal': {'lat': 23.2599, 'lon': 77.4126, 'temp': 33.4},
-        'Visakhapatnam': {'lat': 17.6868, 'lon': 83.2185, 'temp': 29.9},
-        'Patna': {'lat': 25.5941, 'lon': 85.1376, 'temp': 36.3},
-        'Vadodara': {'lat': 22.3072, 'lon': 73.1812, 'temp': 35.7},
-        'Ghaziabad': {'lat': 28.6692, 'lon': 77.4538, 'temp': 34.8},
-        'Ludhiana': {'lat': 30.9010, 'lon': 75.8573, 'temp': 33.2},
-        'Coimbatore': {'lat': 11.0168, 'lon': 76.9558, 'temp': 27.6},
-        'Kochi': {'lat': 9.9312, 'lon': 76.2673, 'temp': 30.1},
-        'Thiruvananthapuram': {'lat': 8.5241, 'lon': 76.9366, 'temp': 29.4},
-        'Chandigarh': {'lat': 30.7333, 'lon': 76.7794, 'temp': 32.8},
-        'Mysore': {'lat': 12.2958, 'lon': 76.6394, 'temp': 26.9},
-        'Dehradun': {'lat': 30.3165, 'lon': 78.0322, 'temp': 31.5}
-    }
+    """Get temperature dashboard data: each city's latest reading from its store"""
+    if not temperature_store.exists():
+        return None
     
-    temps = [city_data['temp'] for city_data in INDIA_CITIES.values()]
+    cities = temperature_store.latest()
+    if not cities:
+        return None
     
     return {
-        'cities': INDIA_CITIES,
-        'stats': {
-            'total_cities': len(INDIA_CITIES),
-            'avg_temp': round(sum(temps) / len(temps), 1),
-            'max_temp': max(temps),
-            'min_temp': min(temps),
-            'hottest_city': max(INDIA_CITIES.keys(), key=lambda x: INDIA_CITIES[x]['temp']),
-            'coolest_city': min(INDIA_CITIES.keys(), key=lambda x: INDIA_CITIES[x]['temp']),
-            'cities_above_35': len([t for t in temps if t > 35]),
-            'cities_below_30': len([t for t in temps if t < 30])
-        }
+        'cities': cities,
+        'stats': temperature_store.stats(),
+        'store_version': temperature_store.version
     }
 
+# Each source is pushed to /api/stream clients when its data version changes;
+# versions are only polled while a client is connected
+STREAM_TOPICS = ('bike_race', 'snake_game', 'temperature')
+change_hub = ChangeHub(max_clients=int(os.environ.get('STREAM_MAX_CLIENTS', 100)))
+change_hub.watch('bike_race', bike_race_pool.version, get_bike_race_data)
+change_hub.watch('snake_game', snake_game_pool.version, get_snake_game_data)
+change_hub.watch('temperature', lambda: temperature_store.version, get_temperature_data)
+
+def run_timed(load):
+    """Return (result, error message, seconds) for one source loader"""
+    start = time.perf_counter()
+    try:
+        return load(), None, time.perf_counter() - start
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start
+
+def gather_sources(sources, timeout=SOURCE_TIMEOUT):
+    """Load every source concurrently
+
+    Returns (results, errors, timings in ms). A source that fails or is
+    still running at the deadline gets None and an error; one still running
+    finishes in the background and fills the query cache for the next call.
+    """
+    start = time.perf_counter()
+    futures = {name: source_executor.submit(run_timed, load) for name, load in sources.items()}
+    done, _ = wait(futures.values(), timeout=timeout)
+    results, errors, timings = {}, {}, {}
+    for name, future in futures.items():
+        if future in done:
+            results[name], error, seconds = future.result()
+            if error:
+                errors[name] = error
+        else:
+            results[name] = None
+            errors[name] = f'Timed out after {timeout:g}s'
+            seconds = time.perf_counter() - start
+        timings[name] = round(seconds * 1000, 1)
+    timings['total'] = round((time.perf_counter() - start) * 1000, 1)
+    return results, errors, timings
+
 @app.route('/')
 def dashboard():
     """Main database dashboard"""
@@ -184,40 +245,78 @@ def dashboard():
 
 @app.route('/api/database-data')
 def get_database_data():
-    """API endpoint to get all database data"""
-    try:
-        bike_data = get_bike_race_data()
-        snake_data = get_snake_game_data()
-        temp_data = get_temperature_data()
-        
-        return jsonify({
-            'success': True,
-            'bike_race': bike_data,
-            'snake_game': snake_data,
-            'temperature': temp_data,
-            'timestamp': datetime.now().isoformat(),
-            'server_info': {
-                'bike_race_db': '/home/sourav/bike-race-game/instance/bike_race.db',
-                'snake_game_db': '/home/sourav/snake-game/instance/snake_game.db',
-                'temperature_source': 'In-memory data'
-            }
-        })
-    except Exception as e:
+    """API endpoint to get all database data
+
+    Sources load in parallel; a slow or failing one is reported in errors
+    and left out (null) instead of failing the whole response. Complete
+    responses are cached per data version of the three sources.
+    """
+    version = (bike_race_pool.version(), snake_game_pool.version(), temperature_store.version)
+    return response_cache.respond('database-data', version, load_database_data)
+
+def load_database_data():
+    results, errors, timings = gather_sources({
+        'bike_race': get_bike_race_data,
+        'snake_game': get_snake_game_data,
+        'temperature': get_temperature_data,
+    })
+    if len(errors) == len(results):
         return jsonify({
             'success': False,
-            'error': str(e)
+            'error': '; '.join(f'{name}: {error}' for name, error in errors.items()),
+            'errors': errors,
+            'timings_ms': timings
         }), 500
+    
+    payload = {
+        'success': True,
+        'bike_race': results['bike_race'],
+        'snake_game': results['snake_game'],
+        'temperature': results['temperature'],
+        'partial': bool(errors),
+        'errors': errors,
+        'timings_ms': timings,
+        'timestamp': datetime.now().isoformat(),
+        'server_info': {
+            'bike_race_db': BIKE_RACE_DB,
+            'snake_game_db': SNAKE_GAME_DB,
+            'temperature_store': TEMPERATURE_STORE
+        }
+    }
+    # A partial result goes out uncached, so the next request retries the missing sources
+    return jsonify(payload) if errors else payload
+
+@app.route('/api/stream')
+def stream_database_data():
+    """Server-Sent Events: each source's data once, then a merge patch whenever it changes
+
+    ?topics=bike_race,snake_game,temperature picks the sources (all by default).
+    """
+    topics = request.args.get('topics', ','.join(STREAM_TOPICS)).split(',')
+    unknown = [topic for topic in topics if topic not in STREAM_TOPICS]
+    if unknown:
+        return jsonify({'success': False, 'error': f'Unknown topics: {", ".join(unknown)}'}), 400
+    try:
+        events = change_hub.stream(topics, request.headers.get('Last-Event-ID'))
+    except HubFull as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    return Response(events, mimetype='text/event-stream', headers=SSE_HEADERS)
 
 @app.route('/api/bike-race')
 def get_bike_race_api():
     """API endpoint for bike race data only"""
+    return response_cache.respond('bike-race', bike_race_pool.version(), load_bike_race_api)
+
+def load_bike_race_api():
     try:
-        data = get_bike_race_data()
-        return jsonify({
+        return {
             'success': True,
-            'data': data,
+            'data': get_bike_race_data(),
             'timestamp': datetime.now().isoformat()
-        })
+        }
     except Exception as e:
         return jsonify({
             'success': False,
@@ -227,13 +326,55 @@ def get_bike_race_api():
 @app.route('/api/snake-game')
 def get_snake_game_api():
     """API endpoint for snake game data only"""
+    return response_cache.respond('snake-game', snake_game_pool.version(), load_snake_game_api)
+
+def load_snake_game_api():
+    try:
+        return {
+            'success': True,
+            'data': get_snake_game_data(),
+            'timestamp': datetime.now().isoformat()
+        }
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/<game>/<listing>')
+def get_listing_page(game, listing):
+    """API endpoint for one page of users, scores or logins
+
+    Pass the next_cursor of the previous page as ?cursor= to continue.
+    """
+    if listing not in LISTINGS.get(game, {}):
+        return jsonify({'success': False, 'error': 'Unknown listing'}), 404
+    pool = POOLS[game]
+    if not pool.exists():
+        return jsonify({'success': False, 'error': 'Database not found'}), 404
+    cursor = request.args.get('cursor')
+    limit = page_size(request.args.get('limit'))
+    
+    def load(conn):
+        return fetch_page(conn, LISTINGS[game][listing], cursor, limit)
+    
     try:
-        data = get_snake_game_data()
+        if cursor:
+            with pool.connection() as conn:
+                result = load(conn)
+        else:
+            # First pages are what every dashboard asks for, so share them
+            result = cached_query((game, listing, limit), pool, load)
+        items, next_cursor = result
         return jsonify({
             'success': True,
-            'data': data,
+            'items': items,
+            'next_cursor': next_cursor,
+            'limit': limit,
             'timestamp': datetime.now().isoformat()
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -243,13 +384,15 @@ def get_snake_game_api():
 @app.route('/api/temperature')
 def get_temperature_api():
     """API endpoint for temperature data only"""
+    return response_cache.respond('temperature', temperature_store.version, load_temperature_api)
+
+def load_temperature_api():
     try:
-        data = get_temperature_data()
-        return jsonify({
+        return {
             'success': True,
-            'data': data,
+            'data': get_temperature_data(),
             'timestamp': datetime.now().isoformat()
-        })
+        }
     except Exception as e:
         return jsonify({
             'success': False,
@@ -262,6 +405,9 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'database-viewer',
+        'cache': query_cache.stats(),
+        'responses': response_cache.stats(),
+        'streams': change_hub.status(),
         'timestamp': datetime.now().isoformat()
     }), 200
 
@@ -0,0 +1,84 @@
+"""
+Keyset pagination for the database viewer listings
+Pages are ordered by (sort column DESC, id) and continue from an opaque
+cursor holding the last row's sort value and id, so every page is an
+index range scan no matter how deep it is. Rows with a NULL sort value
+come last, ordered by id, as SQLite sorts NULL below every value.
+"""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class Listing:
+    """A paginated query: columns returned per row, FROM clause and sort key"""
+
+    def __init__(self, columns, source, sort, id_column):
+        self.columns = columns
+        self.source = source
+        self.sort = sort
+        self.id_column = id_column
+
+    def sql(self, has_cursor):
+        sql = f"SELECT {self.columns}, {self.sort}, {self.id_column} FROM {self.source}"
+        if has_cursor:
+            # Written as a range on the sort column so the index can seek to it
+            sql += f" WHERE {self.sort} <= ? AND ({self.sort} < ? OR {self.id_column} > ?)"
+        return sql + f" ORDER BY {self.sort} DESC, {self.id_column} LIMIT ?"
+
+    def null_sql(self, has_cursor):
+        """The rows with a NULL sort value, which follow all the others"""
+        sql = (f"SELECT {self.columns}, {self.sort}, {self.id_column} FROM {self.source}"
+               f" WHERE {self.sort} IS NULL")
+        if has_cursor:
+            sql += f" AND {self.id_column} > ?"
+        return sql + f" ORDER BY {self.id_column} LIMIT ?"
+
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (sort_value, row_id) or raise ValueError for a malformed cursor
+
+    sort_value is None when the row it continues from had a NULL sort value.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(row_id, int) or not (sort_value is None or isinstance(sort_value, (str, int, float))):
+        raise ValueError('Invalid cursor')
+    return sort_value, row_id
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def fetch_page(conn, listing, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return (rows, next_cursor); next_cursor is None on the last page"""
+    # One extra row tells us whether another page exists
+    if not cursor:
+        rows = conn.execute(listing.sql(False), [limit + 1]).fetchall()
+    else:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is None:
+            rows = conn.execute(listing.null_sql(True), [row_id, limit + 1]).fetchall()
+        else:
+            rows = conn.execute(listing.sql(True), [sort_value, sort_value, row_id, limit + 1]).fetchall()
+            if len(rows) <= limit:
+                # The range on the sort column skips NULLs; they follow the last value
+                rows += conn.execute(listing.null_sql(False), [limit + 1 - len(rows)]).fetchall()
+    next_cursor = encode_cursor(*rows[limit - 1][-2:]) if len(rows) > limit else None
+    return [list(row[:-2]) for row in rows[:limit]], next_cursor
@@ -0,0 +1,128 @@
+"""
+Read-only SQLite access for the database viewer
+Pools read-only connections to the game databases and caches query
+results until the database changes, so any number of dashboard viewers
+cost one query set per change.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ReadOnlyPool:
+    """Pool of read-only (mode=ro) connections to one SQLite file"""
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._probe = None
+        self._probe_lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _connect(self):
+        return sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, opening one if the pool is empty"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        except BaseException:
+            # The caller may have left a transaction or cursor open
+            conn.close()
+            raise
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def version(self):
+        """Return a value that changes whenever the database is written
+
+        PRAGMA data_version only changes between reads on the same
+        connection, so a dedicated probe connection is kept open for it.
+        File mtimes cover writers that replace the file; they are read
+        after the probe, whose first open may create the -wal file.
+        """
+        with self._probe_lock:
+            try:
+                if self._probe is None:
+                    self._probe = self._connect()
+                data_version = self._probe.execute('PRAGMA data_version').fetchone()[0]
+            except sqlite3.Error:
+                if self._probe is not None:
+                    self._probe.close()
+                self._probe = None
+                data_version = None
+        mtimes = tuple(
+            os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+            for path in (self.path, self.path + '-wal')
+        )
+        return mtimes + (data_version,)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+
+
+class QueryCache:
+    """Per-key result cache invalidated by a data version and a TTL.
+
+    Concurrent misses on the same key wait for one computation instead of
+    all querying the database.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lock_for(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, key, version):
+        entry = self._entries.get(key)
+        if entry and entry[0] == version and entry[1] > time.monotonic():
+            return entry
+        return None
+
+    def get(self, key, version, compute):
+        entry = self._fresh(key, version)
+        if entry:
+            self.hits += 1
+            return entry[2]
+        with self._lock_for(key):
+            # Another thread may have filled it while we waited
+            entry = self._fresh(key, version)
+            if entry:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            value = compute()
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            return value
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'keys': len(self._entries), 'ttl': self.ttl}
@@ -0,0 +1,29 @@
+import glob
+import importlib
+import os
+import sys
+
+import pytest
+
+# The modules under test live in the app directory above
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# Module names the other apps also use (app, ...)
+APP_MODULES = [os.path.basename(path)[:-3] for path in glob.glob(os.path.join(APP_DIR, '*.py'))]
+
+
+@pytest.fixture
+def viewer_app(tmp_path, monkeypatch):
+    """app.py imported afresh, reading databases and a store in tmp_path"""
+    monkeypatch.setenv('BIKE_RACE_DB', str(tmp_path / 'bike_race.db'))
+    monkeypatch.setenv('SNAKE_GAME_DB', str(tmp_path / 'snake_game.db'))
+    monkeypatch.setenv('TEMPERATURE_STORE', str(tmp_path / 'temperature_store'))
+    monkeypatch.syspath_prepend(APP_DIR)
+    saved = {name: sys.modules.pop(name) for name in APP_MODULES if name in sys.modules}
+    module = importlib.import_module('app')
+    yield module
+    for name in APP_MODULES:
+        sys.modules.pop(name, None)
+    sys.modules.update(saved)
@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+from pagination import MAX_PAGE_SIZE, Listing, decode_cursor, encode_cursor, fetch_page, page_size
+
+SCORES = Listing("s.score, u.username", "score s JOIN user u ON s.user_id = u.id", "s.score", "s.id")
+USERS = Listing("id, username", "user", "created_at", "id")
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+        CREATE TABLE user (id INTEGER PRIMARY KEY, username TEXT, created_at TEXT);
+        CREATE TABLE score (id INTEGER PRIMARY KEY, user_id INTEGER, score INTEGER);
+    """)
+    conn.executemany('INSERT INTO user VALUES (?, ?, ?)',
+                     [(i, f'u{i}', f'2025-01-{1 + i % 3:02d} 12:00:00') for i in range(1, 8)])
+    # Many ties, so page boundaries fall inside runs of equal scores
+    conn.executemany('INSERT INTO score (user_id, score) VALUES (?, ?)',
+                     [(1 + i % 7, (i * 37) % 5 * 10) for i in range(40)])
+    return conn
+
+
+def all_pages(conn, listing, limit):
+    rows, cursor = fetch_page(conn, listing, limit=limit)
+    return [rows] + pages_after(conn, listing, cursor, limit)
+
+
+def pages_after(conn, listing, cursor, limit):
+    pages = []
+    while cursor is not None:
+        rows, cursor = fetch_page(conn, listing, cursor, limit)
+        pages.append(rows)
+    return pages
+
+
+@pytest.mark.parametrize('limit', [1, 3, 7, 40, 100])
+def test_pages_cover_every_row_once_in_order(conn, limit):
+    expected = [list(row) for row in conn.execute(
+        'SELECT s.score, u.username FROM score s JOIN user u ON s.user_id = u.id '
+        'ORDER BY s.score DESC, s.id')]
+
+    pages = all_pages(conn, SCORES, limit)
+
+    assert [row for page in pages for row in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_a_full_last_page_has_no_next_cursor(conn):
+    rows, cursor = fetch_page(conn, SCORES, limit=40)
+
+    assert len(rows) == 40
+    assert cursor is None
+
+
+def test_string_sort_columns_page_by_value_then_id(conn):
+    pages = all_pages(conn, USERS, 2)
+
+    assert [row[0] for page in pages for row in page] == [2, 5, 1, 4, 7, 3, 6]
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_null_sort_values_page_last_by_id(conn, limit):
+    conn.executemany('INSERT INTO user VALUES (?, ?, NULL)', [(i, f'u{i}') for i in (9, 8, 10)])
+
+    pages = all_pages(conn, USERS, limit)
+
+    assert [row[0] for page in pages for row in page] == [2, 5, 1, 4, 7, 3, 6, 8, 9, 10]
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_rows_inserted_behind_the_cursor_are_not_repeated(conn):
+    first, cursor = fetch_page(conn, SCORES, limit=5)
+    conn.execute('INSERT INTO score (user_id, score) VALUES (1, 1000)')
+
+    rest = [row for page in pages_after(conn, SCORES, cursor, 5) for row in page]
+
+    assert [1000, 'u1'] not in rest
+    assert len(first) + len(rest) == 40
+
+
+def test_cursor_round_trip():
+    for sort_value, row_id in ((40, 7), (2.5, 1), ('2025-01-02 12:00:00', 3), (None, 4)):
+        cursor = encode_cursor(sort_value, row_id)
+        assert '=' not in cursor
+        assert decode_cursor(cursor) == (sort_value, row_id)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not base64!', encode_cursor(1, 'x'), encode_cursor([1], 2),
+                                    'WzEsMiwzXQ'])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_size_is_clamped():
+    assert page_size('25') == 25
+    assert page_size('0') == 1
+    assert page_size(str(MAX_PAGE_SIZE * 10)) == MAX_PAGE_SIZE
+    assert page_size(None) == 50
+    assert page_size('lots', default=20) == 20
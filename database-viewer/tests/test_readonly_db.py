@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from readonly_db import QueryCache, ReadOnlyPool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'game.db')
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('CREATE TABLE score (id INTEGER PRIMARY KEY, score INTEGER)')
+    conn.commit()
+    conn.close()
+    return path
+
+
+def insert_score(path, score):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute('INSERT INTO score (score) VALUES (?)', (score,))
+    conn.close()
+
+
+def test_connections_are_reused_and_read_only(db_path):
+    pool = ReadOnlyPool(db_path)
+    with pool.connection() as conn:
+        first = conn
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute('INSERT INTO score (score) VALUES (1)')
+    with pool.connection() as conn:
+        assert conn is first
+    pool.close()
+
+
+def test_a_connection_is_closed_rather_than_reused_after_any_error(db_path):
+    pool = ReadOnlyPool(db_path)
+    with pytest.raises(KeyError):
+        with pool.connection() as conn:
+            first = conn
+            conn.execute('BEGIN')
+            raise KeyError('score')
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute('SELECT 1')
+    with pool.connection() as conn:
+        assert conn is not first
+        assert not conn.in_transaction
+    pool.close()
+
+
+def test_version_changes_when_the_database_is_written(db_path):
+    pool = ReadOnlyPool(db_path)
+    version = pool.version()
+    assert pool.version() == version
+
+    insert_score(db_path, 10)
+    assert pool.version() != version
+    pool.close()
+
+
+def test_missing_database(tmp_path):
+    pool = ReadOnlyPool(str(tmp_path / 'missing.db'))
+    assert not pool.exists()
+    assert pool.version() == (0, 0, None)
+
+
+def test_query_cache_recomputes_on_a_new_version_or_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = QueryCache(ttl=30)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get('k', 1, compute) == 1
+    assert cache.get('k', 1, compute) == 1
+    assert cache.get('k', 2, compute) == 2
+    now[0] += 31
+    assert cache.get('k', 2, compute) == 3
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'keys': 1, 'ttl': 30}
+
+
+def test_query_cache_computes_concurrent_misses_once():
+    cache = QueryCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'rows'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', 1, compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['rows'] * 8
+    assert len(calls) == 1
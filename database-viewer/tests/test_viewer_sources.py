@@ -0,0 +1,52 @@
+import threading
+
+
+def test_gather_sources_reports_failures_and_timeouts(viewer_app):
+    release = threading.Event()
+
+    def fail():
+        raise RuntimeError('database is locked')
+
+    def slow():
+        release.wait(5)
+        return 'late'
+
+    try:
+        results, errors, timings = viewer_app.gather_sources(
+            {'fast': lambda: {'rows': 1}, 'failing': fail, 'slow': slow}, timeout=0.2)
+    finally:
+        release.set()
+
+    assert results == {'fast': {'rows': 1}, 'failing': None, 'slow': None}
+    assert errors == {'failing': 'database is locked', 'slow': 'Timed out after 0.2s'}
+    assert set(timings) == {'fast', 'failing', 'slow', 'total'}
+    assert timings['slow'] >= 200 and timings['total'] < 2000
+
+
+def test_gather_sources_runs_sources_concurrently(viewer_app):
+    barrier = threading.Barrier(3, timeout=2)
+    sources = {name: barrier.wait for name in ('a', 'b', 'c')}
+
+    results, errors, _ = viewer_app.gather_sources(sources, timeout=3)
+
+    assert errors == {}
+    assert sorted(results.values()) == [0, 1, 2]
+
+
+def test_database_data_leaves_out_a_failing_source(viewer_app, monkeypatch):
+    def fail():
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(viewer_app, 'get_snake_game_data', fail)
+    client = viewer_app.app.test_client()
+    body = client.get('/api/database-data').get_json()
+
+    assert body['success'] is True and body['partial'] is True
+    assert body['snake_game'] is None
+    assert body['errors'] == {'snake_game': 'database is locked'}
+
+    for name in ('get_bike_race_data', 'get_temperature_data'):
+        monkeypatch.setattr(viewer_app, name, fail)
+    response = client.get('/api/database-data')
+    assert response.status_code == 500
+    assert set(response.get_json()['errors']) == {'bike_race', 'snake_game', 'temperature'}
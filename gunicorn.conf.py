@@ -0,0 +1,30 @@
+"""
+gunicorn settings for host.py: gunicorn -c gunicorn.conf.py
+Every app is loaded once in the master, then the workers are forked.
+"""
+
+import os
+
+wsgi_app = 'host:create_app()'
+bind = os.environ.get('HOST_BIND', '0.0.0.0:5000')
+preload_app = True
+workers = int(os.environ.get('HOST_WORKERS', 2))
+# Leaderboard and dashboard streams each hold a thread while open
+worker_class = 'gthread'
+threads = int(os.environ.get('HOST_THREADS', 32))
+
+
+def on_starting(server):
+    import host
+    host.check_workers(server.cfg.workers)
+
+
+def post_fork(server, worker):
+    # Render workers and the tile seeder belong to each worker, not the master
+    import host
+    host.start_background()
+
+
+def when_ready(server):
+    import host
+    server.log.info('Memory added by each app before forking:\n%s', host.startup_report())
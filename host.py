@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Single-process host for the four apps
+Mounts snake-game, bike-race-game, temperature-analysis and database-viewer
+under URL prefixes of one WSGI application. Each app is imported and warmed
+up (schema migrated, leaderboard indexes loaded, temperature store seeded)
+once in the parent process; the workers forked from it share those pages
+copy-on-write instead of each app running its own interpreter with its own
+copy of Flask and SQLAlchemy.
+
+Serve with several workers:  gunicorn -c gunicorn.conf.py
+Development server:          python3 host.py [--port 5000]
+Memory per app:              python3 host.py --memory
+
+An app's settings can be given to it alone as <PREFIX>__<NAME>, e.g.
+SNAKE__DATABASE_URL or TEMPERATURE__RENDER_WORKERS; see MOUNTS.
+"""
+
+import argparse
+import gc
+import glob
+import importlib
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+from flask import Flask, jsonify, render_template_string
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (URL prefix, app directory, prefix of its own environment variables), in load order
+MOUNTS = (
+    ('/snake', 'snake-game', 'SNAKE'),
+    ('/bike-race', 'bike-race-game', 'BIKE_RACE'),
+    ('/temperature', 'temperature-analysis', 'TEMPERATURE'),
+    ('/database-viewer', 'database-viewer', 'VIEWER'),
+)
+
+# Defaults that differ from running an app on its own: one render process
+# per web worker, and rendered maps and tiles shared on disk by all workers
+DEFAULTS = {
+    'TEMPERATURE': {
+        'RENDER_WORKERS': '1',
+        'TEMP_MAP_CACHE_DIR': os.path.join(ROOT, 'temperature-analysis', 'instance', 'map_cache'),
+        'TILE_CACHE_DIR': os.path.join(ROOT, 'temperature-analysis', 'instance', 'tile_cache'),
+    },
+}
+
+
+def memory_usage():
+    """This process's memory in bytes: rss, and on Linux pss, shared and private"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    except OSError:
+        # ru_maxrss is the peak, in bytes on macOS and kB elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'rss': peak if sys.platform == 'darwin' else peak * 1024}
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'shared': fields['Shared_Clean'] + fields['Shared_Dirty'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+@contextmanager
+def app_environment(env_prefix, defaults):
+    """Apply <env_prefix>__NAME variables, and defaults for unset names, while an app loads
+
+    Apps read their settings when imported, so the originals are restored
+    afterwards.
+    """
+    overrides = {name: value for name, value in defaults.items() if name not in os.environ}
+    marker = f'{env_prefix}__'
+    overrides.update({name[len(marker):]: value for name, value in os.environ.items()
+                      if name.startswith(marker)})
+    saved = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def conflicting_modules():
+    """Module names that more than one app directory provides with different contents"""
+    sources = {}
+    for _, directory, _ in MOUNTS:
+        for path in glob.glob(os.path.join(ROOT, directory, '*.py')):
+            with open(path, 'rb') as f:
+                sources.setdefault(os.path.basename(path)[:-3], set()).add(f.read())
+    return {name for name, contents in sources.items() if len(contents) > 1}
+
+
+class MountedApp:
+    """One app, imported from its directory.
+
+    Modules whose name another app uses for different code (app, migrations,
+    ...) are taken out of sys.modules once the app is loaded, so the next
+    app imports its own; the app keeps using them through its references.
+    The shared/ package the apps all import is loaded once.
+    """
+
+    def __init__(self, prefix, directory, env_prefix):
+        self.prefix = prefix
+        self.directory = directory
+        self.env_prefix = env_prefix
+        self.path = os.path.join(ROOT, directory)
+        self.module = None
+        self.modules = {}
+        self.memory = 0
+        self.load_seconds = 0.0
+
+    def load(self, defaults=None, conflicting=()):
+        """Import the app and run its warm_up(); records the RSS and time it took"""
+        before = memory_usage()['rss']
+        start = time.perf_counter()
+        with app_environment(self.env_prefix, defaults or {}):
+            sys.path.insert(0, self.path)
+            try:
+                self.module = importlib.import_module('app')
+                warm_up = getattr(self.module, 'warm_up', None)
+                if warm_up:
+                    warm_up()
+            finally:
+                sys.path.remove(self.path)
+                for name, module in list(sys.modules.items()):
+                    if os.path.dirname(getattr(module, '__file__', None) or '') == self.path:
+                        self.modules[name] = module
+                        if name in conflicting:
+                            del sys.modules[name]
+        self.load_seconds = time.perf_counter() - start
+        self.memory = memory_usage()['rss'] - before
+
+        app = self.module.app
+        app.config['APPLICATION_ROOT'] = self.prefix
+        # The apps now share one origin; keep each session cookie to its own prefix
+        app.config['SESSION_COOKIE_PATH'] = self.prefix
+        return self
+
+    def sqlite_path(self):
+        """The game database file, or None when it is not SQLite"""
+        db = getattr(self.module, 'db', None)
+        if db is None:
+            return None
+        with self.module.app.app_context():
+            url = db.engine.url
+        return url.database if url.get_backend_name() == 'sqlite' else None
+
+
+mounted = []
+startup_memory = {}
+
+
+def load_apps():
+    """Import and warm up every app in MOUNTS order"""
+    startup_memory['host'] = memory_usage()['rss']
+    conflicting = conflicting_modules()
+    for prefix, directory, env_prefix in MOUNTS:
+        defaults = dict(DEFAULTS.get(env_prefix, {}))
+        if env_prefix == 'VIEWER':
+            # The viewer reads the databases and store of the apps hosted with it
+            apps = {app.directory: app for app in mounted}
+            for name, game in (('BIKE_RACE_DB', 'bike-race-game'), ('SNAKE_GAME_DB', 'snake-game')):
+                path = apps[game].sqlite_path()
+                if path:
+                    defaults[name] = path
+            defaults['TEMPERATURE_STORE'] = apps['temperature-analysis'].module.TEMPERATURE_STORE
+        mounted.append(MountedApp(prefix, directory, env_prefix).load(defaults, conflicting))
+    # Modules imported later (charts and render_pool in the render
+    # processes) are found here
+    for app in mounted:
+        sys.path.append(app.path)
+    startup_memory['total'] = memory_usage()['rss']
+    return mounted
+
+
+def check_workers(workers):
+    """Raise RuntimeError if a game would be served by several processes off a non-SQLite database
+
+    Each worker keeps its own in-memory leaderboard indexes. Workers pick
+    up each other's scores only from a SQLite file (see catch_up_indexes in
+    the games), so a game on any other database needs a single worker.
+    """
+    if workers <= 1:
+        return
+    games = [app.directory for app in mounted
+             if getattr(app.module, 'db', None) is not None and app.sqlite_path() is None]
+    if games:
+        raise RuntimeError(f'{", ".join(games)} not on SQLite: serve with HOST_WORKERS=1, not {workers}')
+
+
+def start_background():
+    """Start each app's per-process background work (its start_background())
+
+    Called in every serving process: after the fork in each gunicorn
+    worker (post_fork in gunicorn.conf.py), or before the development
+    server starts.
+    """
+    for app in mounted:
+        start = getattr(app.module, 'start_background', None)
+        if start:
+            start()
+
+
+def startup_report():
+    """Text table of the RSS each app added to the parent process"""
+    mb = 1024 * 1024
+    lines = [f'{"app":<38} {"RSS MB":>8} {"load s":>7} {"modules":>8}',
+             f'{"interpreter and Flask":<38} {startup_memory["host"] / mb:>8.1f}']
+    for app in mounted:
+        lines.append(f'{app.prefix + " (" + app.directory + ")":<38} {app.memory / mb:>8.1f} '
+                     f'{app.load_seconds:>7.2f} {len(app.modules):>8}')
+    lines.append(f'{"total":<38} {startup_memory["total"] / mb:>8.1f}')
+    return '\n'.join(lines)
+
+
+host = Flask(__name__)
+
+INDEX = """<!DOCTYPE html>
+<html><head><title>Web Games Collection</title></head>
+<body>
+<h1>Web Games Collection</h1>
+<ul>
+{% for app in apps %}<li><a href="{{ app.prefix }}/">{{ app.directory }}</a></li>
+{% endfor %}</ul>
+</body></html>
+"""
+
+
+@host.route('/')
+def index():
+    return render_template_string(INDEX, apps=mounted)
+
+
+@host.route('/health')
+def health_check():
+    """Health check endpoint for load balancer"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'host',
+        'apps': {app.prefix: app.directory for app in mounted},
+        'pid': os.getpid(),
+    }), 200
+
+
+@host.route('/memory')
+def memory():
+    """Memory of the worker answering, and what each app added to the parent at startup"""
+    return jsonify({
+        'pid': os.getpid(),
+        'worker': memory_usage(),
+        'startup': dict(startup_memory, apps={app.prefix: app.memory for app in mounted}),
+    })
+
+
+def create_app():
+    """Load every app and return the WSGI application mounting them"""
+    load_apps()
+    application = DispatcherMiddleware(host, {app.prefix: app.module.app for app in mounted})
+    # Move everything loaded so far out of the cyclic garbage collector's
+    # view, so collections in forked workers do not write to (and copy) it
+    gc.freeze()
+    return application
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--memory', action='store_true', help='load every app, print its memory and exit')
+    args = parser.parse_args()
+
+    application = create_app()
+    print(startup_report())
+    if args.memory:
+        return
+    start_background()
+    from werkzeug.serving import run_simple
+    run_simple(args.host, args.port, application, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""
+Modules shared by the four apps
+Each app puts the repository root on sys.path and imports these as
+shared.<module>, so every app, and host.py serving them together, runs
+one copy of the code.
+"""
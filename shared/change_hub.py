@@ -0,0 +1,189 @@
+"""
+Change notification hub and Server-Sent Events stream
+Producers publish a topic's new state (after a write, or from a watcher
+that polls a cheap data version); the hub keeps the latest state and the
+JSON merge patch (RFC 7386) from the previous one, and wakes every
+subscribed stream. A stream sends one snapshot per topic, then only the
+patches, so an idle client is one blocked thread and a change costs a
+few bytes per client.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+# Response headers for an event stream; proxies must not buffer or cache it
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+class HubFull(Exception):
+    """Raised when the hub already serves its maximum number of streams"""
+
+
+# merge_patch() result for equal states; None is a patch (a delete, or a new null state)
+UNCHANGED = object()
+
+
+def merge_patch(old, new):
+    """JSON merge patch turning old into new, or UNCHANGED when they are equal
+
+    Objects are diffed key by key (removed keys become null); anything
+    else, lists included, is replaced whole.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return UNCHANGED if old == new and type(old) is type(new) else new
+    patch = {}
+    for key in old.keys() - new.keys():
+        patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        else:
+            change = merge_patch(old[key], value)
+            if change is not UNCHANGED:
+                patch[key] = change
+    return patch or UNCHANGED
+
+
+def sse_event(event, data, event_id=None):
+    """One Server-Sent Events message"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':'), default=str))
+    return '\n'.join(lines) + '\n\n'
+
+
+class ChangeHub:
+    """Latest state per topic, versioned by a hub-wide sequence number.
+
+    Event ids are '<hub id>-<sequence number>', so a reconnecting client's
+    Last-Event-ID says what it has already seen, and one that reconnects
+    to another process (another hub id) starts over with snapshots.
+    Watchers are polled only while some stream subscribes to their topic.
+    """
+
+    def __init__(self, heartbeat=15.0, max_clients=100, poll_interval=0.5):
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self.hub_id = uuid.uuid4().hex[:8]
+        self._seq = 0
+        # topic -> (seq of last change, seq of the change before, state, patch)
+        self._topics = {}
+        self._watchers = {}
+        self._subscribers = {}
+        self._clients = 0
+        self._thread = None
+        self.published = 0
+        # Processes forked from one that imported the hub (preloading servers)
+        # must not share its id, or they would accept each other's event ids
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self):
+        self.hub_id = uuid.uuid4().hex[:8]
+        self._thread = None
+
+    def publish(self, topic, state):
+        """Record a topic's new state; wakes subscribers only if it changed"""
+        with self._cond:
+            current = self._topics.get(topic)
+            if current is not None:
+                patch = merge_patch(current[2], state)
+                if patch is UNCHANGED:
+                    return False
+            else:
+                patch = None
+            self._seq += 1
+            self._topics[topic] = (self._seq, current[0] if current else 0, state, patch)
+            self.published += 1
+            self._cond.notify_all()
+        return True
+
+    def watch(self, topic, version, load):
+        """Publish load() whenever version() changes, checked while the topic has subscribers"""
+        with self._cond:
+            self._watchers[topic] = {'version': version, 'load': load, 'seen': object()}
+
+    def check(self, topic):
+        """Run a topic's watcher now"""
+        watcher = self._watchers.get(topic)
+        if watcher is None:
+            return
+        try:
+            version = watcher['version']()
+            if version != watcher['seen']:
+                self.publish(topic, watcher['load']())
+                watcher['seen'] = version
+        except Exception as e:
+            log.warning('Change check for %s failed: %s', topic, e)
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._cond:
+                watched = [topic for topic in self._watchers if self._subscribers.get(topic)]
+            for topic in watched:
+                self.check(topic)
+
+    def _event(self, topic, seen):
+        seq, previous, state, patch = self._topics[topic]
+        event_id = f'{self.hub_id}-{self._seq}'
+        if patch is not None and previous and previous <= seen:
+            return sse_event('patch', {'topic': topic, 'patch': patch}, event_id)
+        return sse_event('snapshot', {'topic': topic, 'state': state}, event_id)
+
+    def stream(self, topics, last_event_id=None):
+        """Generator of SSE messages for topics; raises HubFull before the first one"""
+        with self._cond:
+            if self._clients >= self.max_clients:
+                raise HubFull(f'{self._clients} streams open')
+        hub_id, _, seq = (last_event_id or '').partition('-')
+        seen = int(seq) if hub_id == self.hub_id and seq.isdigit() else 0
+        return self._run(list(topics), seen)
+
+    def _run(self, topics, seen):
+        # Counted from the first message on, so a stream that is never
+        # iterated leaves nothing behind
+        with self._cond:
+            self._clients += 1
+            for topic in topics:
+                self._subscribers[topic] = self._subscribers.get(topic, 0) + 1
+            if self._watchers and self._thread is None:
+                # Started by the first stream rather than at import, so it
+                # runs in the serving process even when workers are forked
+                self._thread = threading.Thread(target=self._poll, name='change-hub', daemon=True)
+                self._thread.start()
+        try:
+            # Bring watched topics up to date before the first snapshot
+            for topic in topics:
+                self.check(topic)
+            yield 'retry: 2000\n\n'
+            while True:
+                with self._cond:
+                    changed = [t for t in topics if t in self._topics and self._topics[t][0] > seen]
+                    if not changed:
+                        self._cond.wait(self.heartbeat)
+                        changed = [t for t in topics if t in self._topics and self._topics[t][0] > seen]
+                    events = [self._event(topic, seen) for topic in changed]
+                    seen = self._seq
+                yield ''.join(events) if events else ': keepalive\n\n'
+        finally:
+            with self._cond:
+                self._clients -= 1
+                for topic in topics:
+                    self._subscribers[topic] -= 1
+
+    def status(self):
+        with self._cond:
+            return {
+                'clients': self._clients,
+                'max_clients': self.max_clients,
+                'published': self.published,
+                'topics': {topic: entry[0] for topic, entry in self._topics.items()},
+            }
@@ -0,0 +1,107 @@
+"""
+Database configuration for the game apps
+Reads the database URL from the environment and tunes the engine: WAL
+journaling and pragmas for SQLite, a sized connection pool for both SQLite
+and PostgreSQL (the RDS instance in aws-deployment).
+"""
+
+import os
+import sqlite3
+import threading
+import urllib.parse
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+
+def database_uri(default):
+    """Return DATABASE_URL, or default when it is not set"""
+    uri = os.environ.get('DATABASE_URL', default)
+    # Heroku/RDS-style URLs use the scheme SQLAlchemy dropped in 1.4
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def is_sqlite_file(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') != 'sqlite:'
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for uri"""
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    if uri.startswith('sqlite'):
+        if not is_sqlite_file(uri):
+            return {}
+        busy_timeout_ms = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+        options.update({
+            'poolclass': QueuePool,
+            'connect_args': {'timeout': busy_timeout_ms / 1000, 'check_same_thread': False},
+        })
+    else:
+        options.update({
+            'pool_pre_ping': True,
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        })
+    return options
+
+
+def sqlite_pragmas():
+    """Pragmas applied to every new SQLite connection"""
+    return {
+        'journal_mode': 'WAL',
+        # NORMAL is durable across application crashes in WAL mode; only an
+        # OS crash or power loss can roll back the last transactions
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'temp_store': 'MEMORY',
+    }
+
+
+def configure_engine(engine):
+    """Apply the SQLite pragmas to each connection the engine opens"""
+    if engine.dialect.name != 'sqlite' or not is_sqlite_file(str(engine.url)):
+        return
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+class DataVersion:
+    """Cheap check for commits to a SQLite file, by any connection or process
+
+    Reads PRAGMA data_version on a read-only connection of its own, which
+    never writes: the value changes whenever another connection commits.
+    The connection is reopened in a process forked after it was opened.
+    """
+
+    def __init__(self, path):
+        self.uri = 'file:' + urllib.parse.quote(path) + '?mode=ro'
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pid = None
+
+    def current(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.connection = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+                self.pid = os.getpid()
+            return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+
+def data_version(engine):
+    """A DataVersion for the engine's database, or None when it is not a SQLite file"""
+    if engine.dialect.name != 'sqlite' or not is_sqlite_file(str(engine.url)):
+        return None
+    return DataVersion(engine.url.database)
@@ -0,0 +1,154 @@
+"""
+Windowed leaderboard rollups for the game apps
+Keeps each player's best result per board (a Score column such as score
+or distance) and per period (today, this week, all time) in the
+leaderboard_best table, upserted in the same transaction as the scores.
+Reading a board is one index range of at most `limit` rows however much
+history the score table holds, and a new day or week starts by writing
+to a new period key, so rollover needs no reset job.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, Integer, String, bindparam, text
+
+WINDOWS = ('daily', 'weekly', 'all')
+
+# Periods of each window kept before pruning; days and weeks are UTC
+RETENTION = {'daily': 31, 'weekly': 12}
+
+# Keep the best value per (board, period, user); ties keep the earliest game
+UPSERT = text("""
+    INSERT INTO leaderboard_best (board, period, user_id, value, timestamp)
+    VALUES (:board, :period, :user_id, :value, :timestamp)
+    ON CONFLICT (board, period, user_id) DO UPDATE SET
+        value = excluded.value,
+        timestamp = excluded.timestamp
+    WHERE excluded.value > leaderboard_best.value
+""").bindparams(bindparam('timestamp', type_=DateTime))
+
+TOP = text("""
+    SELECT u.username, l.value, l.timestamp
+    FROM leaderboard_best l
+    JOIN "user" u ON u.id = l.user_id
+    WHERE l.board = :board AND l.period = :period
+    ORDER BY l.value DESC, l.timestamp
+    LIMIT :limit
+""").columns(username=String, value=Integer, timestamp=DateTime)
+
+USER_BEST = text("""
+    SELECT value FROM leaderboard_best
+    WHERE board = :board AND period = :period AND user_id = :user_id
+""")
+
+# Period keys of one window share a prefix and sort by date, so pruning is a range delete
+PRUNE = text("""
+    DELETE FROM leaderboard_best
+    WHERE board = :board AND period >= :first AND period < :cutoff
+""")
+
+
+def period_start(window, when):
+    """Start of the UTC day or Monday-started week containing when"""
+    start = datetime(when.year, when.month, when.day)
+    return start - timedelta(days=when.weekday()) if window == 'weekly' else start
+
+
+def oldest_kept(window, now):
+    """Start of the oldest period of a window that pruning keeps"""
+    step = timedelta(days=1 if window == 'daily' else 7)
+    return period_start(window, now - step * (RETENTION[window] - 1))
+
+
+def period_key(window, when):
+    """Period of a UTC datetime in a window: 'day:2025-01-31', 'week:2025-01-27' (its Monday) or 'all'"""
+    if window == 'all':
+        return 'all'
+    prefix = 'day' if window == 'daily' else 'week'
+    return f'{prefix}:{period_start(window, when).date().isoformat()}'
+
+
+class LeaderboardRollups:
+    """Best value per player, board and period in the leaderboard_best table.
+
+    boards are the Score columns ranked, highest first. record() must be
+    given every score inserted, in the inserting transaction.
+    """
+
+    def __init__(self, boards=('score',)):
+        self.boards = tuple(boards)
+        self._pruned_day = None
+
+    def _fold(self, scores, best, since=None):
+        # best maps (board, period, user_id) -> (value, timestamp); keep the higher value
+        for row in scores:
+            timestamp = row['timestamp']
+            periods = [period_key(window, timestamp) for window in WINDOWS
+                       if window == 'all' or since is None or timestamp >= since[window]]
+            for board in self.boards:
+                value = row[board]
+                for period in periods:
+                    key = (board, period, row['user_id'])
+                    kept = best.get(key)
+                    if kept is None or value > kept[0] or (value == kept[0] and timestamp < kept[1]):
+                        best[key] = (value, timestamp)
+        return best
+
+    @staticmethod
+    def _upsert_values(best):
+        return [{'board': board, 'period': period, 'user_id': user_id, 'value': value, 'timestamp': timestamp}
+                for (board, period, user_id), (value, timestamp) in best.items()]
+
+    def record(self, session, scores, now=None):
+        """Upsert the bests of newly inserted scores (dicts with user_id, timestamp and each board)
+
+        Runs on the caller's session without committing. The first write
+        of each UTC day also prunes periods past their retention.
+        """
+        best = self._fold(scores, {})
+        if best:
+            session.execute(UPSERT, self._upsert_values(best))
+        now = now or datetime.utcnow()
+        if self._pruned_day != now.date():
+            self.prune(session, now)
+            self._pruned_day = now.date()
+
+    def prune(self, session, now=None):
+        """Delete daily and weekly periods older than RETENTION"""
+        now = now or datetime.utcnow()
+        for window in RETENTION:
+            cutoff = period_key(window, oldest_kept(window, now))
+            first = cutoff.split(':')[0] + ':'
+            for board in self.boards:
+                session.execute(PRUNE, {'board': board, 'first': first, 'cutoff': cutoff})
+
+    def rebuild(self, session, now=None, batch_size=10000):
+        """Recompute every kept period from the score table; the caller commits"""
+        now = now or datetime.utcnow()
+        since = {window: oldest_kept(window, now) for window in RETENTION}
+        columns = ', '.join(('user_id', 'timestamp') + self.boards)
+        result = session.execute(text(f'SELECT {columns} FROM score').columns(timestamp=DateTime)).mappings()
+        best = {}
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            self._fold(rows, best, since)
+        session.execute(text('DELETE FROM leaderboard_best'))
+        values = self._upsert_values(best)
+        for start in range(0, len(values), batch_size):
+            session.execute(UPSERT, values[start:start + batch_size])
+        return len(values)
+
+    def is_empty(self, session):
+        return session.execute(text('SELECT 1 FROM leaderboard_best LIMIT 1')).first() is None
+
+    def top(self, session, board, window, limit=10, now=None):
+        """[(username, value, timestamp)] of the best players on a board in the current period"""
+        period = period_key(window, now or datetime.utcnow())
+        return session.execute(TOP, {'board': board, 'period': period, 'limit': limit}).all()
+
+    def user_best(self, session, board, window, user_id, now=None):
+        """The player's best on a board in the current period, or None"""
+        period = period_key(window, now or datetime.utcnow())
+        return session.execute(USER_BEST, {'board': board, 'period': period, 'user_id': user_id}).scalar()
@@ -0,0 +1,156 @@
+"""
+Asynchronous login audit log
+Takes LoginLog writes off the login request: logins are queued and a
+background thread writes them in batches, optionally collapsing
+high-traffic users into per-user daily login counts.
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class LoginAuditWriter:
+    """Background, batching writer for login audit records.
+
+    write_batch(rows, counts) must write both lists in one transaction:
+    rows are LoginLog column dicts, counts are per-user daily count
+    increments (user_id, day, login_count, last_login_time, last_ip_address).
+
+    rows_per_day limits how many individual LoginLog rows a user gets per
+    UTC day in this process; logins beyond it only increment the daily
+    count. None keeps one row per login. record() never blocks: when the
+    queue is full the login is folded into the daily counts instead.
+    """
+
+    def __init__(self, write_batch, rows_per_day=None, max_queue=10000,
+                 batch_size=500, flush_interval=1.0, max_retries=3):
+        self.write_batch = write_batch
+        self.rows_per_day = rows_per_day
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._overflow_lock = threading.Lock()
+        self._overflow = {}
+        self._rows_today = {}
+        self._today = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self.written_rows = 0
+        self.counted_logins = 0
+        self.overflowed = 0
+        self.dropped = 0
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='login-audit', daemon=True)
+        self._thread.start()
+
+    def record(self, user_id, ip_address, login_time=None):
+        """Queue a login without waiting for the database"""
+        login_time = login_time or datetime.utcnow()
+        try:
+            self._queue.put_nowait((user_id, login_time, ip_address))
+        except queue.Full:
+            # Backpressure: keep the count, give up the individual row
+            with self._overflow_lock:
+                self._fold(self._overflow, user_id, login_time, ip_address)
+                self.overflowed += 1
+
+    @staticmethod
+    def _fold(counts, user_id, login_time, ip_address):
+        key = (user_id, login_time.date())
+        entry = counts.get(key)
+        if entry is None:
+            counts[key] = [1, login_time, ip_address]
+        else:
+            entry[0] += 1
+            entry[1] = max(entry[1], login_time)
+            if entry[1] == login_time:
+                entry[2] = ip_address
+
+    def status(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'rows_per_day': self.rows_per_day,
+            'written_rows': self.written_rows,
+            'counted_logins': self.counted_logins,
+            'overflowed': self.overflowed,
+            'dropped': self.dropped,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        while True:
+            stopping = self._stopping.is_set()
+            events = self._drain()
+            if events or self._overflow:
+                self._write(events)
+            if stopping and self._queue.empty():
+                # Logins record() folded in after that write
+                if self._overflow:
+                    self._write([])
+                return
+
+    def _drain(self):
+        """Collect up to batch_size events, waiting at most flush_interval"""
+        events = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(events) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0 and not self._stopping.is_set():
+                    events.append(self._queue.get(timeout=timeout))
+                else:
+                    events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _write(self, events):
+        rows = []
+        with self._overflow_lock:
+            counts, self._overflow = self._overflow, {}
+        overflow_logins = sum(entry[0] for entry in counts.values())
+
+        for user_id, login_time, ip_address in events:
+            day = login_time.date()
+            if day != self._today:
+                self._today = day
+                self._rows_today = {}
+            if self.rows_per_day is not None:
+                self._fold(counts, user_id, login_time, ip_address)
+                if self._rows_today.get(user_id, 0) >= self.rows_per_day:
+                    continue
+                self._rows_today[user_id] = self._rows_today.get(user_id, 0) + 1
+            rows.append({'user_id': user_id, 'login_time': login_time, 'ip_address': ip_address})
+
+        count_rows = [
+            {'user_id': user_id, 'day': day, 'login_count': count,
+             'last_login_time': last_login_time, 'last_ip_address': last_ip_address}
+            for (user_id, day), (count, last_login_time, last_ip_address) in counts.items()
+        ]
+        for attempt in range(self.max_retries):
+            try:
+                self.write_batch(rows, count_rows)
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                time.sleep(self.flush_interval)
+        else:
+            self.dropped += len(events) + overflow_logins
+            return
+        self.written_rows += len(rows)
+        self.counted_logins += sum(row['login_count'] for row in count_rows)
+        self.last_error = None
+
+    def close(self):
+        """Write what is queued and stop the background thread"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
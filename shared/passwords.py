@@ -0,0 +1,68 @@
+"""
+Password hashing for the game apps
+Wraps werkzeug's hashing with a configurable method and cost, caps how
+many hashes run at once and upgrades stored hashes on login.
+"""
+
+import os
+import threading
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# werkzeug 2.3's default; the method string is stored as the hash prefix
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+# Parameters werkzeug 2.3 fills in for short method strings
+PBKDF2_DEFAULTS = ('sha256', '600000')
+SCRYPT_DEFAULTS = ('32768', '8', '1')
+
+
+def method_prefix(method):
+    """The prefix werkzeug writes for method, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+
+    Worked out from the method string, so no hash is computed to learn it.
+    """
+    name, *params = method.split(':')
+    if name == 'pbkdf2':
+        defaults = PBKDF2_DEFAULTS
+    elif name == 'scrypt':
+        defaults = SCRYPT_DEFAULTS
+    else:
+        return method
+    return ':'.join([name, *params, *defaults[len(params):]])
+
+
+class PasswordHasher:
+    """Hash and verify passwords, at most `workers` at a time.
+
+    Hashing runs on the request thread; hashlib releases the GIL meanwhile,
+    so up to `workers` logins hash in parallel across cores and the rest
+    wait, leaving request threads that are not logging in their share of
+    the CPU. Size it to the cores the server may spend on logins.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None):
+        self.method = method
+        self.workers = workers or os.cpu_count() or 2
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self.prefix = method_prefix(method)
+
+    def hash(self, password):
+        """Return a new hash of password using the configured method"""
+        with self._slots:
+            return generate_password_hash(password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Check password against stored_hash.
+
+        Returns (ok, new_hash). new_hash is set when the password matched but
+        stored_hash was made with other parameters and should be replaced.
+        """
+        with self._slots:
+            ok = check_password_hash(stored_hash, password)
+        if ok and self.needs_rehash(stored_hash):
+            return True, self.hash(password)
+        return ok, None
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.prefix
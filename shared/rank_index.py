@@ -0,0 +1,120 @@
+"""
+In-memory rank index for the game apps
+Counts players by their best result in a Fenwick tree (binary indexed
+tree) over result values, so a player's global rank - one plus the number
+of players with a better best - is two O(log n) prefix sums instead of a
+COUNT over the score table.
+"""
+
+import bisect
+import threading
+
+
+class RankIndex:
+    """Per-player best values and a Fenwick tree counting players per value.
+
+    Values 0..max_value-1 are counted in the tree; negative values count as
+    0, and the rare values at or above max_value are kept in a sorted list
+    so their ranks stay exact. Like LeaderboardIndex, every worker process
+    keeps its own copy, loaded once from the database and updated by
+    submit_score in the same process and by catching up on scores other
+    processes inserted.
+    """
+
+    def __init__(self, max_value=1 << 20):
+        self.max_value = max_value
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._tree = [0] * (max_value + 1)
+        self._overflow = []
+        self._best = {}
+
+    def __len__(self):
+        return len(self._best)
+
+    def _slot(self, value):
+        return max(0, value)
+
+    def _update(self, value, delta):
+        value = self._slot(value)
+        if value >= self.max_value:
+            if delta > 0:
+                bisect.insort(self._overflow, value)
+            else:
+                del self._overflow[bisect.bisect_left(self._overflow, value)]
+            return
+        i = value + 1
+        while i <= self.max_value:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, value):
+        # Players whose best is <= value
+        value = self._slot(value)
+        if value >= self.max_value:
+            return len(self._best) - len(self._overflow) + bisect.bisect_right(self._overflow, value)
+        total = 0
+        i = value + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def load(self, best_rows):
+        """Replace the index contents from (user_id, best value) rows"""
+        best = {user_id: value for user_id, value in best_rows if value is not None}
+        tree = [0] * (self.max_value + 1)
+        overflow = []
+        for value in best.values():
+            value = self._slot(value)
+            if value >= self.max_value:
+                overflow.append(value)
+            else:
+                tree[value + 1] += 1
+        # Linear-time Fenwick construction: push each node's count to its parent
+        for i in range(1, self.max_value + 1):
+            parent = i + (i & -i)
+            if parent <= self.max_value:
+                tree[parent] += tree[i]
+        overflow.sort()
+
+        with self._lock:
+            self._tree = tree
+            self._overflow = overflow
+            self._best = best
+            self.loaded = True
+
+    def load_from_db(self, session, Score, column='score'):
+        """Load the index with one grouped MAX query over a Score column"""
+        from sqlalchemy import func
+
+        self.load(session.query(Score.user_id, func.max(getattr(Score, column)))
+                  .group_by(Score.user_id).all())
+
+    def add(self, user_id, value):
+        """Record a newly submitted result; only a new best moves the player"""
+        with self._lock:
+            best = self._best.get(user_id)
+            if best is not None and value <= best:
+                return
+            if best is not None:
+                self._update(best, -1)
+            self._best[user_id] = value
+            self._update(value, 1)
+
+    def best(self, user_id):
+        """The player's best value or None if they have not played"""
+        return self._best.get(user_id)
+
+    def rank_of(self, value):
+        """Rank a best of value would have: 1 + players with a better best"""
+        with self._lock:
+            return len(self._best) - self._count_at_most(value) + 1
+
+    def rank(self, user_id):
+        """The player's rank or None if they have not played; ties share a rank"""
+        with self._lock:
+            best = self._best.get(user_id)
+            if best is None:
+                return None
+            return len(self._best) - self._count_at_most(best) + 1
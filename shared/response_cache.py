@@ -0,0 +1,118 @@
+"""
+Conditional, compressed JSON responses
+An endpoint names its payload by a cache key and a data version. The ETag
+is derived from the two, so a client that already holds the current
+version gets 304 Not Modified before the payload is built. Otherwise the
+JSON body is built once per version and kept, together with its gzip and
+Brotli encodings (made on first request), for every later client.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, json, request
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class ResponseCache:
+    """LRU of JSON bodies by key, one version each, with their encodings.
+
+    Bodies shorter than min_size are sent uncompressed; compressing them
+    costs more than it saves.
+    """
+
+    def __init__(self, max_entries=256, min_size=1024):
+        self.max_entries = max_entries
+        self.min_size = min_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag(key, version):
+        return hashlib.sha1(repr((key, version)).encode()).hexdigest()[:20]
+
+    def _negotiate(self, size):
+        if size < self.min_size:
+            return None
+        accepted = request.accept_encodings
+        for encoding in ENCODINGS:
+            if accepted[encoding]:
+                return encoding
+        return None
+
+    def respond(self, key, version, build, private=False):
+        """The response for key at version; build() makes the payload on a miss
+
+        build() returns the payload dict, or a ready response (an error, a
+        partial result) that is sent as it is and not cached. private marks
+        payloads that differ per session.
+        """
+        etag = self.etag(key, version)
+        # Whichever encoding of this version the client holds is still current
+        for tag in (etag, f'{etag}-gzip', f'{etag}-br'):
+            if request.if_none_match.contains(tag):
+                self.not_modified += 1
+                return self._finish(Response(status=304), tag, private)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+        if entry is None:
+            payload = build()
+            if not isinstance(payload, dict):
+                return payload
+            body = json.dumps(payload).encode() + b'\n'
+            entry = (version, {None: body})
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        bodies = entry[1]
+        encoding = self._negotiate(len(bodies[None]))
+        if encoding is not None and encoding not in bodies:
+            # Racing threads may both compress; either result is the same
+            bodies[encoding] = compress(bodies[None], encoding)
+        response = Response(bodies[encoding], mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+            etag = f'{etag}-{encoding}'
+        return self._finish(response, etag, private)
+
+    @staticmethod
+    def _finish(response, etag, private):
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = True
+        if private:
+            response.cache_control.private = True
+            response.vary.add('Cookie')
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'not_modified': self.not_modified,
+                    'keys': len(self._entries), 'encodings': list(ENCODINGS)}
@@ -0,0 +1,192 @@
+"""
+Write-behind score writer
+Buffers finished games in a bounded in-process queue backed by an
+append-only journal file and inserts them in batches, so a game end costs
+one journal fsync instead of a database commit.
+"""
+
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class QueueFull(Exception):
+    """Raised when the write-behind queue is at capacity"""
+
+
+class ScoreWriter:
+    """Bounded write-behind queue with a local journal for crash recovery.
+
+    flush_rows(rows) must insert the rows in a single transaction. Rows are
+    plain JSON-serializable dicts. Each process journals to its own files and
+    keeps them locked while it runs, so recover() only replays journals whose
+    owner has exited.
+    """
+
+    def __init__(self, flush_rows, journal_dir, max_queue=10000, batch_size=200, flush_interval=1.0):
+        self.flush_rows = flush_rows
+        self.journal_dir = journal_dir
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._batch = None
+        self._journal = None
+        self._batch_journal = None
+        self._thread = None
+        self._stopping = False
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.last_flush = None
+        self.last_error = None
+
+        name = f'scores-{uuid.uuid4().hex[:12]}'
+        self._journal_path = os.path.join(journal_dir, f'{name}.jsonl')
+        self._batch_path = os.path.join(journal_dir, f'{name}.flushing.jsonl')
+
+    def start(self):
+        """Open this process's journal and start the background flusher"""
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._journal = self._open_locked(self._journal_path)
+        self._thread = threading.Thread(target=self._run, name='score-writer', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _open_locked(path):
+        journal = open(path, 'a', encoding='utf-8')
+        fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return journal
+
+    def submit(self, row):
+        """Durably journal a row and queue it; raises QueueFull under backpressure"""
+        line = json.dumps(row, separators=(',', ':')) + '\n'
+        with self._cond:
+            if self._depth() >= self.max_queue:
+                raise QueueFull(f'{self._depth()} scores waiting to be written')
+            self._journal.write(line)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _depth(self):
+        return len(self._pending) + len(self._batch or ())
+
+    def depth(self):
+        """Number of journaled rows not yet in the database"""
+        with self._cond:
+            return self._depth()
+
+    def status(self):
+        return {
+            'queue_depth': self.depth(),
+            'max_queue': self.max_queue,
+            'flushed': self.flushed,
+            'failed_flushes': self.failed_flushes,
+            'last_flush': self.last_flush,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            ok = self.flush()
+            if stopping:
+                if ok:
+                    self.flush()  # Rows queued behind a retried batch
+                return
+            if not ok:
+                time.sleep(self.flush_interval)
+
+    def flush(self):
+        """Write the queued rows in one transaction; returns False if the write failed"""
+        with self._cond:
+            if self._batch is None:
+                if not self._pending:
+                    return True
+                # Rotate the journal so new submits never mix with this batch.
+                # The rotated file stays locked until the batch is committed.
+                self._batch, self._pending = self._pending, []
+                os.replace(self._journal_path, self._batch_path)
+                self._batch_journal = self._journal
+                self._journal = self._open_locked(self._journal_path)
+            batch = self._batch
+
+        try:
+            self.flush_rows(batch)
+        except Exception as e:
+            # Keep the batch and its journal; the next flush retries it
+            self.failed_flushes += 1
+            self.last_error = str(e)
+            return False
+
+        os.remove(self._batch_path)
+        with self._cond:
+            self._batch_journal.close()
+            self._batch_journal = None
+            self._batch = None
+        self.flushed += len(batch)
+        self.last_flush = datetime.now().isoformat()
+        self.last_error = None
+        return True
+
+    def close(self):
+        """Flush what is queued and stop the background thread"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+        with self._cond:
+            empty = not self._pending and self._batch is None
+            self._journal.close()
+            if empty:
+                os.remove(self._journal_path)
+
+    def recover(self, flush_recovered):
+        """Replay journals left behind by processes that exited without flushing
+
+        flush_recovered(rows) must skip rows that already reached the
+        database, since a process can die between commit and journal cleanup;
+        give each submitted row a unique id to insert it by.
+        Returns the number of rows handed to flush_recovered.
+        """
+        recovered = 0
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'scores-*.jsonl'))):
+            if path in (self._journal_path, self._batch_path):
+                continue
+            try:
+                journal = self._open_locked(path)
+            except BlockingIOError:
+                continue  # Owner is still running
+            with journal:
+                rows = self._read_journal(path)
+                if rows:
+                    flush_recovered(rows)
+                    recovered += len(rows)
+                os.remove(path)
+        return recovered
+
+    @staticmethod
+    def _read_journal(path):
+        rows = []
+        with open(path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    break  # Torn final write from a crash
+        return rows
@@ -0,0 +1,215 @@
+"""
+Precomputed statistics for the temperature store
+Dashboard statistics over every city's latest reading are computed in one
+vectorized pass and then kept current as readings arrive, so serving them
+costs nothing per request. Hourly, daily and monthly rollups (count, sum,
+min and max per bucket and city) are updated only in the cells that new
+readings touch, and rolling-window aggregates are read straight from them.
+"""
+
+import os
+import uuid
+
+import numpy as np
+
+# Cities above HOT and below COOL degrees are counted on the dashboard
+HOT = 35
+COOL = 30
+
+ROLLUP_FREQS = ('h', 'D', 'M')
+# How many of the newest buckets each rollup keeps (None keeps all)
+RETENTION = {'h': 24 * 14, 'D': 366 * 2, 'M': None}
+ROLLUP_COLUMNS = ('buckets', 'count', 'sum', 'min', 'max')
+
+
+def _tenths(temp):
+    # Readings have one decimal, so sums in tenths stay exact however often they change
+    return int(round(temp * 10))
+
+
+def snapshot_state(latest):
+    """Statistics state of {city: {'temp', ...}} computed in one vectorized pass
+
+    The state holds running totals (sum in tenths, threshold counts) and
+    the hottest and coolest city, which update_state keeps current.
+    """
+    names = list(latest)
+    if not names:
+        return {'hot': HOT, 'cool': COOL, 'count': 0, 'sum_tenths': 0, 'above_hot': 0,
+                'below_cool': 0, 'hottest': None, 'coolest': None}
+    temps = np.fromiter((latest[name]['temp'] for name in names), dtype=np.float64, count=len(names))
+    return {
+        'hot': HOT,
+        'cool': COOL,
+        'count': len(names),
+        'sum_tenths': int(np.rint(temps * 10).sum()),
+        'above_hot': int(np.count_nonzero(temps > HOT)),
+        'below_cool': int(np.count_nonzero(temps < COOL)),
+        'hottest': names[int(temps.argmax())],
+        'coolest': names[int(temps.argmin())],
+    }
+
+
+def update_state(state, latest, changes):
+    """Apply {city: (old temp or None, new temp)} to state in place
+
+    latest must already hold the new readings. Totals change in O(1) per
+    reading; only a hottest or coolest city that moved away from the
+    extreme forces a rescan of the latest readings.
+    """
+    rescan = False
+    for name, (old, new) in changes.items():
+        if old is None:
+            state['count'] += 1
+        else:
+            state['sum_tenths'] -= _tenths(old)
+            state['above_hot'] -= old > HOT
+            state['below_cool'] -= old < COOL
+        state['sum_tenths'] += _tenths(new)
+        state['above_hot'] += new > HOT
+        state['below_cool'] += new < COOL
+
+        hottest, coolest = state['hottest'], state['coolest']
+        if (name == hottest and new < old) or (name == coolest and new > old):
+            rescan = True
+        if hottest is None or new > latest[hottest]['temp']:
+            state['hottest'] = name
+        if coolest is None or new < latest[coolest]['temp']:
+            state['coolest'] = name
+    if rescan:
+        extremes = snapshot_state(latest)
+        state['hottest'], state['coolest'] = extremes['hottest'], extremes['coolest']
+    return state
+
+
+class Rollups:
+    """count/sum/min/max of readings per (bucket, city) at one frequency.
+
+    Buckets are dense from the oldest kept one to the newest, so a bucket's
+    row is its offset from the first. Cells are rewritten in place while
+    the arrays are big enough, and written to a new file generation when
+    newer buckets or more cities need room; the generation is recorded in
+    the store's manifest like a partition's.
+    """
+
+    def __init__(self, root, freq):
+        self.freq = freq
+        self.directory = os.path.join(root, 'rollups', freq)
+
+    def _file(self, name, generation):
+        return os.path.join(self.directory, f'{name}.{generation}.npy')
+
+    def load(self, generation, mode='r'):
+        """{column: array} of a generation, memory-mapped"""
+        return {name: np.load(self._file(name, generation), mmap_mode=mode) for name in ROLLUP_COLUMNS}
+
+    def _allocate(self, first, last, city_count, old):
+        buckets = np.arange(first, last + np.timedelta64(1, self.freq))
+        shape = (len(buckets), city_count)
+        columns = {'buckets': buckets, 'count': np.zeros(shape, dtype=np.int32),
+                   'sum': np.zeros(shape, dtype=np.float64),
+                   'min': np.full(shape, np.nan, dtype=np.float32),
+                   'max': np.full(shape, np.nan, dtype=np.float32)}
+        if old is not None:
+            # Copy the kept part of the old rows into place
+            start = max(0, int((old['buckets'][0] - first).astype(np.int64)))
+            skip = max(0, int((first - old['buckets'][0]).astype(np.int64)))
+            rows = len(old['buckets']) - skip
+            if rows > 0:
+                for name in ROLLUP_COLUMNS[1:]:
+                    columns[name][start:start + rows, :old[name].shape[1]] = old[name][skip:]
+        return columns
+
+    def update(self, generation, city_count, partitions):
+        """Recompute the cells touched by a write; returns the generation to record
+
+        partitions is a list of (time, city, temp) arrays: each touched
+        city's complete readings over the time span the write touched, so
+        every touched cell is rebuilt exactly, replaced readings included.
+        """
+        spans = [times.astype(f'datetime64[{self.freq}]') for times, _, _ in partitions if len(times)]
+        if not spans:
+            return generation
+        lo = min(span.min() for span in spans)
+        hi = max(span.max() for span in spans)
+
+        old = self.load(generation) if generation is not None else None
+        first = min(lo, old['buckets'][0]) if old is not None else lo
+        last = max(hi, old['buckets'][-1]) if old is not None else hi
+        if RETENTION[self.freq] is not None:
+            first = max(first, last - np.timedelta64(RETENTION[self.freq] - 1, self.freq))
+        if hi < first:
+            return generation
+
+        if old is not None and first == old['buckets'][0] and last == old['buckets'][-1] \
+                and old['count'].shape[1] >= city_count:
+            columns = self.load(generation, mode='r+')
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            columns = self._allocate(first, last, city_count, old)
+            generation = None
+
+        for span, (_, city, temp) in zip(spans, (p for p in partitions if len(p[0]))):
+            keep = span >= first
+            if not keep.any():
+                continue
+            rows = (span[keep] - first).astype(np.int64)
+            city, temp = city[keep], temp[keep]
+            touched = np.unique(city)
+            # Clear every touched city's cells over the span, then add its readings back
+            lo_row, hi_row = rows.min(), rows.max() + 1
+            cells = np.ix_(np.arange(lo_row, hi_row), touched)
+            columns['count'][cells] = 0
+            columns['sum'][cells] = 0
+            columns['min'][cells] = np.nan
+            columns['max'][cells] = np.nan
+            np.add.at(columns['count'], (rows, city), 1)
+            np.add.at(columns['sum'], (rows, city), temp)
+            np.fmin.at(columns['min'], (rows, city), temp)
+            np.fmax.at(columns['max'], (rows, city), temp)
+
+        if generation is None:
+            generation = uuid.uuid4().hex[:12]
+            for name in ROLLUP_COLUMNS:
+                np.save(self._file(name, generation), columns[name])
+        else:
+            for name in ROLLUP_COLUMNS[1:]:
+                columns[name].flush()
+        return generation
+
+    def remove_stale(self, generation):
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.listdir(self.directory):
+            if entry.endswith('.npy') and entry.split('.')[1] != generation:
+                os.unlink(os.path.join(self.directory, entry))
+
+    def window(self, columns, buckets, city=None):
+        """Aggregates of the newest `buckets` buckets, for one city id or all cities
+
+        columns is a loaded generation. Returns (bucket starts, count, mean,
+        min, max) arrays, one entry per bucket, plus the same aggregates over
+        the whole window as a dict.
+        """
+        rows = slice(max(0, len(columns['buckets']) - buckets), None)
+        cells = (rows, city) if city is not None else (rows, slice(None))
+        count = columns['count'][cells]
+        total = columns['sum'][cells]
+        low = columns['min'][cells]
+        high = columns['max'][cells]
+        if city is None:
+            # Network-wide: combine the cities of each bucket
+            count, total = count.sum(axis=1), total.sum(axis=1)
+            empty = count == 0
+            low = np.where(empty, np.nan, np.where(np.isnan(low), np.inf, low).min(axis=1))
+            high = np.where(empty, np.nan, np.where(np.isnan(high), -np.inf, high).max(axis=1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+        readings = int(count.sum())
+        overall = {
+            'readings': readings,
+            'mean': float(total.sum() / readings) if readings else None,
+            'min': float(np.nanmin(low)) if readings else None,
+            'max': float(np.nanmax(high)) if readings else None,
+        }
+        return columns['buckets'][rows], count, mean, low, high, overall
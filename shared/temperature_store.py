@@ -0,0 +1,429 @@
+"""
+Columnar time-series store for per-city temperature readings
+Readings are kept in one directory per month, as segments of three NumPy
+columns (time, city, temp) sorted by city and time, plus per-city offsets.
+A write adds a segment holding only its own readings; reads merge a month's
+segments, and a month is compacted into one segment once a later month is
+written or it has more than MAX_SEGMENTS. Reads memory-map the columns, so
+a city/time-range slice touches only the pages it needs however many
+millions of readings are stored.
+
+The latest reading of every city is also kept in a small JSON snapshot,
+together with statistics over it, so dashboards that only show current
+values never import NumPy. Writers also keep the rollups in
+temperature_stats.py current.
+"""
+
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+
+MANIFEST = 'manifest.json'
+CITIES = 'cities.json'
+LATEST = 'latest.json'
+STATS = 'stats.json'
+COLUMNS = ('time', 'city', 'temp')
+# A month with more segments than this is compacted even while it is current
+MAX_SEGMENTS = 8
+
+
+def _numpy():
+    # Imported on first range query so snapshot-only readers stay light
+    import numpy
+    return numpy
+
+
+def _read_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _write_json(path, value):
+    tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _segments(entry):
+    # Manifests written before segments name one generation per month
+    return [entry] if isinstance(entry, str) else entry
+
+
+def _load_segment(directory, generation):
+    """Memory-mapped (time, city, temp, offsets) arrays of one segment"""
+    np = _numpy()
+    return tuple(np.load(os.path.join(directory, f'{name}.{generation}.npy'), mmap_mode='r')
+                 for name in COLUMNS + ('offsets',))
+
+
+def _save_segment(directory, city_count, times, city_ids, temps):
+    """Write sorted readings as a new segment; returns its generation"""
+    np = _numpy()
+    offsets = np.searchsorted(city_ids, np.arange(city_count + 1)).astype(np.int64)
+    generation = uuid.uuid4().hex[:12]
+    for name, column in zip(COLUMNS + ('offsets',), (times, city_ids, temps, offsets)):
+        np.save(os.path.join(directory, f'{name}.{generation}.npy'), column)
+    return generation
+
+
+def _city_rows(offsets, city_ids):
+    """Row numbers of the sorted, unique city_ids' readings in a segment"""
+    np = _numpy()
+    city_ids = city_ids[city_ids + 1 < len(offsets)]
+    starts, lengths = offsets[city_ids], offsets[city_ids + 1] - offsets[city_ids]
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+def _merge(parts):
+    """(time, city, temp) parts, oldest first, as one set sorted by city and
+    time in which the newest reading of each (city, time) replaces the others"""
+    np = _numpy()
+    times, city_ids, temps = (np.concatenate(column) for column in zip(*parts))
+    if len(times) == 0:
+        return times, city_ids, temps
+    # Stable sort by (city, time) keeps later writes after earlier ones,
+    # so the last of each duplicate key is the newest reading
+    order = np.lexsort((times, city_ids))
+    times, city_ids, temps = times[order], city_ids[order], temps[order]
+    keep = np.r_[(city_ids[1:] != city_ids[:-1]) | (times[1:] != times[:-1]), True]
+    return times[keep], city_ids[keep], temps[keep]
+
+
+class TemperatureStore:
+    """Month-partitioned, memory-mapped store of (time, city, temp) readings.
+
+    The manifest names the segment generations of each partition, oldest
+    first, and carries a version that changes on every write. Writers
+    produce new files and then swap the manifest, so readers always see
+    complete partitions; one writer at a time is enforced with a lock file.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._manifest = None
+        self._manifest_mtime = None
+        self._cities = None
+        self._latest = None
+        self._stats = None
+        self._maps = {}
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.root, MANIFEST))
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def manifest(self):
+        """The current manifest, reloaded only when the file changes"""
+        try:
+            mtime = os.stat(self._path(MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return {'version': 0, 'partitions': {}}
+        if mtime != self._manifest_mtime:
+            self._manifest = _read_json(self._path(MANIFEST), {'version': 0, 'partitions': {}})
+            self._manifest_mtime = mtime
+            self._cities = None
+            self._latest = None
+            self._stats = None
+        return self._manifest
+
+    @property
+    def version(self):
+        """Changes whenever readings or cities change"""
+        return self.manifest()['version']
+
+    def cities(self):
+        """List of {'id', 'name', 'lat', 'lon'}; a city's id is its index"""
+        self.manifest()
+        if self._cities is None:
+            self._cities = _read_json(self._path(CITIES), [])
+        return self._cities
+
+    def latest(self):
+        """{city name: {'lat', 'lon', 'temp', 'time'}} with each city's newest reading"""
+        self.manifest()
+        if self._latest is None:
+            readings = _read_json(self._path(LATEST), {})
+            self._latest = {
+                city['name']: {'lat': city['lat'], 'lon': city['lon'],
+                               'temp': readings[city['name']]['temp'],
+                               'time': readings[city['name']]['time']}
+                for city in self.cities() if city['name'] in readings
+            }
+        return self._latest
+
+    def stats(self):
+        """Dashboard statistics of the latest readings, as kept current by writers"""
+        self.manifest()
+        if self._stats is None:
+            latest = self.latest()
+            state = _read_json(self._path(STATS), None)
+            if state is None and not latest:
+                # An empty store; temperature_stats would import NumPy
+                state = {'count': 0}
+            elif state is None:
+                # Written before statistics were kept; compute them once here
+                from .temperature_stats import snapshot_state
+                state = snapshot_state(latest)
+            if not state['count']:
+                self._stats = {'total_cities': 0}
+            else:
+                max_temp = latest[state['hottest']]['temp']
+                min_temp = latest[state['coolest']]['temp']
+                self._stats = {
+                    'total_cities': state['count'],
+                    'avg_temp': round(state['sum_tenths'] / state['count'] / 10, 1),
+                    'max_temp': max_temp,
+                    'min_temp': min_temp,
+                    'hottest_city': state['hottest'],
+                    'coolest_city': state['coolest'],
+                    'temp_range': round(max_temp - min_temp, 1),
+                    f"cities_above_{state['hot']}": state['above_hot'],
+                    f"cities_below_{state['cool']}": state['below_cool'],
+                }
+        return self._stats
+
+    def rollup(self, freq, buckets, city=None):
+        """Precomputed aggregates of the newest buckets at freq 'h', 'D' or 'M'
+
+        For one city name or, if None, all cities together; see
+        Rollups.window. Returns None before any readings are written.
+        """
+        from .temperature_stats import Rollups
+        generation = self.manifest().get('rollups', {}).get(freq)
+        if generation is None:
+            return None
+        rollups = Rollups(self.root, freq)
+        key = (f'rollups/{freq}', generation)
+        if key not in self._maps:
+            # Writers update cells of a generation in place, which shared maps see
+            self._maps = {k: v for k, v in self._maps.items() if k[0] != key[0]}
+            self._maps[key] = rollups.load(generation)
+        city_id = self.city_ids([city])[0] if city is not None else None
+        return rollups.window(self._maps[key], buckets, city_id)
+
+    # Reading
+
+    def _columns(self, month):
+        """Memory-mapped (time, city, temp, offsets) arrays of each segment
+        of one partition, oldest first"""
+        segments = _segments(self.manifest()['partitions'][month])
+        columns = []
+        for generation in segments:
+            key = (month, generation)
+            if key not in self._maps:
+                try:
+                    self._maps[key] = _load_segment(self._path(month), generation)
+                except FileNotFoundError:
+                    # A writer may have compacted this segment after we read the manifest
+                    self._manifest_mtime = None
+                    if _segments(self.manifest()['partitions'][month]) == segments:
+                        raise
+                    return self._columns(month)
+            columns.append(self._maps[key])
+        self._maps = {k: v for k, v in self._maps.items() if k[0] != month or k[1] in segments}
+        return columns
+
+    def _months(self, start, end):
+        months = sorted(self.manifest()['partitions'])
+        first = str(start)[:7] if start is not None else None
+        last = str(end)[:7] if end is not None else None
+        return [m for m in months if (first is None or m >= first) and (last is None or m <= last)]
+
+    def city_ids(self, names):
+        ids = {city['name']: city['id'] for city in self.cities()}
+        return [ids[name] for name in names]
+
+    def query(self, cities=None, start=None, end=None):
+        """Readings of the named cities (all if None) with start <= time < end
+
+        Returns (time datetime64[s], city id int32, temp float32) arrays,
+        sorted by city then time within each month.
+        """
+        np = _numpy()
+        start_s = np.datetime64(start, 's') if start is not None else None
+        end_s = np.datetime64(end, 's') if end is not None else None
+        ids = self.city_ids(cities) if cities is not None else None
+        parts = []
+        for month in self._months(start_s, end_s):
+            segments = self._columns(month)
+            if ids is None:
+                month_parts = []
+                for times, city, temp, _ in segments:
+                    # One vectorized pass over the segment's time column
+                    mask = np.ones(len(times), dtype=bool)
+                    if start_s is not None:
+                        mask &= times >= start_s
+                    if end_s is not None:
+                        mask &= times < end_s
+                    month_parts.append((times[mask], city[mask], temp[mask]))
+                parts.append(_merge(month_parts) if len(segments) > 1 else month_parts[0])
+                continue
+            for city_id in ids:
+                city_parts = []
+                for times, city, temp, offsets in segments:
+                    if city_id + 1 >= len(offsets):
+                        continue
+                    lo, hi = offsets[city_id], offsets[city_id + 1]
+                    block = times[lo:hi]
+                    a = lo + (np.searchsorted(block, start_s) if start_s is not None else 0)
+                    b = lo + (np.searchsorted(block, end_s) if end_s is not None else hi - lo)
+                    city_parts.append((times[a:b], city[a:b], temp[a:b]))
+                if len(city_parts) > 1:
+                    city_parts = [_merge(city_parts)]
+                parts.extend(city_parts)
+        if not parts:
+            return (np.array([], dtype='datetime64[s]'), np.array([], dtype=np.int32),
+                    np.array([], dtype=np.float32))
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def downsample(self, city, start=None, end=None, freq='D', how='mean'):
+        """One city's readings aggregated per hour ('h'), day ('D') or month ('M')
+
+        Returns (bucket start times, values) where how is mean, min or max.
+        """
+        np = _numpy()
+        times, _, temps = self.query([city], start, end)
+        if len(times) == 0:
+            return times.astype(f'datetime64[{freq}]'), temps
+        buckets = times.astype(f'datetime64[{freq}]')
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        if how == 'mean':
+            values = np.add.reduceat(temps, starts, dtype=np.float64) / np.diff(np.r_[starts, len(temps)])
+        else:
+            values = {'min': np.minimum, 'max': np.maximum}[how].reduceat(temps, starts)
+        return buckets[starts], values.astype(np.float32)
+
+    # Writing
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path('.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def add_cities(self, cities):
+        """Register cities from {name: {'lat', 'lon', ...}}; returns all cities"""
+        with self._write_lock():
+            known = _read_json(self._path(CITIES), [])
+            names = {city['name'] for city in known}
+            new = [name for name in cities if name not in names]
+            added = [{'id': len(known) + i, 'name': name,
+                      'lat': cities[name]['lat'], 'lon': cities[name]['lon']}
+                     for i, name in enumerate(new)]
+            if added:
+                _write_json(self._path(CITIES), known + added)
+                manifest = _read_json(self._path(MANIFEST), {'version': 0, 'partitions': {}})
+                manifest['version'] += 1
+                _write_json(self._path(MANIFEST), manifest)
+        return self.cities()
+
+    def write(self, city_ids, times, temps):
+        """Add readings; a reading for an existing (city, time) replaces it"""
+        from .temperature_stats import ROLLUP_FREQS, Rollups
+        np = _numpy()
+        city_ids = np.asarray(city_ids, dtype=np.int32)
+        times = np.asarray(times, dtype='datetime64[s]')
+        temps = np.asarray(temps, dtype=np.float32)
+        with self._write_lock():
+            manifest = _read_json(self._path(MANIFEST), {'version': 0, 'partitions': {}})
+            cities = _read_json(self._path(CITIES), [])
+            months = times.astype('datetime64[M]')
+            touched = []
+            for month in np.unique(months):
+                selected = months == month
+                name = str(month)
+                manifest['partitions'][name], readings = self._write_partition(
+                    name, manifest['partitions'].get(name), len(cities),
+                    times[selected], city_ids[selected], temps[selected])
+                touched.append(readings)
+            self._compact_partitions(manifest, len(cities))
+            self._update_latest(cities, city_ids, times, temps)
+            rollups = manifest.setdefault('rollups', {})
+            for freq in ROLLUP_FREQS:
+                # Only the buckets this write's readings fall in are rebuilt
+                first = times.min().astype(f'datetime64[{freq}]')
+                last = times.max().astype(f'datetime64[{freq}]')
+                spans = []
+                for readings in touched:
+                    buckets = readings[0].astype(f'datetime64[{freq}]')
+                    rows = (buckets >= first) & (buckets <= last)
+                    spans.append(tuple(column[rows] for column in readings))
+                rollups[freq] = Rollups(self.root, freq).update(rollups.get(freq), len(cities), spans)
+            manifest['version'] += 1
+            _write_json(self._path(MANIFEST), manifest)
+            self._remove_stale_generations(manifest)
+
+    def _write_partition(self, month, segments, city_count, times, city_ids, temps):
+        """Add readings to a month as a new segment; returns (the month's
+        segments, the written cities' complete readings in that month)
+
+        Only the new readings are sorted and written. Earlier segments are
+        read for the written cities alone, for the rollups to rebuild.
+        """
+        np = _numpy()
+        directory = self._path(month)
+        os.makedirs(directory, exist_ok=True)
+        segments = _segments(segments) if segments is not None else []
+        segments = segments + [_save_segment(directory, city_count, *_merge([(times, city_ids, temps)]))]
+        parts = []
+        for generation in segments:
+            segment_times, segment_city, segment_temp, offsets = _load_segment(directory, generation)
+            rows = _city_rows(offsets, np.unique(city_ids))
+            parts.append((segment_times[rows], segment_city[rows], segment_temp[rows]))
+        return segments, _merge(parts)
+
+    def _compact_partitions(self, manifest, city_count):
+        """Merge the segments of every month before the newest, and of any
+        month with more than MAX_SEGMENTS, into one segment"""
+        newest = max(manifest['partitions'], default=None)
+        for month, segments in manifest['partitions'].items():
+            segments = _segments(segments)
+            if len(segments) > 1 and (month < newest or len(segments) > MAX_SEGMENTS):
+                directory = self._path(month)
+                merged = _merge([_load_segment(directory, generation)[:3] for generation in segments])
+                manifest['partitions'][month] = [_save_segment(directory, city_count, *merged)]
+
+    def _update_latest(self, cities, city_ids, times, temps):
+        """Record each city's newest reading and update the statistics over them"""
+        from .temperature_stats import snapshot_state, update_state
+        np = _numpy()
+        latest = _read_json(self._path(LATEST), {})
+        state = _read_json(self._path(STATS), None)
+        changes = {}
+        order = np.lexsort((times, city_ids))
+        last = np.r_[city_ids[order][1:] != city_ids[order][:-1], True]
+        for i in order[last]:
+            name = cities[int(city_ids[i])]['name']
+            time = str(times[i])
+            if name not in latest or latest[name]['time'] <= time:
+                old = latest[name]['temp'] if name in latest else None
+                latest[name] = {'time': time, 'temp': round(float(temps[i]), 1)}
+                if old != latest[name]['temp']:
+                    changes[name] = (old, latest[name]['temp'])
+        if state is None:
+            state = snapshot_state(latest)
+        else:
+            update_state(state, latest, changes)
+        _write_json(self._path(LATEST), latest)
+        _write_json(self._path(STATS), state)
+
+    def _remove_stale_generations(self, manifest):
+        # Readers that already mapped an old file keep it until they unmap it
+        for month, segments in manifest['partitions'].items():
+            directory = self._path(month)
+            segments = _segments(segments)
+            for entry in os.listdir(directory):
+                if entry.endswith('.npy') and entry.split('.')[1] not in segments:
+                    os.unlink(os.path.join(directory, entry))
+        if manifest.get('rollups'):
+            from .temperature_stats import Rollups
+            for freq, generation in manifest['rollups'].items():
+                Rollups(self.root, freq).remove_stale(generation)
@@ -0,0 +1,126 @@
+import json
+import random
+
+import pytest
+
+from shared.change_hub import UNCHANGED, ChangeHub, HubFull, merge_patch
+
+
+def apply_patch(target, patch):
+    """RFC 7386 MergePatch"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_patch(result.get(key), value)
+    return result
+
+
+@pytest.mark.parametrize('old, new, patch', [
+    ({'a': 1}, {'a': 2}, {'a': 2}),
+    ({'a': 1, 'b': 2}, {'a': 1}, {'b': None}),
+    ({'a': 1}, {'a': 1, 'c': {'d': 4}}, {'c': {'d': 4}}),
+    ({'a': {'b': 1, 'c': 2}}, {'a': {'b': 1, 'c': 3}}, {'a': {'c': 3}}),
+    ({'a': [1, 2]}, {'a': [1, 3]}, {'a': [1, 3]}),        # Lists are replaced whole
+    ({'a': {'b': 1}}, {'a': 5}, {'a': 5}),
+    ({'a': 5}, {'a': {'b': 1}}, {'a': {'b': 1}}),
+    ({'a': 1}, {'a': 1.5}, {'a': 1.5}),
+    ({'a': 1}, {'a': True}, {'a': True}),                 # Equal in Python, not in JSON
+    ({'a': 1}, {'a': 1.0}, {'a': 1.0}),
+    ({'a': 1}, {'a': None}, {'a': None}),
+    ([1], [2], [2]),
+])
+def test_merge_patch(old, new, patch):
+    # Compared as JSON, where 1, 1.0 and true differ
+    assert json.dumps(merge_patch(old, new)) == json.dumps(patch)
+
+
+@pytest.mark.parametrize('state', [{}, {'a': {'b': [1, {'c': None}]}}, [1, 2], 'text', 0, None])
+def test_equal_states_are_unchanged(state):
+    assert merge_patch(state, json.loads(json.dumps(state))) is UNCHANGED
+
+
+def test_a_null_state_is_a_change():
+    # None is a patch of its own, so it cannot mean "no change"
+    assert merge_patch({'a': 1}, None) is None
+    assert merge_patch(None, {'a': 1}) == {'a': 1}
+
+
+def random_json(rng, depth=0):
+    kind = rng.randrange(6 if depth < 3 else 4)
+    if kind == 0:
+        return rng.randrange(5)
+    if kind == 1:
+        return rng.choice(['x', 'y', ''])
+    if kind == 2:
+        return rng.choice([True, False, 2.5])
+    if kind == 3:
+        return [rng.randrange(3) for _ in range(rng.randrange(3))]
+    return {rng.choice('abcde'): random_json(rng, depth + 1) for _ in range(rng.randrange(4))}
+
+
+def test_applying_the_patch_gives_the_new_state():
+    rng = random.Random(3)
+    for _ in range(500):
+        old, new = random_json(rng, 1), random_json(rng, 1)
+        patch = merge_patch(old, new)
+        if patch is UNCHANGED:
+            assert old == new
+        else:
+            assert apply_patch(old, patch) == new
+
+
+def test_publish_only_counts_changes():
+    hub = ChangeHub()
+    assert hub.publish('board', {'top': [1]}) is True
+    assert hub.publish('board', {'top': [1]}) is False
+    assert hub.publish('board', {'top': [2]}) is True
+    assert hub.status()['published'] == 2
+
+
+def test_stream_sends_a_snapshot_then_patches():
+    hub = ChangeHub(heartbeat=0.01)
+    hub.publish('board', {'top': [1], 'players': 1})
+    stream = hub.stream(['board'])
+    assert next(stream).startswith('retry:')
+
+    first = next(stream)
+    assert 'event: snapshot' in first and '"players":1' in first
+    hub.publish('board', {'top': [1], 'players': 2})
+    second = next(stream)
+    assert 'event: patch' in second and '"patch":{"players":2}' in second
+    assert next(stream) == ': keepalive\n\n'
+    stream.close()
+    assert hub.status()['clients'] == 0
+
+
+def test_reconnect_resumes_with_patches_on_the_same_hub():
+    hub = ChangeHub(heartbeat=0.01)
+    hub.publish('board', {'players': 1})
+    stream = hub.stream(['board'])
+    next(stream)
+    last_event_id = next(stream).split('\n')[0][len('id: '):]
+    stream.close()
+
+    hub.publish('board', {'players': 2})
+    resumed = hub.stream(['board'], last_event_id)
+    next(resumed)
+    assert 'event: patch' in next(resumed)
+
+    # An id from another process's hub starts over with a snapshot
+    other = hub.stream(['board'], 'ffffffff-1')
+    next(other)
+    assert 'event: snapshot' in next(other)
+
+
+def test_hub_full():
+    hub = ChangeHub(max_clients=1)
+    stream = hub.stream(['board'])
+    next(stream)
+    with pytest.raises(HubFull):
+        hub.stream(['board'])
+    stream.close()
+    hub.stream(['board'])
@@ -0,0 +1,92 @@
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from shared.database import DataVersion, configure_engine, data_version, database_uri, engine_options
+
+
+def sqlite_engine(path):
+    uri = f'sqlite:///{path}'
+    engine = create_engine(uri, **engine_options(uri))
+    configure_engine(engine)
+    return engine
+
+
+def test_database_uri(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    assert database_uri('sqlite:///game.db') == 'sqlite:///game.db'
+    monkeypatch.setenv('DATABASE_URL', 'postgres://u:p@db:5432/games')
+    assert database_uri('sqlite:///game.db') == 'postgresql://u:p@db:5432/games'
+
+
+def test_engine_options():
+    options = engine_options('sqlite:////tmp/game.db')
+    assert options['poolclass'] is QueuePool
+    assert options['connect_args'] == {'timeout': 5.0, 'check_same_thread': False}
+    assert engine_options('sqlite://') == {}
+    assert engine_options('sqlite:///:memory:') == {}
+    options = engine_options('postgresql://u:p@db/games')
+    assert options['pool_pre_ping'] is True and 'poolclass' not in options
+
+
+def test_sqlite_connections_get_the_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_SYNCHRONOUS', 'FULL')
+    engine = sqlite_engine(tmp_path / 'game.db')
+    with engine.connect() as conn:
+        pragma = lambda name: conn.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 2
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -65536
+        assert pragma('temp_store') == 2
+    engine.dispose()
+
+
+def test_in_memory_engines_are_left_alone():
+    engine = create_engine('sqlite://')
+    configure_engine(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'memory'
+    assert data_version(engine) is None
+
+
+def test_data_version_changes_when_another_connection_commits(tmp_path):
+    engine = sqlite_engine(tmp_path / 'game.db')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE score (id INTEGER PRIMARY KEY, score INTEGER)'))
+    version = data_version(engine)
+    first = version.current()
+
+    with engine.connect() as conn:
+        conn.execute(text('SELECT * FROM score')).all()
+    assert version.current() == first
+    with engine.begin() as conn:
+        conn.execute(text('INSERT INTO score (score) VALUES (10)'))
+    second = version.current()
+    assert second != first
+    assert version.current() == second
+    engine.dispose()
+
+
+def test_data_version_never_writes(tmp_path):
+    path = str(tmp_path / 'game.db')
+    sqlite3.connect(path).close()
+    version = DataVersion(path)
+    version.current()
+    with pytest.raises(sqlite3.OperationalError):
+        version.connection.execute('CREATE TABLE t (x)')
+
+
+def test_data_version_reopens_after_a_fork(tmp_path, monkeypatch):
+    path = str(tmp_path / 'game.db')
+    sqlite3.connect(path).close()
+    version = DataVersion(path)
+    version.current()
+    inherited = version.connection
+
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    version.current()
+    assert version.connection is not inherited
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from shared.leaderboard_rollups import LeaderboardRollups, RETENTION, oldest_kept, period_key, period_start
+
+
+@pytest.mark.parametrize('when, daily, weekly', [
+    (datetime(2025, 1, 31, 23, 59, 59), 'day:2025-01-31', 'week:2025-01-27'),
+    (datetime(2025, 1, 27, 0, 0), 'day:2025-01-27', 'week:2025-01-27'),   # Monday starts its own week
+    (datetime(2025, 2, 2, 23, 59), 'day:2025-02-02', 'week:2025-01-27'),  # Sunday ends it
+    (datetime(2025, 1, 1, 8, 30), 'day:2025-01-01', 'week:2024-12-30'),   # Weeks span New Year
+    (datetime(2024, 2, 29, 12, 0), 'day:2024-02-29', 'week:2024-02-26'),
+])
+def test_period_keys(when, daily, weekly):
+    assert period_key('daily', when) == daily
+    assert period_key('weekly', when) == weekly
+    assert period_key('all', when) == 'all'
+
+
+def test_period_keys_sort_by_date():
+    days = [datetime(2024, 12, 25) + timedelta(days=i, hours=i % 24) for i in range(60)]
+    for window in ('daily', 'weekly'):
+        keys = [period_key(window, day) for day in days]
+        assert keys == sorted(keys)
+
+
+def test_period_start_drops_the_time_of_day():
+    assert period_start('daily', datetime(2025, 3, 5, 17, 45)) == datetime(2025, 3, 5)
+    assert period_start('weekly', datetime(2025, 3, 5, 17, 45)) == datetime(2025, 3, 3)
+
+
+def test_oldest_kept_keeps_retention_periods():
+    now = datetime(2025, 3, 5, 17, 45)
+    assert oldest_kept('daily', now) == now.replace(hour=0, minute=0) - timedelta(days=RETENTION['daily'] - 1)
+    assert oldest_kept('weekly', now) == datetime(2025, 3, 3) - timedelta(weeks=RETENTION['weekly'] - 1)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE "user" (id INTEGER PRIMARY KEY, username VARCHAR(80))'))
+        conn.execute(text('''CREATE TABLE leaderboard_best (
+            id INTEGER PRIMARY KEY,
+            board VARCHAR(20) NOT NULL,
+            period VARCHAR(16) NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            value INTEGER NOT NULL,
+            timestamp DATETIME NOT NULL,
+            UNIQUE (board, period, user_id)
+        )'''))
+        conn.execute(text('INSERT INTO "user" VALUES (1, \'ana\'), (2, \'ben\')'))
+    with Session(engine) as session:
+        yield session
+
+
+def periods(session):
+    return sorted(period for period, in session.execute(text('SELECT DISTINCT period FROM leaderboard_best')))
+
+
+def test_record_keeps_each_periods_best(session):
+    rollups = LeaderboardRollups(boards=('score',))
+    monday = datetime(2025, 1, 27, 10, 0)
+    rollups.record(session, [
+        {'user_id': 1, 'score': 50, 'timestamp': monday},
+        {'user_id': 2, 'score': 70, 'timestamp': monday + timedelta(hours=1)},
+        {'user_id': 1, 'score': 90, 'timestamp': monday + timedelta(days=1)},
+    ], now=monday + timedelta(days=1))
+
+    def names(window, when):
+        return [(username, value) for username, value, _ in rollups.top(session, 'score', window, now=when)]
+
+    assert names('daily', monday) == [('ben', 70), ('ana', 50)]
+    assert names('daily', monday + timedelta(days=1)) == [('ana', 90)]
+    assert names('weekly', monday + timedelta(days=6)) == [('ana', 90), ('ben', 70)]
+    # A new week starts with an empty board, without any reset
+    assert names('weekly', monday + timedelta(days=7)) == []
+    assert names('all', monday + timedelta(days=400)) == [('ana', 90), ('ben', 70)]
+    assert rollups.user_best(session, 'score', 'daily', 2, now=monday + timedelta(days=1)) is None
+
+
+def test_ties_keep_the_earliest_game(session):
+    rollups = LeaderboardRollups(boards=('score',))
+    when = datetime(2025, 1, 27, 10, 0)
+    rollups.record(session, [{'user_id': 1, 'score': 50, 'timestamp': when}], now=when)
+    rollups.record(session, [{'user_id': 1, 'score': 50, 'timestamp': when + timedelta(minutes=5)}], now=when)
+
+    assert rollups.top(session, 'score', 'all', now=when)[0][2] == when
+
+
+def test_prune_drops_only_expired_daily_and_weekly_periods(session):
+    rollups = LeaderboardRollups(boards=('score',))
+    now = datetime(2025, 3, 5, 12, 0)
+    old = now - timedelta(days=120)
+    rollups.record(session, [
+        {'user_id': 1, 'score': 10, 'timestamp': old},
+        {'user_id': 1, 'score': 20, 'timestamp': now},
+    ], now=old)
+
+    rollups.prune(session, now)
+
+    assert periods(session) == ['all', 'day:2025-03-05', 'week:2025-03-03']
@@ -0,0 +1,120 @@
+import queue
+from datetime import datetime, timedelta
+
+from shared.login_audit import LoginAuditWriter
+
+T0 = datetime(2025, 1, 1, 12, 0)
+
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+class Batches:
+    """write_batch that keeps every batch it is given"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, rows, counts):
+        self.batches.append((rows, counts))
+
+    def rows(self):
+        return [(row['user_id'], row['login_time']) for rows, _ in self.batches for row in rows]
+
+    def counts(self):
+        totals = {}
+        for _, counts in self.batches:
+            for count in counts:
+                key = (count['user_id'], count['day'])
+                totals[key] = totals.get(key, 0) + count['login_count']
+        return totals
+
+
+def test_logins_are_written_in_batches():
+    batches = Batches()
+    writer = LoginAuditWriter(batches, batch_size=2, flush_interval=0.01)
+    for minute in range(5):
+        writer.record(1, '10.0.0.1', at(minute))
+    writer.start()
+    writer.close()
+
+    assert [len(rows) for rows, _ in batches.batches] == [2, 2, 1]
+    assert batches.rows() == [(1, at(minute)) for minute in range(5)]
+    assert batches.counts() == {}
+    assert writer.status()['written_rows'] == 5
+
+
+def test_rows_per_day_keeps_counting_past_the_limit():
+    batches = Batches()
+    writer = LoginAuditWriter(batches, rows_per_day=2, flush_interval=0.01)
+    for minute in range(3):
+        writer.record(1, '10.0.0.1', at(minute))
+    writer.record(2, '10.0.0.2', at(3))
+    writer.start()
+    writer.close()
+
+    assert batches.rows() == [(1, at(0)), (1, at(1)), (2, at(3))]
+    assert batches.counts() == {(1, T0.date()): 3, (2, T0.date()): 1}
+    last = {count['user_id']: (count['last_login_time'], count['last_ip_address'])
+            for count in batches.batches[0][1]}
+    assert last[1] == (at(2), '10.0.0.1')
+
+
+def test_a_full_queue_folds_logins_into_daily_counts():
+    batches = Batches()
+    writer = LoginAuditWriter(batches, max_queue=1, flush_interval=0.01)
+    writer.record(1, '10.0.0.1', at(0))
+    writer.record(1, '10.0.0.2', at(5))
+    writer.record(1, '10.0.0.3', at(1))
+    writer.start()
+    writer.close()
+
+    status = writer.status()
+    assert status['overflowed'] == 2
+    assert batches.rows() == [(1, at(0))]
+    assert batches.counts() == {(1, T0.date()): 2}
+    count = batches.batches[0][1][0]
+    assert (count['last_login_time'], count['last_ip_address']) == (at(5), '10.0.0.2')
+    assert status['written_rows'] == 1 and status['counted_logins'] == 2
+
+
+def test_logins_folded_in_during_the_last_write_are_written(monkeypatch):
+    writer = None
+
+    def full(item):
+        raise queue.Full
+
+    def write_batch(rows, counts):
+        batches(rows, counts)
+        if len(batches.batches) == 1:
+            # The queue was full when this login arrived and drained by the time the writer looked
+            monkeypatch.setattr(writer._queue, 'put_nowait', full)
+            writer.record(2, '10.0.0.2', at(1))
+
+    batches = Batches()
+    writer = LoginAuditWriter(write_batch, flush_interval=0.01)
+    writer.record(1, '10.0.0.1', at(0))
+    # The writer thread's loop after close(), run here so the first write is its last
+    writer._stopping.set()
+    writer._run()
+
+    assert batches.rows() == [(1, at(0))]
+    assert batches.counts() == {(2, T0.date()): 1}
+
+
+def test_failed_batches_are_retried_then_dropped():
+    attempts = []
+
+    def write_batch(rows, counts):
+        attempts.append(len(rows))
+        raise RuntimeError('database is locked')
+
+    writer = LoginAuditWriter(write_batch, flush_interval=0.01, max_retries=2)
+    writer.record(1, '10.0.0.1', at(0))
+    writer.start()
+    writer.close()
+
+    assert attempts == [1, 1]
+    assert writer.status()['dropped'] == 1
+    assert writer.status()['last_error'] == 'database is locked'
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import shared.passwords
+from shared.passwords import PasswordHasher, method_prefix
+
+CHEAP = 'pbkdf2:sha256:1000'
+
+
+@pytest.mark.parametrize('method', [
+    'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000', 'scrypt', 'scrypt:16384:8:1',
+])
+def test_method_prefix_matches_the_hash_werkzeug_writes(method):
+    assert method_prefix(method) == generate_password_hash('secret', method).split('$', 1)[0]
+
+
+def test_method_prefix_leaves_other_methods_alone():
+    assert method_prefix('plain') == 'plain'
+
+
+def test_verify_rehashes_when_the_parameters_change():
+    stored = PasswordHasher('pbkdf2:sha256:1000').hash('secret')
+    hasher = PasswordHasher('pbkdf2:sha256:2000')
+
+    assert hasher.verify(stored, 'wrong') == (False, None)
+    ok, new_hash = hasher.verify(stored, 'secret')
+    assert ok
+    assert new_hash.startswith('pbkdf2:sha256:2000$')
+    assert hasher.verify(new_hash, 'secret') == (True, None)
+
+
+def test_verify_keeps_hashes_made_with_the_current_parameters():
+    hasher = PasswordHasher(CHEAP)
+    stored = hasher.hash('secret')
+
+    assert stored.startswith(CHEAP + '$')
+    assert hasher.verify(stored, 'secret') == (True, None)
+    assert not hasher.needs_rehash(stored)
+
+
+def test_at_most_workers_hashes_run_at_once(monkeypatch):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_hash(password, method):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return f'{method}$salt$hash'
+
+    monkeypatch.setattr(shared.passwords, 'generate_password_hash', slow_hash)
+    hasher = PasswordHasher(CHEAP, workers=2)
+    threads = [threading.Thread(target=hasher.hash, args=('secret',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
@@ -0,0 +1,78 @@
+import random
+
+from shared.rank_index import RankIndex
+
+
+def brute_rank(best, user_id):
+    # Negative values rank as 0
+    return 1 + sum(max(0, value) > max(0, best[user_id]) for value in best.values())
+
+
+def test_ties_share_a_rank():
+    ranks = RankIndex(max_value=100)
+    ranks.load([(1, 50), (2, 70), (3, 50), (4, 10)])
+
+    assert [ranks.rank(user_id) for user_id in (1, 2, 3, 4)] == [2, 1, 2, 4]
+    assert ranks.rank(5) is None
+    assert len(ranks) == 4
+
+
+def test_only_a_new_best_moves_a_player():
+    ranks = RankIndex(max_value=100)
+    ranks.load([(1, 50), (2, 70)])
+
+    ranks.add(1, 40)
+    assert ranks.best(1) == 50 and ranks.rank(1) == 2
+    ranks.add(1, 80)
+    assert ranks.best(1) == 80 and ranks.rank(1) == 1 and ranks.rank(2) == 2
+    ranks.add(3, 5)
+    assert ranks.rank(3) == 3 and len(ranks) == 3
+
+
+def test_values_past_max_value_overflow_exactly():
+    ranks = RankIndex(max_value=16)
+    ranks.load([(1, 15), (2, 16), (3, 1000), (4, 16)])
+
+    assert [ranks.rank(user_id) for user_id in (1, 2, 3, 4)] == [4, 2, 1, 2]
+    # Moving from the tree into the overflow list, and within it
+    ranks.add(1, 500)
+    assert ranks.rank(1) == 2 and ranks.rank(2) == 3
+    ranks.add(2, 2000)
+    assert ranks.rank(2) == 1 and ranks.rank(3) == 2
+    assert ranks.rank_of(17) == 4
+    assert ranks.rank_of(5000) == 1
+
+
+def test_negative_values_count_as_zero():
+    ranks = RankIndex(max_value=16)
+    ranks.load([(1, -5), (2, 0), (3, 3)])
+
+    assert ranks.rank(1) == ranks.rank(2) == 2
+    assert ranks.rank(3) == 1
+
+
+def test_load_skips_players_without_a_value():
+    ranks = RankIndex(max_value=16)
+    ranks.load([(1, None), (2, 4)])
+
+    assert len(ranks) == 1 and ranks.rank(1) is None
+
+
+def test_matches_brute_force_ranks():
+    rng = random.Random(7)
+    ranks = RankIndex(max_value=64)
+    best = {user_id: rng.randrange(-10, 100) for user_id in range(40)}
+    ranks.load(best.items())
+    for _ in range(100):
+        user_id, value = rng.randrange(60), rng.randrange(-10, 120)
+        ranks.add(user_id, value)
+        if user_id not in best or value > best[user_id]:
+            best[user_id] = value
+    assert len(ranks) == len(best)
+    for user_id in best:
+        assert ranks.rank(user_id) == brute_rank(best, user_id), user_id
+
+    # The linear-time load builds the same tree as adding one by one
+    loaded = RankIndex(max_value=64)
+    loaded.load(best.items())
+    assert all(loaded.rank(user_id) == ranks.rank(user_id) for user_id in best)
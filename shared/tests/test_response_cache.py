@@ -0,0 +1,122 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+from shared import response_cache
+from shared.response_cache import ResponseCache
+
+
+@pytest.fixture
+def server():
+    app = Flask(__name__)
+    cache = ResponseCache(max_entries=2)
+    data = {'version': 1, 'builds': 0, 'size': 10, 'fail': False}
+
+    def build():
+        data['builds'] += 1
+        if data['fail']:
+            return jsonify({'error': 'unavailable'}), 503
+        return {'version': data['version'], 'rows': ['x' * data['size']]}
+
+    @app.route('/data/<key>')
+    def endpoint(key):
+        return cache.respond(key, data['version'], build)
+
+    @app.route('/mine')
+    def mine():
+        return cache.respond('mine', data['version'], build, private=True)
+
+    server = app.test_client()
+    server.cache, server.data = cache, data
+    return server
+
+
+def test_304_when_the_client_holds_the_current_version(server):
+    first = server.get('/data/board')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.json['version'] == 1
+
+    again = server.get('/data/board', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+    assert server.data['builds'] == 1
+    assert server.cache.stats()['not_modified'] == 1
+
+
+def test_a_new_version_gets_a_new_etag_and_body(server):
+    etag = server.get('/data/board').headers['ETag']
+    server.data['version'] = 2
+
+    response = server.get('/data/board', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json['version'] == 2
+
+
+def test_body_is_built_once_per_version(server):
+    server.get('/data/board')
+    server.get('/data/board')
+
+    assert server.data['builds'] == 1
+    assert server.cache.stats()['hits'] == 1
+
+
+def test_large_bodies_are_gzipped_when_accepted(server):
+    server.data['size'] = 5000
+    response = server.get('/data/board', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].endswith('-gzip"')
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))['version'] == 1
+
+    # The gzip ETag is current too, whatever the client asks for next
+    again = server.get('/data/board', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_small_bodies_are_not_compressed(server):
+    response = server.get('/data/board', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.json['version'] == 1
+
+
+@pytest.mark.skipif(response_cache.brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred(server):
+    server.data['size'] = 5000
+    response = server.get('/data/board', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(response_cache.brotli.decompress(response.data))['version'] == 1
+
+
+def test_error_responses_are_passed_through_uncached(server):
+    server.data['fail'] = True
+    assert server.get('/data/board').status_code == 503
+    server.data['fail'] = False
+    assert server.get('/data/board').status_code == 200
+    assert server.data['builds'] == 2
+
+
+def test_private_payloads_vary_by_cookie(server):
+    response = server.get('/mine')
+
+    assert 'private' in response.headers['Cache-Control']
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert 'Cookie' in response.headers['Vary']
+
+
+def test_least_recently_used_keys_are_evicted(server):
+    for key in ('a', 'b', 'a', 'c'):
+        server.get(f'/data/{key}')
+    builds = server.data['builds']
+
+    server.get('/data/a')
+    assert server.data['builds'] == builds
+    server.get('/data/b')
+    assert server.data['builds'] == builds + 1
@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from shared.score_writer import QueueFull, ScoreWriter
+
+
+def row(game_id, score=10):
+    return {'game_id': game_id, 'user_id': 1, 'score': score, 'timestamp': '2025-01-01T12:00:00'}
+
+
+def leave_journal(directory, name, rows, torn=False):
+    """A journal as a process that died before flushing it leaves it"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+        for r in rows:
+            f.write(json.dumps(r) + '\n')
+        if torn:
+            f.write('{"game_id": "to')
+
+
+class Table:
+    """score table keyed by game id, inserted like the games' INSERT_JOURNALED_SCORE"""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE score (game_id TEXT UNIQUE, score INTEGER)')
+
+    def insert(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO score VALUES (:game_id, :score) ON CONFLICT (game_id) DO NOTHING', rows)
+
+    def game_ids(self):
+        return sorted(game_id for game_id, in self.conn.execute('SELECT game_id FROM score'))
+
+
+@pytest.fixture
+def writer(tmp_path):
+    # Recovery runs before the writer starts, so it has no journal of its own yet
+    return ScoreWriter(lambda rows: None, str(tmp_path))
+
+
+def test_recover_replays_journals_left_behind(tmp_path, writer):
+    leave_journal(tmp_path, 'scores-dead1.jsonl', [row('a'), row('b')])
+    leave_journal(tmp_path, 'scores-dead2.flushing.jsonl', [row('c')])
+    table = Table()
+
+    assert writer.recover(table.insert) == 3
+    assert table.game_ids() == ['a', 'b', 'c']
+    assert not list(tmp_path.iterdir())
+
+
+def test_recover_stops_at_a_torn_final_line(tmp_path, writer):
+    leave_journal(tmp_path, 'scores-dead.jsonl', [row('a')], torn=True)
+    table = Table()
+
+    assert writer.recover(table.insert) == 1
+    assert table.game_ids() == ['a']
+
+
+def test_replaying_a_committed_journal_inserts_nothing_twice(tmp_path, writer):
+    # The owner committed the batch and died before removing its journal
+    table = Table()
+    table.insert([row('a'), row('b')])
+    leave_journal(tmp_path, 'scores-dead.flushing.jsonl', [row('a'), row('b'), row('c')])
+
+    writer.recover(table.insert)
+
+    assert table.game_ids() == ['a', 'b', 'c']
+
+
+def test_same_tick_games_are_distinct(tmp_path, writer):
+    # Two games by one player in the same second differ only by game id
+    leave_journal(tmp_path, 'scores-dead.jsonl', [row('a', 10), row('b', 10)])
+    table = Table()
+
+    writer.recover(table.insert)
+
+    assert table.game_ids() == ['a', 'b']
+
+
+def test_recover_skips_journals_of_running_writers(tmp_path, writer):
+    other = ScoreWriter(lambda rows: None, str(tmp_path), batch_size=1000, flush_interval=60)
+    other.start()
+    try:
+        other.submit(row('a'))
+        table = Table()
+        assert writer.recover(table.insert) == 0
+        assert table.game_ids() == []
+    finally:
+        other.close()
+
+
+def test_failed_flush_keeps_the_batch_journaled(tmp_path):
+    calls = []
+
+    def flush_rows(rows):
+        calls.append(list(rows))
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+
+    # Never flushes on its own during the test
+    writer = ScoreWriter(flush_rows, str(tmp_path), batch_size=1000, flush_interval=60)
+    writer.start()
+    try:
+        writer.submit(row('a'))
+        assert writer.flush() is False
+        assert writer.depth() == 1
+        assert writer.last_error == 'database is locked'
+        journals = [p.name for p in tmp_path.iterdir()]
+        assert any(name.endswith('.flushing.jsonl') for name in journals)
+
+        writer.submit(row('b'))
+        assert writer.flush() is True
+        assert calls[1] == [row('a')]
+        assert writer.flush() is True
+        assert calls[2] == [row('b')]
+        assert writer.depth() == 0
+    finally:
+        writer.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_submit_raises_queue_full(tmp_path):
+    writer = ScoreWriter(lambda rows: None, str(tmp_path), max_queue=2, batch_size=1000, flush_interval=60)
+    writer.start()
+    try:
+        writer.submit(row('a'))
+        writer.submit(row('b'))
+        with pytest.raises(QueueFull):
+            writer.submit(row('c'))
+    finally:
+        writer.close()
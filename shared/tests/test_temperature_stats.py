@@ -0,0 +1,176 @@
+import numpy as np
+import pytest
+
+from shared.temperature_stats import COOL, HOT, RETENTION, Rollups, snapshot_state, update_state
+from shared.temperature_store import TemperatureStore
+
+
+def latest(**temps):
+    return {name: {'temp': temp} for name, temp in temps.items()}
+
+
+def apply(state, readings, **temps):
+    """Update readings to temps and state to match, as the store does"""
+    changes = {name: (readings[name]['temp'] if name in readings else None, temp)
+               for name, temp in temps.items()}
+    for name, temp in temps.items():
+        readings[name] = {'temp': temp}
+    return update_state(state, readings, changes)
+
+
+def test_snapshot_state():
+    state = snapshot_state(latest(Delhi=36.0, Mumbai=29.5, Chennai=33.1))
+
+    assert state == {'hot': HOT, 'cool': COOL, 'count': 3, 'sum_tenths': 986, 'above_hot': 1,
+                     'below_cool': 1, 'hottest': 'Delhi', 'coolest': 'Mumbai'}
+    assert snapshot_state({})['count'] == 0
+
+
+@pytest.mark.parametrize('temps', [
+    {'Pune': 31.0},                     # a new city
+    {'Delhi': 29.0},                    # the hottest city cools below the others
+    {'Mumbai': 37.5},                   # the coolest city becomes the hottest
+    {'Chennai': 36.0, 'Delhi': 30.1},   # a city overtakes the hottest, which cools
+    {'Chennai': 33.1},                  # unchanged
+])
+def test_update_state_matches_a_fresh_snapshot(temps):
+    readings = latest(Delhi=36.0, Mumbai=29.5, Chennai=33.1)
+    state = apply(snapshot_state(readings), readings, **temps)
+
+    assert state == snapshot_state(readings)
+
+
+def test_update_state_keeps_sums_exact_over_many_changes():
+    readings = latest(Delhi=36.0, Mumbai=29.5)
+    state = snapshot_state(readings)
+    for i in range(1000):
+        apply(state, readings, Delhi=round(25 + (i % 97) / 10, 1), Mumbai=round(30 + (i % 13) / 10, 1))
+
+    assert state == snapshot_state(readings)
+
+
+def readings(*rows):
+    """(times, city ids, temps) arrays of [(time, city id, temp)]"""
+    times, cities, temps = zip(*rows)
+    return (np.array(times, dtype='datetime64[s]'), np.array(cities, dtype=np.int32),
+            np.array(temps, dtype=np.float32))
+
+
+def cells(rollups, generation):
+    columns = rollups.load(generation)
+    return {(str(bucket), city): (int(columns['count'][row, city]), float(columns['sum'][row, city]),
+                                  float(columns['min'][row, city]), float(columns['max'][row, city]))
+            for row, bucket in enumerate(columns['buckets'])
+            for city in range(columns['count'].shape[1]) if columns['count'][row, city]}
+
+
+def test_update_allocates_buckets_for_the_readings(tmp_path):
+    rollups = Rollups(str(tmp_path), 'D')
+    generation = rollups.update(None, 2, [readings(
+        ('2025-03-01T01:00', 0, 20.0), ('2025-03-01T05:00', 0, 24.0), ('2025-03-03T00:00', 1, 30.0))])
+
+    columns = rollups.load(generation)
+    assert [str(b) for b in columns['buckets']] == ['2025-03-01', '2025-03-02', '2025-03-03']
+    assert columns['count'].shape == (3, 2)
+    assert cells(rollups, generation) == {('2025-03-01', 0): (2, 44.0, 20.0, 24.0),
+                                          ('2025-03-03', 1): (1, 30.0, 30.0, 30.0)}
+
+
+def test_update_rewrites_cells_in_place_when_they_fit(tmp_path):
+    rollups = Rollups(str(tmp_path), 'D')
+    generation = rollups.update(None, 2, [readings(
+        ('2025-03-01T00:00', 0, 20.0), ('2025-03-03T00:00', 1, 30.0))])
+    # The store passes each touched city's complete readings over the span
+    updated = rollups.update(generation, 2, [readings(
+        ('2025-03-01T00:00', 0, 20.0), ('2025-03-01T06:00', 0, 22.0), ('2025-03-02T00:00', 1, 31.0))])
+
+    assert updated == generation
+    assert cells(rollups, generation) == {('2025-03-01', 0): (2, 42.0, 20.0, 22.0),
+                                          ('2025-03-02', 1): (1, 31.0, 31.0, 31.0),
+                                          ('2025-03-03', 1): (1, 30.0, 30.0, 30.0)}
+
+
+def test_update_rebuilds_replaced_readings_exactly(tmp_path):
+    rollups = Rollups(str(tmp_path), 'D')
+    generation = rollups.update(None, 1, [readings(
+        ('2025-03-01T00:00', 0, 20.0), ('2025-03-01T06:00', 0, 40.0))])
+    generation = rollups.update(generation, 1, [readings(
+        ('2025-03-01T00:00', 0, 20.0), ('2025-03-01T06:00', 0, 21.0))])
+
+    assert cells(rollups, generation) == {('2025-03-01', 0): (2, 41.0, 20.0, 21.0)}
+
+
+@pytest.mark.parametrize('later, city_count', [
+    ('2025-03-05T00:00', 2),   # a newer bucket
+    ('2025-02-27T00:00', 2),   # an older bucket
+    ('2025-03-01T00:00', 3),   # another city
+])
+def test_update_reallocates_and_keeps_old_cells(tmp_path, later, city_count):
+    rollups = Rollups(str(tmp_path), 'D')
+    generation = rollups.update(None, 2, [readings(
+        ('2025-03-01T00:00', 0, 20.0), ('2025-03-02T00:00', 1, 30.0))])
+    updated = rollups.update(generation, city_count, [readings((later, city_count - 1, 25.0))])
+
+    assert updated != generation
+    assert rollups.load(updated)['count'].shape[1] == city_count
+    kept = cells(rollups, updated)
+    assert kept[('2025-03-01', 0)] == (1, 20.0, 20.0, 20.0)
+    assert kept[('2025-03-02', 1)] == (1, 30.0, 30.0, 30.0)
+    assert kept[(later[:10], city_count - 1)] == (1, 25.0, 25.0, 25.0)
+    rollups.remove_stale(updated)
+    with pytest.raises(FileNotFoundError):
+        rollups.load(generation)
+
+
+def test_update_drops_buckets_past_retention(tmp_path):
+    rollups = Rollups(str(tmp_path), 'h')
+    retention = RETENTION['h']
+    start = np.datetime64('2025-03-01T00', 'h')
+    generation = rollups.update(None, 1, [readings((str(start), 0, 20.0), (str(start + 1), 0, 21.0))])
+
+    newest = start + retention
+    generation = rollups.update(generation, 1, [readings((str(newest), 0, 22.0))])
+    buckets = rollups.load(generation)['buckets']
+    assert len(buckets) == retention
+    assert buckets[0] == start + 1 and buckets[-1] == newest
+    assert sorted(cells(rollups, generation)) == [(str(start + 1), 0), (str(newest), 0)]
+
+    # Readings older than everything kept are ignored
+    assert rollups.update(generation, 1, [readings((str(start - 5), 0, 19.0))]) == generation
+
+
+def test_window_for_one_city_and_all_cities(tmp_path):
+    rollups = Rollups(str(tmp_path), 'D')
+    generation = rollups.update(None, 2, [readings(
+        ('2025-03-01T00:00', 0, 20.0), ('2025-03-01T12:00', 0, 24.0),
+        ('2025-03-02T00:00', 0, 30.0), ('2025-03-02T00:00', 1, 10.0),
+        ('2025-03-03T00:00', 1, 12.0))])
+    columns = rollups.load(generation)
+
+    buckets, count, mean, low, high, overall = rollups.window(columns, 2, city=0)
+    assert [str(b) for b in buckets] == ['2025-03-02', '2025-03-03']
+    assert count.tolist() == [1, 0]
+    assert mean[0] == 30.0 and np.isnan(mean[1])
+    assert overall == {'readings': 1, 'mean': 30.0, 'min': 30.0, 'max': 30.0}
+
+    buckets, count, mean, low, high, overall = rollups.window(columns, 10)
+    assert len(buckets) == 3
+    assert count.tolist() == [2, 2, 1]
+    assert mean.tolist() == [22.0, 20.0, 12.0]
+    assert low.tolist() == [20.0, 10.0, 12.0]
+    assert high.tolist() == [24.0, 30.0, 12.0]
+    assert overall == {'readings': 5, 'mean': 19.2, 'min': 10.0, 'max': 30.0}
+
+
+def test_store_reads_rollups_kept_by_its_writes(tmp_path):
+    store = TemperatureStore(str(tmp_path / 'store'))
+    assert store.rollup('D', 7) is None
+    store.add_cities({'Delhi': {'lat': 28.6, 'lon': 77.2}, 'Mumbai': {'lat': 19.1, 'lon': 72.9}})
+    store.write([0, 0, 1], np.array(['2025-03-01T00:00', '2025-03-02T00:00', '2025-03-02T00:00'],
+                                    dtype='datetime64[s]'), [20.0, 22.0, 30.0])
+    store.write([0], np.array(['2025-03-02T00:00'], dtype='datetime64[s]'), [24.0])
+
+    *_, overall = store.rollup('D', 7, 'Delhi')
+    assert overall == {'readings': 2, 'mean': 22.0, 'min': 20.0, 'max': 24.0}
+    buckets, count, *_ = store.rollup('M', 12)
+    assert [str(b) for b in buckets] == ['2025-03'] and count.tolist() == [3]
@@ -0,0 +1,146 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pytest
+
+from shared import temperature_store
+from shared.temperature_store import TemperatureStore
+
+CITIES = {'Delhi': {'lat': 28.6, 'lon': 77.2}, 'Mumbai': {'lat': 19.1, 'lon': 72.9},
+          'Chennai': {'lat': 13.1, 'lon': 80.3}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TemperatureStore(str(tmp_path / 'store'))
+    store.add_cities(CITIES)
+    return store
+
+
+def write(store, readings):
+    """Write [(city name, time, temp)]"""
+    names, times, temps = zip(*readings)
+    store.write(store.city_ids(names), np.array(times, dtype='datetime64[s]'), temps)
+
+
+def rows(store, cities=None, start=None, end=None):
+    names = [city['name'] for city in store.cities()]
+    times, city_ids, temps = store.query(cities, start, end)
+    return sorted((names[c], str(t), round(float(v), 1)) for t, c, v in zip(times, city_ids, temps))
+
+
+def segments(store, month):
+    return temperature_store._segments(store.manifest()['partitions'][month])
+
+
+def test_query_by_city_and_time_range(store):
+    write(store, [('Delhi', '2025-01-01T00:00', 20.0), ('Delhi', '2025-01-02T00:00', 21.0),
+                  ('Mumbai', '2025-01-01T12:00', 28.5), ('Delhi', '2025-02-01T00:00', 22.0)])
+
+    assert rows(store) == [('Delhi', '2025-01-01T00:00:00', 20.0), ('Delhi', '2025-01-02T00:00:00', 21.0),
+                           ('Delhi', '2025-02-01T00:00:00', 22.0), ('Mumbai', '2025-01-01T12:00:00', 28.5)]
+    assert rows(store, ['Delhi'], '2025-01-02', '2025-02-01T00:00:01') == [
+        ('Delhi', '2025-01-02T00:00:00', 21.0), ('Delhi', '2025-02-01T00:00:00', 22.0)]
+    assert rows(store, ['Chennai']) == []
+    assert rows(store, None, '2025-01-01T06:00', '2025-01-02') == [('Mumbai', '2025-01-01T12:00:00', 28.5)]
+
+
+def test_each_write_to_the_current_month_adds_a_segment(store):
+    for day in range(1, 4):
+        write(store, [('Delhi', f'2025-03-0{day}T00:00', 20.0 + day)])
+
+    assert len(segments(store, '2025-03')) == 3
+    assert len(glob.glob(os.path.join(store.root, '2025-03', 'time.*.npy'))) == 3
+    assert rows(store, ['Delhi']) == [
+        ('Delhi', f'2025-03-0{day}T00:00:00', 20.0 + day) for day in range(1, 4)]
+
+
+def test_a_rewritten_reading_replaces_the_earlier_one(store):
+    write(store, [('Delhi', '2025-03-01T00:00', 20.0), ('Mumbai', '2025-03-01T00:00', 28.0)])
+    write(store, [('Delhi', '2025-03-01T00:00', 25.0)])
+
+    assert rows(store) == [('Delhi', '2025-03-01T00:00:00', 25.0), ('Mumbai', '2025-03-01T00:00:00', 28.0)]
+    assert rows(store, ['Delhi']) == [('Delhi', '2025-03-01T00:00:00', 25.0)]
+
+
+def test_months_are_compacted_once_a_later_month_is_written(store):
+    write(store, [('Delhi', '2025-03-01T00:00', 20.0)])
+    write(store, [('Delhi', '2025-03-01T00:00', 21.0), ('Mumbai', '2025-03-02T00:00', 28.0)])
+    assert len(segments(store, '2025-03')) == 2
+
+    write(store, [('Delhi', '2025-04-01T00:00', 22.0)])
+
+    assert len(segments(store, '2025-03')) == 1
+    # Files of the merged segments are removed with the manifest swap
+    assert len(glob.glob(os.path.join(store.root, '2025-03', '*.npy'))) == 4
+    assert rows(store, None, '2025-03-01', '2025-04-01') == [
+        ('Delhi', '2025-03-01T00:00:00', 21.0), ('Mumbai', '2025-03-02T00:00:00', 28.0)]
+
+
+def test_the_current_month_is_compacted_past_max_segments(store, monkeypatch):
+    monkeypatch.setattr(temperature_store, 'MAX_SEGMENTS', 2)
+    for hour in range(3):
+        write(store, [('Delhi', f'2025-03-01T0{hour}:00', 20.0 + hour)])
+
+    assert len(segments(store, '2025-03')) == 1
+    assert len(rows(store, ['Delhi'])) == 3
+
+
+def test_manifests_from_before_segments_are_read(store):
+    write(store, [('Delhi', '2025-03-01T00:00', 20.0), ('Mumbai', '2025-03-01T00:00', 28.0)])
+    path = os.path.join(store.root, temperature_store.MANIFEST)
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest['partitions']['2025-03'] = manifest['partitions']['2025-03'][0]
+    with open(path, 'w') as f:
+        json.dump(manifest, f)
+
+    reader = TemperatureStore(store.root)
+    assert rows(reader, ['Mumbai']) == [('Mumbai', '2025-03-01T00:00:00', 28.0)]
+
+    write(reader, [('Delhi', '2025-03-02T00:00', 21.0)])
+    assert len(segments(reader, '2025-03')) == 2
+    assert len(rows(reader)) == 3
+
+
+def test_readers_follow_writes_by_other_store_objects(store):
+    reader = TemperatureStore(store.root)
+    write(store, [('Delhi', '2025-03-01T00:00', 20.0)])
+    version = reader.version
+    assert rows(reader) == [('Delhi', '2025-03-01T00:00:00', 20.0)]
+
+    for day in range(2, 5):
+        write(store, [('Delhi', f'2025-03-0{day}T00:00', 20.0 + day)])
+    write(store, [('Delhi', '2025-04-01T00:00', 30.0)])
+
+    assert reader.version > version
+    assert len(rows(reader, ['Delhi'])) == 5
+
+
+def test_downsample(store):
+    write(store, [('Delhi', '2025-03-01T00:00', 20.0), ('Delhi', '2025-03-01T12:00', 24.0),
+                  ('Delhi', '2025-03-02T00:00', 30.0), ('Mumbai', '2025-03-01T00:00', 10.0)])
+
+    for how, expected in (('mean', [22.0, 30.0]), ('min', [20.0, 30.0]), ('max', [24.0, 30.0])):
+        buckets, values = store.downsample('Delhi', freq='D', how=how)
+        assert [str(b) for b in buckets] == ['2025-03-01', '2025-03-02']
+        assert values.tolist() == expected
+    buckets, values = store.downsample('Chennai')
+    assert len(buckets) == 0 and len(values) == 0
+
+
+def test_latest_and_stats_follow_the_newest_readings(store):
+    write(store, [('Delhi', '2025-03-01T00:00', 36.0), ('Mumbai', '2025-03-01T00:00', 29.0)])
+    write(store, [('Delhi', '2025-02-28T00:00', 10.0), ('Chennai', '2025-03-01T06:00', 33.0)])
+
+    latest = store.latest()
+    assert {name: reading['temp'] for name, reading in latest.items()} == {
+        'Delhi': 36.0, 'Mumbai': 29.0, 'Chennai': 33.0}
+    assert latest['Chennai']['lat'] == 13.1
+    stats = store.stats()
+    assert stats['total_cities'] == 3
+    assert stats['avg_temp'] == 32.7
+    assert (stats['hottest_city'], stats['coolest_city'], stats['temp_range']) == ('Delhi', 'Mumbai', 7.0)
+    assert stats['cities_above_35'] == 1 and stats['cities_below_30'] == 1
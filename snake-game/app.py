@@ -1,24 +1,76 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DateTime, text, bindparam
 from datetime import datetime
+import atexit
 import os
+import sys
+import threading
+import uuid
+
+# Modules shared by the apps live in the repository root's shared/ package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.change_hub import ChangeHub, HubFull, SSE_HEADERS
+from shared.leaderboard_rollups import LeaderboardRollups, WINDOWS, period_key
+from shared.rank_index import RankIndex
+from shared.response_cache import ResponseCache
+from shared.database import database_uri, engine_options, configure_engine, data_version
+from shared.login_audit import LoginAuditWriter
+from shared.passwords import PasswordHasher, DEFAULT_METHOD
+from shared.score_writer import ScoreWriter, QueueFull
+
+from leaderboard_index import LeaderboardIndex
+from migrations import migrate, find_full_scans
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///snake_game.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri('sqlite:///snake_game.db')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Opt-in write-behind score ingestion (see shared/score_writer.py)
+app.config['SCORE_WRITE_BEHIND'] = os.environ.get('SCORE_WRITE_BEHIND', '0') == '1'
+app.config['SCORE_JOURNAL_DIR'] = os.environ.get('SCORE_JOURNAL_DIR', os.path.join(app.instance_path, 'score_journal'))
+app.config['SCORE_QUEUE_MAX'] = int(os.environ.get('SCORE_QUEUE_MAX', 10000))
+app.config['SCORE_BATCH_SIZE'] = int(os.environ.get('SCORE_BATCH_SIZE', 200))
+app.config['SCORE_FLUSH_INTERVAL'] = float(os.environ.get('SCORE_FLUSH_INTERVAL', 1.0))
+
+# Login audit logging happens on a background thread unless LOGIN_AUDIT_ASYNC=0.
+# LOGIN_AUDIT_ROWS_PER_DAY caps LoginLog rows per user per day; further logins
+# only increment LoginDailyCount.
+app.config['LOGIN_AUDIT_ASYNC'] = os.environ.get('LOGIN_AUDIT_ASYNC', '1') == '1'
+app.config['LOGIN_AUDIT_ROWS_PER_DAY'] = int(os.environ['LOGIN_AUDIT_ROWS_PER_DAY']) if os.environ.get('LOGIN_AUDIT_ROWS_PER_DAY') else None
+app.config['LOGIN_AUDIT_QUEUE_MAX'] = int(os.environ.get('LOGIN_AUDIT_QUEUE_MAX', 10000))
+
+# Open /leaderboard/stream connections allowed per process
+app.config['STREAM_MAX_CLIENTS'] = int(os.environ.get('STREAM_MAX_CLIENTS', 100))
+
+# Password hashing parameters; stored hashes are upgraded on the next login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_engine(db.engine)
+    # Commits to the database file by any process; None when it is not SQLite
+    score_data_version = data_version(db.engine)
+password_hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'])
 
 # Database Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     scores = db.relationship('Score', backref='user', lazy=True)
+    
+    __table_args__ = (
+        db.Index('ix_user_created_at', created_at.desc()),
+    )
 
 class Score(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -26,12 +78,301 @@ class Score(db.Model):
     score = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     ip_address = db.Column(db.String(45), nullable=False)
+    # game_id, the id write-behind journals a game under, is added by migration 6
+    
+    __table_args__ = (
+        db.Index('ix_score_score_user_id', score.desc(), user_id),
+        db.Index('ix_score_score_id', score.desc(), id),
+        db.Index('ix_score_user_id_score', user_id, score.desc()),
+    )
+
+class LeaderboardBest(db.Model):
+    """A player's best result on one board in one period (see shared/leaderboard_rollups.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    board = db.Column(db.String(20), nullable=False)
+    period = db.Column(db.String(16), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    value = db.Column(db.Integer, nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('board', 'period', 'user_id', name='uq_leaderboard_best_board_period_user'),
+        db.Index('ix_leaderboard_best_rank', board, period, value.desc(), timestamp),
+    )
 
 class LoginLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     login_time = db.Column(db.DateTime, default=datetime.utcnow)
     ip_address = db.Column(db.String(45), nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_login_log_login_time', login_time.desc()),
+    )
+
+class LoginDailyCount(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    login_count = db.Column(db.Integer, nullable=False, default=0)
+    last_login_time = db.Column(db.DateTime)
+    last_ip_address = db.Column(db.String(45))
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='uq_login_daily_count_user_day'),
+    )
+
+# Add a batch of daily login counts to the existing totals
+LOGIN_COUNT_UPSERT = text("""
+    INSERT INTO login_daily_count (user_id, day, login_count, last_login_time, last_ip_address)
+    VALUES (:user_id, :day, :login_count, :last_login_time, :last_ip_address)
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        login_count = login_daily_count.login_count + excluded.login_count,
+        last_login_time = excluded.last_login_time,
+        last_ip_address = excluded.last_ip_address
+""").bindparams(bindparam('day', type_=db.Date), bindparam('last_login_time', type_=db.DateTime))
+
+login_audit = None
+login_audit_lock = threading.Lock()
+
+def write_login_audit(rows, counts):
+    """Write a batch of login rows and daily count increments in one transaction"""
+    with app.app_context():
+        if rows:
+            db.session.execute(LoginLog.__table__.insert(), rows)
+        if counts:
+            db.session.execute(LOGIN_COUNT_UPSERT, counts)
+        db.session.commit()
+
+def get_login_audit():
+    """Return the running login audit writer, or None when logging synchronously"""
+    global login_audit
+    if not app.config['LOGIN_AUDIT_ASYNC']:
+        return None
+    with login_audit_lock:
+        if login_audit is None:
+            writer = LoginAuditWriter(
+                write_login_audit,
+                rows_per_day=app.config['LOGIN_AUDIT_ROWS_PER_DAY'],
+                max_queue=app.config['LOGIN_AUDIT_QUEUE_MAX']
+            )
+            writer.start()
+            atexit.register(writer.close)
+            login_audit = writer
+    return login_audit
+
+# Write-behind score queue, started on first use when SCORE_WRITE_BEHIND=1
+score_writer = None
+score_writer_lock = threading.Lock()
+
+def score_row_values(row):
+    """Convert a journaled score row back into Score column values"""
+    # Journals written before game ids were added have none; those rows are inserted as they are
+    return dict(row, timestamp=datetime.fromisoformat(row['timestamp']), game_id=row.get('game_id'))
+
+# A journaled game is inserted at most once, however often its batch is replayed
+INSERT_JOURNALED_SCORE = text("""
+    INSERT INTO score (user_id, score, timestamp, ip_address, game_id)
+    VALUES (:user_id, :score, :timestamp, :ip_address, :game_id)
+    ON CONFLICT (game_id) DO NOTHING
+""").bindparams(bindparam('timestamp', type_=DateTime))
+
+def insert_scores(rows):
+    """Insert a batch of journaled scores in one transaction"""
+    with app.app_context():
+        values = [score_row_values(row) for row in rows]
+        db.session.execute(INSERT_JOURNALED_SCORE, values)
+        # Rollups keep bests, so recording a game twice changes nothing
+        leaderboard_rollups.record(db.session, values)
+        db.session.commit()
+
+def flush_scores(rows):
+    """Insert a batch from the write-behind queue, index it and publish the new leaderboard
+
+    Queued scores reach the in-memory indexes only here, once they are
+    committed; recovered ones are in the database when the indexes load.
+    """
+    insert_scores(rows)
+    with app.app_context():
+        index = ensure_leaderboard_index()
+        ranks = ensure_rank_index()
+        usernames = dict(db.session.query(User.id, User.username)
+                         .filter(User.id.in_({row['user_id'] for row in rows})).all())
+        for row in rows:
+            index.add(row['user_id'], usernames[row['user_id']], row['score'],
+                      datetime.fromisoformat(row['timestamp']))
+            ranks.add(row['user_id'], row['score'])
+        change_hub.publish('leaderboard', leaderboard_state())
+
+def get_score_writer():
+    """Return the running score writer, or None when write-behind is disabled"""
+    global score_writer
+    if not app.config['SCORE_WRITE_BEHIND']:
+        return None
+    with score_writer_lock:
+        if score_writer is None:
+            writer = ScoreWriter(
+                flush_scores,
+                app.config['SCORE_JOURNAL_DIR'],
+                max_queue=app.config['SCORE_QUEUE_MAX'],
+                batch_size=app.config['SCORE_BATCH_SIZE'],
+                flush_interval=app.config['SCORE_FLUSH_INTERVAL']
+            )
+            # Backfill the rollups before recovered or queued scores are
+            # recorded in them, or the backfill would find the table in use
+            with app.app_context():
+                ensure_leaderboard_rollups()
+            writer.recover(insert_scores)
+            writer.start()
+            atexit.register(writer.close)
+            score_writer = writer
+    return score_writer
+
+def latest_score_id():
+    with app.app_context():
+        return db.session.execute(text('SELECT MAX(id) FROM score')).scalar()
+
+# Scores up to this id are in the in-memory indexes below, as of this data
+# version; catch_up_indexes() adds newer ones, inserted by other worker processes
+indexed_score_id = None
+indexed_data_version = None
+indexed_score_lock = threading.Lock()
+
+def mark_indexed_scores():
+    """Note the newest score before the first index loads; later ones are caught up"""
+    global indexed_score_id
+    if indexed_score_id is None:
+        indexed_score_id = latest_score_id() or 0
+
+# In-memory leaderboard, loaded from the Score table on first use
+leaderboard_index = LeaderboardIndex(size=10)
+
+def ensure_leaderboard_index():
+    """Load the leaderboard index once per process"""
+    if not leaderboard_index.loaded:
+        # Replay journaled scores first so they are part of the index
+        get_score_writer()
+        mark_indexed_scores()
+        leaderboard_index.load_from_db(db.session, Score, User)
+    return leaderboard_index
+
+# Global rank of every player's best score, loaded from the Score table on first use
+rank_index = RankIndex()
+
+def ensure_rank_index():
+    """Load the rank index once per process"""
+    if not rank_index.loaded:
+        # Replay journaled scores first so they are counted
+        get_score_writer()
+        mark_indexed_scores()
+        rank_index.load_from_db(db.session, Score)
+    return rank_index
+
+def catch_up_indexes():
+    """Add the scores other processes inserted since the last catch-up to both indexes
+
+    SQLite only: it commits one write at a time, so scores become visible
+    in id order and none can appear below indexed_score_id later. The query
+    runs only when the data version shows a commit since the last one.
+    Other databases are served by a single process (host.check_workers),
+    which indexes its own scores as it commits them. Scores this process
+    already added come back too; both indexes ignore a game they already hold.
+    """
+    global indexed_score_id, indexed_data_version
+    index = ensure_leaderboard_index()
+    ranks = ensure_rank_index()
+    if score_data_version is None:
+        return index, ranks
+    with indexed_score_lock:
+        # Read before querying, so a commit racing the query is looked for again
+        version = score_data_version.current()
+        if version != indexed_data_version:
+            rows = db.session.query(Score.id, Score.user_id, User.username, Score.score, Score.timestamp) \
+                .join(User).filter(Score.id > indexed_score_id).order_by(Score.id).all()
+            for score_id, user_id, username, score, timestamp in rows:
+                index.add(user_id, username, score, timestamp)
+                ranks.add(user_id, score)
+            if rows:
+                indexed_score_id = rows[-1][0]
+            indexed_data_version = version
+    return index, ranks
+
+# Leaderboard changes pushed to /leaderboard/stream clients: published by
+# this process's score writes, and picked up from other processes' writes
+# by watching the newest score id
+change_hub = ChangeHub(max_clients=app.config['STREAM_MAX_CLIENTS'])
+
+def leaderboard_state():
+    """Top games by rank and the player count, as streamed to leaderboard clients"""
+    index, ranks = catch_up_indexes()
+    return {
+        'leaderboard': {
+            str(rank): {
+                'username': username,
+                'score': score,
+                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M')
+            } for rank, (user_id, username, score, timestamp) in enumerate(index.top(10), 1)
+        },
+        'players': len(ranks)
+    }
+
+def load_leaderboard_state():
+    with app.app_context():
+        return leaderboard_state()
+
+change_hub.watch('leaderboard', latest_score_id, load_leaderboard_state)
+
+# Leaderboard JSON by data version: ETags for conditional GETs, gzip/Brotli bodies
+response_cache = ResponseCache()
+
+# Daily, weekly and all-time best per player, kept in the leaderboard_best table
+leaderboard_rollups = LeaderboardRollups(boards=('score',))
+leaderboard_rollups_checked = False
+
+def ensure_leaderboard_rollups():
+    """Fill leaderboard_best from the Score table if it is empty, once per process"""
+    global leaderboard_rollups_checked
+    if not leaderboard_rollups_checked:
+        if leaderboard_rollups.is_empty(db.session) and Score.query.first() is not None:
+            leaderboard_rollups.rebuild(db.session)
+            db.session.commit()
+        leaderboard_rollups_checked = True
+    return leaderboard_rollups
+
+@app.cli.command('rebuild-leaderboards')
+def rebuild_leaderboards():
+    """Recompute the daily, weekly and all-time leaderboards from the Score table"""
+    count = leaderboard_rollups.rebuild(db.session)
+    db.session.commit()
+    print(f'Rebuilt {count} leaderboard entries')
+
+@app.cli.command('verify-leaderboard')
+def verify_leaderboard():
+    """Check the in-memory leaderboard against the database"""
+    index = ensure_leaderboard_index()
+    problems = index.check_consistency(db.session, Score, User)
+    for problem in problems:
+        print(problem)
+    print('Leaderboard index consistent' if not problems else f'{len(problems)} problem(s) found')
+
+@app.cli.command('migrate-db')
+def migrate_db():
+    """Create missing tables and apply pending schema migrations"""
+    db.create_all()
+    applied = migrate(db.engine)
+    for description in applied:
+        print(f'Applied migration {description}')
+    print('Database schema up to date')
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Fail if any hot query needs a full-table scan"""
+    problems = find_full_scans(db.engine)
+    for name, detail in problems:
+        print(f'{name}: {detail}')
+    if problems:
+        raise SystemExit(1)
+    print('All hot queries use indexes')
 
 # Routes
 @app.route('/')
@@ -59,7 +400,7 @@ def register():
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=password_hasher.hash(password)
         )
         db.session.add(user)
         db.session.commit()
@@ -77,17 +418,28 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        valid, new_hash = password_hasher.verify(user.password_hash, password) if user else (False, None)
+        
+        if valid:
             session['user_id'] = user.id
             session['username'] = user.username
             
+            # Upgrade hashes made with old parameters
+            if new_hash:
+                user.password_hash = new_hash
+                db.session.commit()
+            
             # Log the login
-            login_log = LoginLog(
-                user_id=user.id,
-                ip_address=request.remote_addr
-            )
-            db.session.add(login_log)
-            db.session.commit()
+            audit = get_login_audit()
+            if audit:
+                audit.record(user.id, request.remote_addr)
+            else:
+                login_log = LoginLog(
+                    user_id=user.id,
+                    ip_address=request.remote_addr
+                )
+                db.session.add(login_log)
+                db.session.commit()
             
             return jsonify({'success': True, 'message': 'Login successful'})
         else:
@@ -106,43 +458,190 @@ def submit_score():
         return jsonify({'success': False, 'message': 'Not logged in'})
     
     data = request.get_json()
-    score_value = data.get('score')
+    try:
+        score_value = int(data.get('score'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid score'}), 400
     
-    score = Score(
-        user_id=session['user_id'],
-        score=score_value,
-        ip_address=request.remote_addr
-    )
-    db.session.add(score)
-    db.session.commit()
+    # Backfill the rollups before this process writes its first score
+    ensure_leaderboard_rollups()
+    index = ensure_leaderboard_index()
+    ranks = ensure_rank_index()
+    timestamp = datetime.utcnow()
+    writer = get_score_writer()
+    
+    queued = False
+    if writer:
+        try:
+            # Respond once the score is journaled; the writer inserts it later
+            writer.submit({
+                'game_id': uuid.uuid4().hex,
+                'user_id': session['user_id'],
+                'score': score_value,
+                'timestamp': timestamp.isoformat(),
+                'ip_address': request.remote_addr
+            })
+            queued = True
+        except QueueFull:
+            pass  # Backpressure: write this one synchronously
+    
+    if not queued:
+        score = Score(
+            user_id=session['user_id'],
+            score=score_value,
+            timestamp=timestamp,
+            ip_address=request.remote_addr
+        )
+        db.session.add(score)
+        leaderboard_rollups.record(db.session, [{
+            'user_id': session['user_id'],
+            'score': score_value,
+            'timestamp': timestamp
+        }])
+        db.session.commit()
+        index.add(session['user_id'], session['username'], score_value, timestamp)
+        ranks.add(session['user_id'], score_value)
+        change_hub.publish('leaderboard', leaderboard_state())
+    # Queued scores are indexed and published by flush_scores once they are committed
     
     return jsonify({'success': True, 'message': 'Score submitted'})
 
+@app.route('/score-queue')
+def score_queue():
+    """Report the write-behind queue depth"""
+    writer = get_score_writer()
+    if writer is None:
+        return jsonify({'write_behind': False, 'queue_depth': 0})
+    return jsonify(dict(writer.status(), write_behind=True))
+
+@app.route('/login-audit')
+def login_audit_status():
+    """Report the login audit queue"""
+    audit = get_login_audit()
+    if audit is None:
+        return jsonify({'async': False, 'queue_depth': 0})
+    return jsonify(dict(audit.status(), **{'async': True}))
+
 @app.route('/leaderboard')
 def leaderboard():
+    window = request.args.get('window')
+    if window is not None:
+        return windowed_leaderboard(window)
+    
+    index, ranks = catch_up_indexes()
+    
     # Get top 10 scores
-    top_scores = db.session.query(Score, User).join(User).order_by(Score.score.desc()).limit(10).all()
+    top_scores = index.top(10)
     
-    # Get current user's best score
+    # Get current user's best score and rank
     user_best = None
+    user_rank = None
     if 'user_id' in session:
-        user_best = Score.query.filter_by(user_id=session['user_id']).order_by(Score.score.desc()).first()
+        user_best = index.user_best(session['user_id'])
+        user_rank = ranks.rank(session['user_id'])
     
-    leaderboard_data = []
-    for score, user in top_scores:
-        leaderboard_data.append({
-            'username': user.username,
-            'score': score.score,
-            'timestamp': score.timestamp.strftime('%Y-%m-%d %H:%M')
-        })
+    def build():
+        return {
+            'leaderboard': [{
+                'username': username,
+                'score': score,
+                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M')
+            } for user_id, username, score, timestamp in top_scores],
+            'user_best': user_best if user_best else 0,
+            'user_rank': user_rank,
+            'players': len(ranks),
+            'current_user': session.get('username', '')
+        }
+    
+    # The in-memory results are the version, so every worker agrees on the ETag
+    version = (top_scores, user_best, user_rank, len(ranks))
+    return response_cache.respond(('leaderboard', session.get('user_id')), version, build, private=True)
+
+@app.route('/leaderboard/stream')
+def leaderboard_stream():
+    """Server-Sent Events: the top games once, then a merge patch whenever they change"""
+    change_hub.publish('leaderboard', leaderboard_state())
+    try:
+        events = change_hub.stream(['leaderboard'], request.headers.get('Last-Event-ID'))
+    except HubFull as e:
+        response = jsonify({'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    return Response(events, mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/rank')
+def rank():
+    """Global rank by best score of the current player, ?username=<name>, or ?score=<n>"""
+    _, ranks = catch_up_indexes()
+    
+    if 'score' in request.args:
+        try:
+            score_value = int(request.args['score'])
+        except ValueError:
+            return jsonify({'error': 'score must be an integer'}), 400
+        return jsonify({'score': score_value, 'rank': ranks.rank_of(score_value), 'players': len(ranks)})
+    
+    if 'username' in request.args:
+        user = User.query.filter_by(username=request.args['username']).first()
+        if user is None:
+            return jsonify({'error': 'Unknown user'}), 404
+        user_id, username = user.id, user.username
+    elif 'user_id' in session:
+        user_id, username = session['user_id'], session['username']
+    else:
+        return jsonify({'error': 'Not logged in'}), 401
     
     return jsonify({
-        'leaderboard': leaderboard_data,
-        'user_best': user_best.score if user_best else 0,
-        'current_user': session.get('username', '')
+        'username': username,
+        'rank': ranks.rank(user_id),
+        'best': ranks.best(user_id),
+        'players': len(ranks)
     })
 
-if __name__ == '__main__':
+def windowed_leaderboard(window):
+    """Best score per player today, this week or of all time, from the rollups"""
+    if window not in WINDOWS:
+        return jsonify({'error': f'window must be one of {", ".join(WINDOWS)}'}), 400
+    
+    rollups = ensure_leaderboard_rollups()
+    
+    def build():
+        user_best = None
+        if 'user_id' in session:
+            user_best = rollups.user_best(db.session, 'score', window, session['user_id'])
+        return {
+            'window': window,
+            'leaderboard': [{
+                'username': username,
+                'score': value,
+                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M')
+            } for username, value, timestamp in rollups.top(db.session, 'score', window, 10)],
+            'user_best': user_best if user_best else 0,
+            'current_user': session.get('username', '')
+        }
+    
+    # Rollups change only with new scores, and a new day or week starts a new period
+    version = (latest_score_id(), period_key(window, datetime.utcnow()))
+    return response_cache.respond(('leaderboard', window, session.get('user_id')), version, build, private=True)
+
+def warm_up():
+    """Create and migrate the schema and load the in-memory indexes
+
+    Run before serving, by __main__ and by host.py before it forks its
+    workers, which then share the loaded indexes. With write-behind on the
+    indexes load in each serving process instead, after its journal replay.
+    """
     with app.app_context():
         db.create_all()
+        migrate(db.engine)
+        ensure_leaderboard_rollups()
+        if not app.config['SCORE_WRITE_BEHIND']:
+            ensure_leaderboard_index()
+            ensure_rank_index()
+        # Forked workers must open their own connections
+        db.engine.dispose()
+
+if __name__ == '__main__':
+    warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
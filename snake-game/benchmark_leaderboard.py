@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Leaderboard benchmark for Snake Game
+Compares the original ORDER BY queries with the in-memory LeaderboardIndex
+on a throwaway SQLite database.
+
+Usage: python3 benchmark_leaderboard.py [--rows 1000000] [--users 50000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from leaderboard_index import LeaderboardIndex
+
+TOP_SCORES_SQL = """
+    SELECT s.user_id, u.username, s.score, s.timestamp
+    FROM score s
+    JOIN user u ON s.user_id = u.id
+    ORDER BY s.score DESC
+    LIMIT 10
+"""
+USER_BEST_SQL = "SELECT score FROM score WHERE user_id = ? ORDER BY score DESC LIMIT 1"
+
+
+def build_database(path, rows, users):
+    """Create the game schema and fill it with random scores"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE user (
+            id INTEGER PRIMARY KEY,
+            username VARCHAR(80) NOT NULL UNIQUE,
+            email VARCHAR(120) NOT NULL UNIQUE,
+            password_hash VARCHAR(120) NOT NULL,
+            created_at DATETIME
+        );
+        CREATE TABLE score (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES user (id),
+            score INTEGER NOT NULL,
+            timestamp DATETIME,
+            ip_address VARCHAR(45) NOT NULL
+        );
+    """)
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO user (id, username, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+        ((i, f'player{i}', f'player{i}@example.com', 'x', now.isoformat(' ')) for i in range(1, users + 1))
+    )
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO score (user_id, score, timestamp, ip_address) VALUES (?, ?, ?, ?)",
+        ((rng.randint(1, users), rng.randint(0, 500),
+          (now - timedelta(seconds=i)).isoformat(' '), '127.0.0.1') for i in range(rows))
+    )
+    conn.commit()
+    return conn
+
+
+def load_index(conn):
+    """Load a LeaderboardIndex with the same queries load_from_db runs"""
+    index = LeaderboardIndex(size=10)
+    top_rows = conn.execute("""
+        SELECT s.user_id, u.username, s.score, s.timestamp
+        FROM score s JOIN user u ON s.user_id = u.id
+        ORDER BY s.score DESC, s.timestamp LIMIT 10
+    """).fetchall()
+    best_rows = conn.execute("SELECT user_id, MAX(score) FROM score GROUP BY user_id").fetchall()
+    index.load(top_rows, best_rows)
+    return index
+
+
+def time_it(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'leaderboard_bench.db')
+        print(f'Building {args.rows:,} scores for {args.users:,} users...')
+        conn = build_database(path, args.rows, args.users)
+        user_id = 1
+
+        def sql_leaderboard():
+            conn.execute(TOP_SCORES_SQL).fetchall()
+            conn.execute(USER_BEST_SQL, (user_id,)).fetchone()
+
+        start = time.perf_counter()
+        index = load_index(conn)
+        load_time = time.perf_counter() - start
+
+        def index_leaderboard():
+            index.top(10)
+            index.user_best(user_id)
+
+        sql_time = time_it(sql_leaderboard, args.repeat)
+        index_time = time_it(index_leaderboard, args.repeat * 1000)
+
+        db_top = [row[0] for row in conn.execute("SELECT score FROM score ORDER BY score DESC LIMIT 10")]
+        consistent = db_top == [entry[2] for entry in index.top()]
+        conn.close()
+
+    print(f'Index load (once at startup): {load_time * 1000:10.1f} ms')
+    print(f'SQL leaderboard per request:  {sql_time * 1000:10.3f} ms')
+    print(f'Index leaderboard per request:{index_time * 1000:10.4f} ms')
+    print(f'Speedup: {sql_time / index_time:,.0f}x  consistent: {consistent}')
+
+
+if __name__ == '__main__':
+    main()
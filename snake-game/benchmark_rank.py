@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Rank benchmark for Snake Game
+Loads RankIndex with millions of players' best scores and times rank
+lookups and score updates at each size, next to the SQL COUNT of players
+with a better best on an indexed SQLite table of the same bests.
+
+Usage: python3 benchmark_rank.py [--players 100000,1000000,5000000] [--sql-max 1000000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+# Modules shared by the apps live in the repository root's shared/ package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.rank_index import RankIndex
+
+COUNT_BETTER_SQL = "SELECT COUNT(*) FROM best WHERE score > ?"
+
+
+def per_call(func, args):
+    start = time.perf_counter()
+    for arg in args:
+        func(*arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+def sql_rank_time(bests, lookups):
+    """Seconds per COUNT query on an indexed in-memory table of the bests"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE best (user_id INTEGER PRIMARY KEY, score INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO best VALUES (?, ?)", enumerate(bests))
+    conn.execute("CREATE INDEX ix_best_score ON best (score)")
+    result = per_call(lambda score: conn.execute(COUNT_BETTER_SQL, (score,)).fetchone(), lookups)
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', default='100000,1000000,5000000')
+    parser.add_argument('--max-score', type=int, default=100_000)
+    parser.add_argument('--lookups', type=int, default=100_000)
+    parser.add_argument('--sql-max', type=int, default=1_000_000,
+                        help='largest size to also time the SQL COUNT for')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f'{"players":>10} {"load s":>8} {"rank us":>9} {"update us":>10} {"SQL COUNT us":>13}')
+    print('-' * 54)
+    for players in (int(size) for size in args.players.split(',')):
+        # Skewed like real scores: most players low, a long tail of high scores
+        bests = [min(args.max_score, int(rng.expovariate(1 / 2000))) for _ in range(players)]
+
+        index = RankIndex()
+        start = time.perf_counter()
+        index.load(enumerate(bests))
+        load_s = time.perf_counter() - start
+
+        users = [(rng.randrange(players),) for _ in range(args.lookups)]
+        rank_us = per_call(index.rank, users) * 1e6
+        updates = [(rng.randrange(players), rng.randint(0, args.max_score)) for _ in range(args.lookups)]
+        update_us = per_call(index.add, updates) * 1e6
+
+        sql_us = ''
+        if players <= args.sql_max:
+            scores = [(rng.randint(0, args.max_score // 10),) for _ in range(min(args.lookups, 200))]
+            sql_us = f'{sql_rank_time(bests, scores) * 1e6:,.0f}'
+        print(f'{players:>10,} {load_s:>8.2f} {rank_us:>9.2f} {update_us:>10.2f} {sql_us:>13}')
+
+
+if __name__ == '__main__':
+    main()
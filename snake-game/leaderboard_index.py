@@ -0,0 +1,110 @@
+"""
+In-memory leaderboard index for Snake Game
+Keeps the top scores sorted and each user's best score so /leaderboard
+never has to sort the score table.
+"""
+
+import bisect
+import threading
+from datetime import datetime
+
+
+class LeaderboardIndex:
+    """Process-resident top-N list plus per-user best score map.
+
+    Every worker process keeps its own copy, loaded once from the database
+    and updated by submit_score in the same process and by catching up on
+    scores other processes inserted.
+    """
+
+    def __init__(self, size=10):
+        self.size = size
+        self.loaded = False
+        self._lock = threading.Lock()
+        # Sorted by (-score, timestamp) so ties keep the earliest game first
+        self._keys = []
+        self._entries = []
+        self._best = {}
+
+    def load(self, top_rows, best_rows):
+        """Replace the index contents.
+
+        top_rows: iterable of (user_id, username, score, timestamp)
+        best_rows: iterable of (user_id, best_score)
+        """
+        keys = []
+        entries = []
+        for user_id, username, score, timestamp in top_rows:
+            key = (-score, timestamp or datetime.min)
+            pos = bisect.bisect_left(keys, key)
+            keys.insert(pos, key)
+            entries.insert(pos, (user_id, username, score, timestamp))
+        best = {user_id: score for user_id, score in best_rows}
+
+        with self._lock:
+            self._keys = keys[:self.size]
+            self._entries = entries[:self.size]
+            self._best = best
+            self.loaded = True
+
+    def load_from_db(self, session, Score, User):
+        """Load the index with one top-N query and one grouped MAX query"""
+        from sqlalchemy import func
+
+        top_rows = session.query(
+            Score.user_id, User.username, Score.score, Score.timestamp
+        ).join(User).order_by(Score.score.desc(), Score.timestamp).limit(self.size).all()
+        best_rows = session.query(
+            Score.user_id, func.max(Score.score)
+        ).group_by(Score.user_id).all()
+        self.load(top_rows, best_rows)
+
+    def add(self, user_id, username, score, timestamp):
+        """Record a newly submitted score; a game already in the list is ignored"""
+        key = (-score, timestamp or datetime.min)
+        with self._lock:
+            best = self._best.get(user_id)
+            if best is None or score > best:
+                self._best[user_id] = score
+            if len(self._keys) >= self.size and key >= self._keys[-1]:
+                return
+            pos = bisect.bisect_left(self._keys, key)
+            end = bisect.bisect_right(self._keys, key, pos)
+            if any(entry[0] == user_id for entry in self._entries[pos:end]):
+                return
+            self._keys.insert(pos, key)
+            self._entries.insert(pos, (user_id, username, score, timestamp))
+            del self._keys[self.size:]
+            del self._entries[self.size:]
+
+    def top(self, limit=None):
+        """Return up to limit (user_id, username, score, timestamp) tuples"""
+        with self._lock:
+            return list(self._entries[:limit or self.size])
+
+    def user_best(self, user_id):
+        """Return the user's best score or None if they have not played"""
+        return self._best.get(user_id)
+
+    def check_consistency(self, session, Score, User):
+        """Compare the index against the database and return a list of problems"""
+        from sqlalchemy import func
+
+        problems = []
+        db_top = [row[0] for row in session.query(Score.score)
+                  .order_by(Score.score.desc()).limit(self.size).all()]
+        index_top = [entry[2] for entry in self.top()]
+        if db_top != index_top:
+            problems.append(f'top scores differ: db={db_top} index={index_top}')
+
+        db_best = dict(session.query(Score.user_id, func.max(Score.score))
+                       .group_by(Score.user_id).all())
+        with self._lock:
+            index_best = dict(self._best)
+        for user_id in db_best.keys() | index_best.keys():
+            if db_best.get(user_id) != index_best.get(user_id):
+                problems.append(
+                    f'user {user_id} best differs: '
+                    f'db={db_best.get(user_id)} index={index_best.get(user_id)}'
+                )
+        return problems
@@ -0,0 +1,238 @@
+"""
+Schema migrations for Snake Game
+Brings existing databases up to date with the models without touching data,
+and guards the queries the apps run against full-table scans.
+"""
+
+import re
+import sqlite3
+
+from sqlalchemy import text
+
+# (version, description, statements) - append new entries, never edit old ones.
+# A statement may be a (dialect, sql) pair to run only on that database.
+MIGRATIONS = [
+    (1, 'Composite indexes for leaderboard, login log and user listing queries', [
+        'CREATE INDEX IF NOT EXISTS ix_score_score_user_id ON score (score DESC, user_id)',
+        'CREATE INDEX IF NOT EXISTS ix_score_user_id_score ON score (user_id, score DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_login_log_login_time ON login_log (login_time DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_user_created_at ON "user" (created_at DESC)',
+    ]),
+    (2, 'Widen user.password_hash for scrypt hashes', [
+        ('postgresql', 'ALTER TABLE "user" ALTER COLUMN password_hash TYPE VARCHAR(255)'),
+    ]),
+    (3, 'Incrementally maintained score_summary table for dashboard statistics', [
+        ('sqlite', '''CREATE TABLE IF NOT EXISTS score_summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            user_count INTEGER NOT NULL,
+            score_count INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            max_score INTEGER,
+            successful_games INTEGER NOT NULL
+        )'''),
+        ('sqlite', '''INSERT OR REPLACE INTO score_summary
+            SELECT 1, (SELECT COUNT(*) FROM "user"), COUNT(*), COALESCE(SUM(score), 0), MAX(score),
+                   COUNT(CASE WHEN score > 0 THEN 1 END)
+            FROM score'''),
+        ('sqlite', '''CREATE TRIGGER IF NOT EXISTS score_summary_score_insert AFTER INSERT ON score BEGIN
+            UPDATE score_summary SET
+                score_count = score_count + 1,
+                score_sum = score_sum + NEW.score,
+                max_score = MAX(COALESCE(max_score, NEW.score), NEW.score),
+                successful_games = successful_games + (NEW.score > 0)
+            WHERE id = 1;
+        END'''),
+        ('sqlite', '''CREATE TRIGGER IF NOT EXISTS score_summary_score_delete AFTER DELETE ON score BEGIN
+            UPDATE score_summary SET
+                score_count = score_count - 1,
+                score_sum = score_sum - OLD.score,
+                max_score = (SELECT MAX(score) FROM score),
+                successful_games = successful_games - (OLD.score > 0)
+            WHERE id = 1;
+        END'''),
+        ('sqlite', '''CREATE TRIGGER IF NOT EXISTS score_summary_user_insert AFTER INSERT ON "user" BEGIN
+            UPDATE score_summary SET user_count = user_count + 1 WHERE id = 1;
+        END'''),
+        ('sqlite', '''CREATE TRIGGER IF NOT EXISTS score_summary_user_delete AFTER DELETE ON "user" BEGIN
+            UPDATE score_summary SET user_count = user_count - 1 WHERE id = 1;
+        END'''),
+    ]),
+    (4, 'Score index with an id tiebreak for keyset pagination in database-viewer', [
+        'CREATE INDEX IF NOT EXISTS ix_score_score_id ON score (score DESC, id)',
+    ]),
+    (5, 'leaderboard_best rollup table for daily, weekly and all-time leaderboards', [
+        ('sqlite', '''CREATE TABLE IF NOT EXISTS leaderboard_best (
+            id INTEGER PRIMARY KEY,
+            board VARCHAR(20) NOT NULL,
+            period VARCHAR(16) NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            value INTEGER NOT NULL,
+            timestamp DATETIME NOT NULL,
+            CONSTRAINT uq_leaderboard_best_board_period_user UNIQUE (board, period, user_id)
+        )'''),
+        ('postgresql', '''CREATE TABLE IF NOT EXISTS leaderboard_best (
+            id SERIAL PRIMARY KEY,
+            board VARCHAR(20) NOT NULL,
+            period VARCHAR(16) NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            value INTEGER NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT uq_leaderboard_best_board_period_user UNIQUE (board, period, user_id)
+        )'''),
+        'CREATE INDEX IF NOT EXISTS ix_leaderboard_best_rank '
+        'ON leaderboard_best (board, period, value DESC, timestamp)',
+    ]),
+    (6, 'Unique game_id on score so replayed write-behind journals insert each game once', [
+        'ALTER TABLE score ADD COLUMN game_id VARCHAR(32)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_score_game_id ON score (game_id)',
+    ]),
+]
+
+# Every query the game, view_database.py and database-viewer run against this database
+HOT_QUERIES = [
+    ('user by username', 'SELECT * FROM user WHERE username = ? LIMIT 1', ('player',)),
+    ('user by email', 'SELECT * FROM user WHERE email = ? LIMIT 1', ('player@example.com',)),
+    ('leaderboard top scores',
+     'SELECT * FROM score JOIN user ON user.id = score.user_id ORDER BY score.score DESC LIMIT 10', ()),
+    ('leaderboard index load',
+     'SELECT score.user_id, user.username, score.score, score.timestamp '
+     'FROM score JOIN user ON user.id = score.user_id ORDER BY score.score DESC, score.timestamp LIMIT 10', ()),
+    ('user best score', 'SELECT * FROM score WHERE user_id = ? ORDER BY score DESC LIMIT 1', (1,)),
+    ('per-user best scores', 'SELECT user_id, MAX(score) FROM score GROUP BY user_id', ()),
+    ('windowed leaderboard',
+     'SELECT u.username, l.value, l.timestamp FROM leaderboard_best l JOIN user u ON u.id = l.user_id '
+     'WHERE l.board = ? AND l.period = ? ORDER BY l.value DESC, l.timestamp LIMIT ?', ('score', 'all', 10)),
+    ('windowed user best',
+     'SELECT value FROM leaderboard_best WHERE board = ? AND period = ? AND user_id = ?', ('score', 'all', 1)),
+    ('leaderboard rollup prune',
+     'DELETE FROM leaderboard_best WHERE board = ? AND period >= ? AND period < ?',
+     ('score', 'day:', 'day:2024-01-01')),
+    ('latest score id', 'SELECT MAX(id) FROM score', ()),
+    ('scores since',
+     'SELECT score.id, score.user_id, user.username, score.score, score.timestamp FROM score '
+     'JOIN user ON user.id = score.user_id WHERE score.id > ? ORDER BY score.id', (1,)),
+    ('viewer users page',
+     'SELECT id, username, email, created_at, created_at, id FROM user ORDER BY created_at DESC, id LIMIT ?', (51,)),
+    ('viewer users next page',
+     'SELECT id, username, email, created_at, created_at, id FROM user '
+     'WHERE created_at <= ? AND (created_at < ? OR id > ?) ORDER BY created_at DESC, id LIMIT ?',
+     ('2024-01-01', '2024-01-01', 1, 51)),
+    ('viewer scores page',
+     'SELECT s.score, u.username, s.timestamp, s.ip_address, s.score, s.id FROM score s '
+     'JOIN user u ON s.user_id = u.id ORDER BY s.score DESC, s.id LIMIT ?', (16,)),
+    ('viewer scores next page',
+     'SELECT s.score, u.username, s.timestamp, s.ip_address, s.score, s.id FROM score s '
+     'JOIN user u ON s.user_id = u.id WHERE s.score <= ? AND (s.score < ? OR s.id > ?) '
+     'ORDER BY s.score DESC, s.id LIMIT ?', (100, 100, 1, 51)),
+    ('viewer logins page',
+     'SELECT u.username, l.login_time, l.ip_address, l.login_time, l.id FROM login_log l '
+     'JOIN user u ON l.user_id = u.id ORDER BY l.login_time DESC, l.id LIMIT ?', (11,)),
+    ('viewer logins next page',
+     'SELECT u.username, l.login_time, l.ip_address, l.login_time, l.id FROM login_log l '
+     'JOIN user u ON l.user_id = u.id WHERE l.login_time <= ? AND (l.login_time < ? OR l.id > ?) '
+     'ORDER BY l.login_time DESC, l.id LIMIT ?', ('2024-01-01', '2024-01-01', 1, 51)),
+    ('viewer stats', 'SELECT * FROM score_summary WHERE id = 1', ()),
+    ('viewer stats single pass',
+     'SELECT COUNT(*), COALESCE(SUM(score), 0), MAX(score), COUNT(CASE WHEN score > 0 THEN 1 END) FROM score', ()),
+    ('user count', 'SELECT COUNT(*) FROM user', ()),
+    ('game count', 'SELECT COUNT(*) FROM score', ()),
+    ('score stats', 'SELECT MAX(score), AVG(score) FROM score', ()),
+    ('top player',
+     'SELECT u.username FROM score s JOIN user u ON s.user_id = u.id WHERE s.score = ? LIMIT 1', (1,)),
+]
+
+# A table read end to end, directly or through a covering index
+TABLE_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?( USING COVERING INDEX \w+)?$')
+# A walk of a table in index order; it reads every row unless a LIMIT stops it
+INDEX_WALK = re.compile(r'^SCAN \w+( AS \w+)? USING INDEX \w+$')
+
+# Hot queries that read every row on purpose: aggregates run once to load an
+# in-memory index, by the database-viewer fallback for a missing score_summary,
+# and by the view_database.py report
+FULL_SCANS_ALLOWED = frozenset({
+    'per-user best scores', 'viewer stats single pass', 'user count',
+    'game count', 'score stats',
+})
+
+
+def current_version(conn):
+    """Return the highest applied migration version"""
+    conn.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+    return conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+
+
+def backup_sqlite(engine, version):
+    """Copy a SQLite database aside before migrating it
+
+    Uses the backup API rather than a file copy so pages still in the WAL
+    file are included.
+    """
+    path = engine.url.database
+    if engine.dialect.name != 'sqlite' or not path or path == ':memory:':
+        return None
+    backup_path = f'{path}.bak-v{version}'
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(backup_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return backup_path
+
+
+def migrate(engine):
+    """Apply pending migrations in a single transaction and return their descriptions"""
+    with engine.connect() as conn:
+        version = current_version(conn)
+        conn.commit()
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if not pending:
+        return []
+
+    backup_sqlite(engine, version)
+    applied = []
+    with engine.begin() as conn:
+        for migration_version, description, statements in pending:
+            for statement in statements:
+                if isinstance(statement, tuple):
+                    dialect, statement = statement
+                    if dialect != engine.dialect.name:
+                        continue
+                conn.execute(text(statement))
+            conn.execute(text('INSERT INTO schema_version (version) VALUES (:version)'),
+                         {'version': migration_version})
+            applied.append(f'{migration_version}: {description}')
+    return applied
+
+
+def find_full_scans(engine, queries=HOT_QUERIES, allowed=FULL_SCANS_ALLOWED):
+    """Return (query name, plan detail) for every hot query that scans a whole table
+
+    Plans are taken on an empty in-memory copy of the schema so they reflect
+    the planner's large-table defaults rather than statistics from a small
+    development database. Queries named in allowed read every row on purpose
+    and are not reported.
+    """
+    if engine.dialect.name != 'sqlite':
+        return []
+    with engine.connect() as conn:
+        schema = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END"
+        ).scalars().all()
+
+    problems = []
+    plan_conn = sqlite3.connect(':memory:')
+    try:
+        for statement in schema:
+            plan_conn.execute(statement)
+        for name, sql, params in queries:
+            for row in plan_conn.execute('EXPLAIN QUERY PLAN ' + sql, params):
+                detail = row[-1]
+                full = TABLE_SCAN.match(detail) or (INDEX_WALK.match(detail) and ' LIMIT ' not in sql)
+                if full and name not in allowed:
+                    problems.append((name, detail))
+    finally:
+        plan_conn.close()
+    return problems
@@ -0,0 +1,35 @@
+import glob
+import importlib
+import os
+import sys
+
+import pytest
+
+# The modules under test live in the app directory above
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# Module names the other apps also use (app, migrations, ...)
+APP_MODULES = [os.path.basename(path)[:-3] for path in glob.glob(os.path.join(APP_DIR, '*.py'))]
+
+
+@pytest.fixture
+def game_app(tmp_path, monkeypatch):
+    """app.py imported afresh, on a SQLite file in tmp_path"""
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "game.db"}')
+    monkeypatch.syspath_prepend(APP_DIR)
+    saved = {name: sys.modules.pop(name) for name in APP_MODULES if name in sys.modules}
+    module = importlib.import_module('app')
+    yield module
+    with module.app.app_context():
+        module.db.engine.dispose()
+    for name in APP_MODULES:
+        sys.modules.pop(name, None)
+    sys.modules.update(saved)
+
+
+@pytest.fixture
+def migrations(game_app):
+    """The migrations module game_app imported"""
+    return sys.modules['migrations']
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from leaderboard_index import LeaderboardIndex
+
+T0 = datetime(2025, 1, 1, 12, 0)
+
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+def scores(index):
+    return [(username, score) for _, username, score, _ in index.top()]
+
+
+def test_load_orders_by_score_then_earliest_game():
+    index = LeaderboardIndex(size=10)
+    index.load([
+        (1, 'ana', 50, at(2)),
+        (2, 'ben', 80, at(5)),
+        (3, 'cy', 50, at(1)),
+        (4, 'dee', 90, at(9)),
+    ], [(1, 50), (2, 80), (3, 50), (4, 90)])
+
+    assert index.loaded
+    assert scores(index) == [('dee', 90), ('ben', 80), ('cy', 50), ('ana', 50)]
+
+
+def test_load_keeps_only_size_entries():
+    index = LeaderboardIndex(size=3)
+    index.load([(i, f'u{i}', i, at(i)) for i in range(10)], [])
+
+    assert [score for _, score in scores(index)] == [9, 8, 7]
+
+
+def test_add_inserts_ties_after_earlier_games():
+    index = LeaderboardIndex(size=10)
+    index.load([(1, 'ana', 50, at(0))], [(1, 50)])
+
+    index.add(2, 'ben', 50, at(5))
+    index.add(3, 'cy', 50, at(-5))
+
+    assert scores(index) == [('cy', 50), ('ana', 50), ('ben', 50)]
+
+
+def test_add_drops_games_below_a_full_list():
+    index = LeaderboardIndex(size=2)
+    index.load([(1, 'ana', 50, at(0)), (2, 'ben', 40, at(0))], [(1, 50), (2, 40)])
+
+    index.add(3, 'cy', 40, at(1))
+    assert scores(index) == [('ana', 50), ('ben', 40)]
+
+    index.add(3, 'cy', 60, at(1))
+    assert scores(index) == [('cy', 60), ('ana', 50)]
+    # The player's best counts even when the game is not in the top list
+    index.add(4, 'dee', 10, at(2))
+    assert index.user_best(4) == 10
+
+
+def test_add_ignores_a_game_already_listed():
+    index = LeaderboardIndex(size=10)
+    index.load([], [])
+
+    index.add(1, 'ana', 70, at(0))
+    # Catching up on other processes' scores brings this process's games back
+    index.add(1, 'ana', 70, at(0))
+
+    assert scores(index) == [('ana', 70)]
+
+
+def test_same_player_can_hold_several_places():
+    index = LeaderboardIndex(size=10)
+    index.load([], [])
+
+    index.add(1, 'ana', 70, at(0))
+    index.add(1, 'ana', 70, at(1))
+    index.add(1, 'ana', 30, at(2))
+
+    assert scores(index) == [('ana', 70), ('ana', 70), ('ana', 30)]
+    assert index.user_best(1) == 70
+
+
+def test_user_best_only_rises():
+    index = LeaderboardIndex(size=10)
+    index.load([], [(1, 40)])
+
+    index.add(1, 'ana', 20, at(0))
+    assert index.user_best(1) == 40
+    index.add(1, 'ana', 45, at(1))
+    assert index.user_best(1) == 45
+    assert index.user_best(2) is None
+
+
+def test_top_limit_and_missing_timestamps():
+    index = LeaderboardIndex(size=5)
+    index.load([(1, 'ana', 10, None), (2, 'ben', 10, at(0))], [])
+
+    # A game without a timestamp sorts as the earliest
+    assert scores(index) == [('ana', 10), ('ben', 10)]
+    assert len(index.top(1)) == 1
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from shared.login_audit import LoginAuditWriter
+
+T0 = datetime(2025, 1, 1, 12, 0)
+
+
+def audit(game_app, logins):
+    writer = LoginAuditWriter(game_app.write_login_audit, rows_per_day=1, flush_interval=0.01)
+    for user_id, minute, ip_address in logins:
+        writer.record(user_id, ip_address, T0 + timedelta(minutes=minute))
+    writer.start()
+    writer.close()
+    assert writer.status()['dropped'] == 0
+
+
+def test_daily_counts_are_upserted_across_batches(game_app):
+    with game_app.app.app_context():
+        game_app.db.create_all()
+
+    audit(game_app, [(1, 0, '10.0.0.1'), (1, 1, '10.0.0.2'), (2, 2, '10.0.0.3')])
+    audit(game_app, [(1, 3, '10.0.0.4'), (1, 4, '10.0.0.5')])
+
+    with game_app.app.app_context():
+        rows = game_app.LoginLog.query.order_by(game_app.LoginLog.login_time).all()
+        counts = {count.user_id: count for count in game_app.LoginDailyCount.query.all()}
+    # One row per user per day from each writer (rows_per_day is per process)
+    assert [(row.user_id, row.ip_address) for row in rows] == [
+        (1, '10.0.0.1'), (2, '10.0.0.3'), (1, '10.0.0.4')]
+    assert {user_id: count.login_count for user_id, count in counts.items()} == {1: 4, 2: 1}
+    assert counts[1].day == T0.date()
+    assert (counts[1].last_login_time, counts[1].last_ip_address) == (T0 + timedelta(minutes=4), '10.0.0.5')
@@ -0,0 +1,85 @@
+from sqlalchemy import text
+
+
+def test_migrated_database_has_no_full_scans(game_app, migrations):
+    with game_app.app.app_context():
+        game_app.db.create_all()
+        applied = migrations.migrate(game_app.db.engine)
+
+        assert len(applied) == len(migrations.MIGRATIONS)
+        assert migrations.find_full_scans(game_app.db.engine) == []
+        assert migrations.migrate(game_app.db.engine) == []
+        with game_app.db.engine.connect() as conn:
+            columns = {row[1] for row in conn.execute(text('PRAGMA table_info(score)'))}
+            indexes = {row[1] for row in conn.execute(text('PRAGMA index_list(score)'))}
+    assert 'game_id' in columns
+    assert 'ux_score_game_id' in indexes
+
+
+def test_full_scans_are_reported_unless_allowed(game_app, migrations):
+    queries = [
+        ('unindexed filter', 'SELECT * FROM score WHERE ip_address = ?', ('127.0.0.1',)),
+        ('covering count', 'SELECT COUNT(*) FROM score', ()),
+        ('unbounded index walk', 'SELECT * FROM score ORDER BY score DESC', ()),
+        ('index page', 'SELECT * FROM score ORDER BY score DESC LIMIT 10', ()),
+    ]
+    with game_app.app.app_context():
+        game_app.db.create_all()
+        migrations.migrate(game_app.db.engine)
+
+        names = [name for name, _ in migrations.find_full_scans(game_app.db.engine, queries, allowed=())]
+        assert names == ['unindexed filter', 'covering count', 'unbounded index walk']
+        allowed = {'covering count'}
+        names = [name for name, _ in migrations.find_full_scans(game_app.db.engine, queries, allowed)]
+        assert names == ['unindexed filter', 'unbounded index walk']
+
+
+def summary_matches_scores(conn, migrations):
+    single_pass = dict((name, sql) for name, sql, _ in migrations.HOT_QUERIES)['viewer stats single pass']
+    summary = conn.execute(text('SELECT * FROM score_summary')).one()
+    user_count = conn.execute(text('SELECT COUNT(*) FROM user')).scalar()
+    return tuple(summary[1:]) == (user_count, *conn.execute(text(single_pass)).one())
+
+
+def test_score_summary_follows_inserts_and_deletes(game_app, migrations):
+    insert_user = text("INSERT INTO user (username, email, password_hash) VALUES (:name, :name || '@x', 'h')")
+    insert_score = text("INSERT INTO score (user_id, score, ip_address) "
+                        "VALUES (:user_id, :score, '127.0.0.1')")
+    with game_app.app.app_context():
+        game_app.db.create_all()
+        engine = game_app.db.engine
+        with engine.begin() as conn:
+            conn.execute(insert_user, [{'name': 'ana'}, {'name': 'ben'}])
+            conn.execute(insert_score, [{'user_id': 1, 'score': 40}, {'user_id': 2, 'score': 0}])
+        migrations.migrate(engine)
+
+        with engine.begin() as conn:
+            # Backfilled from the rows that were there before the migration
+            assert summary_matches_scores(conn, migrations)
+            conn.execute(insert_user, {'name': 'cy'})
+            conn.execute(insert_score, [{'user_id': 3, 'score': 90}, {'user_id': 1, 'score': 15}])
+            assert summary_matches_scores(conn, migrations)
+            # Deleting the best score recomputes the maximum
+            conn.execute(text('DELETE FROM score WHERE score = 90'))
+            conn.execute(text("DELETE FROM user WHERE username = 'cy'"))
+            assert summary_matches_scores(conn, migrations)
+            conn.execute(text('DELETE FROM score'))
+            assert summary_matches_scores(conn, migrations)
+
+
+def test_replayed_journal_batches_insert_each_game_once(game_app, migrations):
+    with game_app.app.app_context():
+        game_app.db.create_all()
+        migrations.migrate(game_app.db.engine)
+    rows = [{'game_id': f'g{i}', 'user_id': 1, 'score': 10 * i, 'timestamp': '2025-01-01T12:00:00',
+             'ip_address': '127.0.0.1'} for i in range(3)]
+    # Journals written before game ids were added have none
+    legacy = [{'user_id': 1, 'score': 5, 'timestamp': '2025-01-01T12:00:00', 'ip_address': '127.0.0.1'}]
+
+    game_app.insert_scores(rows[:2] + legacy)
+    game_app.insert_scores(rows + legacy)
+
+    with game_app.app.app_context():
+        with game_app.db.engine.connect() as conn:
+            games = conn.execute(text('SELECT game_id, score FROM score ORDER BY id')).all()
+    assert [tuple(game) for game in games] == [('g0', 0), ('g1', 10), (None, 5), ('g2', 20), (None, 5)]
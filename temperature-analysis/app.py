@@ -1,116 +1,263 @@
-from flask import Flask, render_template, jsonify
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
-import io
-import base64
+from flask import Flask, Response, render_template, jsonify, request, make_response, url_for
 from datetime import datetime
+import functools
+import math
 import os
+import sys
+import threading
+import time
+
+import click
+
+# Modules shared by the apps live in the repository root's shared/ package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.change_hub import ChangeHub, HubFull, SSE_HEADERS
+from shared.response_cache import ResponseCache
+from shared.temperature_store import TemperatureStore
+
+from render_cache import RenderCache, render_key
+from render_pool import RenderPool, RenderError, RenderQueueFull, RenderTimeout
+from spatial_index import GridIndex, parse_bbox
 
 app = Flask(__name__)
 
-# Sample temperature data for India (you can replace with real API data)
-INDIA_CITIES = {
-    'Mumbai': {'lat': 19.0760, 'lon': 72.8777, 'temp': 32.5},
-    'Delhi': {'lat': 28.7041, 'lon': 77.1025, 'temp': 35.2},
-    'Bangalore': {'lat': 12.9716, 'lon': 77.5946, 'temp': 28.8},
-    'Chennai': {'lat': 13.0827, 'lon': 80.2707, 'temp': 31.4},
-    'Kolkata': {'lat': 22.5726, 'lon': 88.3639, 'temp': 33.1},
-    'Hyderabad': {'lat': 17.3850, 'lon': 78.4867, 'temp': 30.7},
-    'Pune': {'lat': 18.5204, 'lon': 73.8567, 'temp': 29.3},
-    'Ahmedabad': {'lat': 23.0225, 'lon': 72.5714, 'temp': 36.8},
-    'Jaipur': {'lat': 26.9124, 'lon': 75.7873, 'temp': 37.2},
-    'Lucknow': {'lat': 26.8467, 'lon': 80.9462, 'temp': 34.6},
-    'Kanpur': {'lat': 26.4499, 'lon': 80.3319, 'temp': 35.1},
-    'Nagpur': {'lat': 21.1458, 'lon': 79.0882, 'temp': 32.9},
-    'Indore': {'lat': 22.7196, 'lon': 75.8577, 'temp': 31.8},
-    'Bhopal': {'lat': 23.2599, 'lon': 77.4126, 'temp': 33.4},
-    'Visakhapatnam': {'lat': 17.6868, 'lon': 83.2185, 'temp': 29.9},
-    'Patna': {'lat': 25.5941, 'lon': 85.1376, 'temp': 36.3},
-    'Vadodara': {'lat': 22.3072, 'lon': 73.1812, 'temp': 35.7},
-    'Ghaziabad': {'lat': 28.6692, 'lon': 77.4538, 'temp': 34.8},
-    'Ludhiana': {'lat': 30.9010, 'lon': 75.8573, 'temp': 33.2},
-    'Coimbatore': {'lat': 11.0168, 'lon': 76.9558, 'temp': 27.6},
-    'Kochi': {'lat': 9.9312, 'lon': 76.2673, 'temp': 30.1},
-    'Thiruvananthapuram': {'lat': 8.5241, 'lon': 76.9366, 'temp': 29.4},
-    'Chandigarh': {'lat': 30.7333, 'lon': 76.7794, 'temp': 32.8},
-    'Mysore': {'lat': 12.2958, 'lon': 76.6394, 'temp': 26.9},
-    'Dehradun': {'lat': 30.3165, 'lon': 78.0322, 'temp': 31.5}
+# Rendered maps, keyed by a hash of the city data and MAP_PARAMS.
+# TEMP_MAP_CACHE_DIR keeps them on disk across restarts and processes.
+render_cache = RenderCache(
+    max_entries=int(os.environ.get('TEMP_MAP_CACHE_SIZE', 32)),
+    disk_dir=os.environ.get('TEMP_MAP_CACHE_DIR') or None,
+)
+
+# Charts are drawn by worker processes running charts.py, never in request threads
+render_pool = RenderPool(
+    'charts',
+    workers=int(os.environ.get('RENDER_WORKERS', 2)),
+    max_queue=int(os.environ.get('RENDER_QUEUE_MAX', 8)),
+    timeout=float(os.environ.get('RENDER_TIMEOUT', 30)),
+)
+
+# Per-city temperature readings; the dashboard shows each city's latest one
+TEMPERATURE_STORE = os.environ.get('TEMPERATURE_STORE',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temperature_store'))
+temperature_store = TemperatureStore(TEMPERATURE_STORE)
+
+# Snapshot readings the store is seeded with on first start
+SEED_CITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'india_cities.json')
+
+def current_cities():
+    """{city: {'lat', 'lon', 'temp', 'time'}} with each city's latest reading"""
+    return temperature_store.latest()
+
+def seed_temperature_store(days=0, seed=2025):
+    """Register the cities in SEED_CITIES_FILE and write their snapshot readings
+
+    With days > 0, also writes that many days of hourly history per city
+    (a daily cycle plus noise) ending at the snapshot reading.
+    """
+    import json
+    import numpy as np
+
+    with open(SEED_CITIES_FILE, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    cities = temperature_store.add_cities(snapshot)
+    ids = np.array(temperature_store.city_ids(list(snapshot)), dtype=np.int32)
+    temps = np.array([info['temp'] for info in snapshot.values()], dtype=np.float32)
+
+    now = np.datetime64(datetime.now().replace(minute=0, second=0, microsecond=0), 'h')
+    hours = np.arange(-days * 24, 1)
+    times = now + hours.astype('timedelta64[h]')
+    rng = np.random.default_rng(seed)
+    hour_of_day = (times - times.astype('datetime64[D]')).astype(int)
+    # Warmest mid-afternoon, coolest before dawn
+    daily_cycle = 4 * np.sin(2 * np.pi * (hour_of_day - 9) / 24)
+    history = (temps[:, np.newaxis] + daily_cycle - daily_cycle[-1]
+               + rng.normal(0, 0.8, size=(len(ids), len(hours))))
+    history[:, -1] = temps
+    temperature_store.write(np.repeat(ids, len(hours)), np.tile(times, len(ids)),
+                            np.round(history, 1).ravel())
+    return len(cities), history.size
+
+@app.cli.command('seed-temperature-store')
+@click.option('--days', default=30, show_default=True, help='days of hourly history per city')
+def seed_temperature_store_command(days):
+    """Create or refresh the temperature store from india_cities.json"""
+    cities, readings = seed_temperature_store(days)
+    click.echo(f'Wrote {readings} readings for {cities} cities to {TEMPERATURE_STORE}')
+
+# Everything besides the city data that changes the rendered map
+MAP_PARAMS = {
+    'figsize': (12, 10),
+    'dpi': 150,
+    'cmap': 'RdYlBu_r',
+    'title': 'India Temperature Map - Live Data',
 }
 
-def generate_temperature_map():
-    """Generate temperature map visualization"""
-    # Create figure and axis
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
-    # Extract data
-    cities = list(INDIA_CITIES.keys())
-    lats = [INDIA_CITIES[city]['lat'] for city in cities]
-    lons = [INDIA_CITIES[city]['lon'] for city in cities]
-    temps = [INDIA_CITIES[city]['temp'] for city in cities]
-    
-    # Create scatter plot with temperature-based colors
-    scatter = ax.scatter(lons, lats, c=temps, s=100, cmap='RdYlBu_r', 
-                        alpha=0.7, edgecolors='black', linewidth=1)
-    
-    # Add city labels
-    for i, city in enumerate(cities):
-        ax.annotate(f'{city}\n{temps[i]}°C', 
-                   (lons[i], lats[i]), 
-                   xytext=(5, 5), 
-                   textcoords='offset points',
-                   fontsize=8,
-                   bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7))
-    
-    # Customize the plot
-    ax.set_xlabel('Longitude', fontsize=12)
-    ax.set_ylabel('Latitude', fontsize=12)
-    ax.set_title('India Temperature Map - Live Data\n' + 
-                f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', 
-                fontsize=14, fontweight='bold')
-    
-    # Add colorbar
-    cbar = plt.colorbar(scatter, ax=ax)
-    cbar.set_label('Temperature (°C)', fontsize=12)
-    
-    # Set map boundaries for India
-    ax.set_xlim(68, 97)
-    ax.set_ylim(6, 37)
-    
-    # Add grid
-    ax.grid(True, alpha=0.3)
-    
-    # Tight layout
-    plt.tight_layout()
-    
-    # Convert plot to base64 string
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-    img_buffer.seek(0)
-    img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-    plt.close()
-    
-    return img_base64
+# Map extent (south, west, north, east) when no viewport is given
+INDIA_BOUNDS = (6, 68, 37, 97)
+
+_station_index = None
+
+def station_index():
+    """GridIndex over the stations, rebuilt only when stations are added"""
+    global _station_index
+    cities = temperature_store.cities()
+    if _station_index is None or len(_station_index) != len(cities):
+        _station_index = GridIndex([(city['name'], city['lat'], city['lon']) for city in cities])
+    return _station_index
+
+def stations_in(bounds):
+    """{city: latest reading} of the stations inside (south, west, north, east)"""
+    latest = current_cities()
+    return {name: latest[name] for name in station_index().bbox(*bounds) if name in latest}
+
+# Heatmap mode: readings interpolated onto a grid of this many (rows, columns),
+# from stations up to HEATMAP_MARGIN viewport widths outside the view
+HEATMAP_GRID = (200, 200)
+HEATMAP_MARGIN = 0.25
+MAP_MODES = ('scatter', 'heatmap')
+
+def map_viewport():
+    """The bbox and mode request arguments as ((south, west, north, east) or
+    None for the whole map, mode); raises ValueError"""
+    bbox = request.args.get('bbox')
+    mode = request.args.get('mode', 'scatter')
+    if mode not in MAP_MODES:
+        raise ValueError(f"mode must be one of {', '.join(MAP_MODES)}")
+    return (parse_bbox(bbox) if bbox else None), mode
+
+def map_inputs(bounds=None, mode='scatter'):
+    """(city data, render params) of the map of a viewport, or of all cities"""
+    params = MAP_PARAMS
+    if mode == 'heatmap':
+        params = dict(params, mode='heatmap', grid_shape=list(HEATMAP_GRID))
+    if bounds is None:
+        return current_cities(), params
+    south, west, north, east = bounds
+    if mode == 'heatmap':
+        # Stations just outside the view still shape the colours at its edges
+        dlat, dlon = (north - south) * HEATMAP_MARGIN, (east - west) * HEATMAP_MARGIN
+        cities = stations_in((max(-90, south - dlat), max(-180, west - dlon),
+                              min(90, north + dlat), min(180, east + dlon)))
+    else:
+        cities = stations_in(bounds)
+    return cities, dict(params, bounds=list(bounds))
+
+def temperature_map(bounds=None, mode='scatter'):
+    """Return (key, PNG bytes) of the current map, rendering it only when its inputs changed"""
+    cities, params = map_inputs(bounds, mode)
+    key = render_key(cities, params)
+    return key, render_cache.get_or_render(
+        key, lambda: render_pool.run('generate_temperature_map', cities, params))
+
+# Map tiles: 256px Web Mercator z/x/y PNGs, cached apart from whole maps
+tile_cache = RenderCache(
+    max_entries=int(os.environ.get('TILE_CACHE_SIZE', 512)),
+    disk_dir=os.environ.get('TILE_CACHE_DIR') or None,
+)
+TILE_MAX_ZOOM = 12
+# Zoom levels rendered ahead of requests, and re-rendered when readings change
+TILE_SEED_ZOOM = int(os.environ.get('TILE_SEED_ZOOM', 5))
+TILE_SEED_INTERVAL = 30
+# Browsers reuse a tile this many seconds, then revalidate it with its ETag
+TILE_MAX_AGE = 60
+# A fixed colour scale so neighbouring tiles match; heatmap tiles interpolate
+# from stations within radius_deg over a grid_size x grid_size grid
+TILE_PARAMS = {
+    'cmap': 'RdYlBu_r',
+    'temp_range': [20, 42],
+    'radius_deg': 8.0,
+    'grid_size': 64,
+}
+
+def tile_bounds(z, x, y):
+    """(south, west, north, east) of a Web Mercator tile"""
+    n = 2 ** z
+    lat = lambda row: math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+def tile_inputs(z, x, y, mode):
+    """(city data, render params) of a tile: only the stations that can show in it"""
+    south, west, north, east = tile_bounds(z, x, y)
+    if mode == 'heatmap':
+        margin = TILE_PARAMS['radius_deg']
+    else:
+        # Dots of stations just outside the tile overlap its edge
+        margin = (east - west) / 16
+    lon_margin = margin / max(math.cos(math.radians(max(abs(south), abs(north)))), 0.05)
+    cities = stations_in((max(-90, south - margin), max(-180, west - lon_margin),
+                          min(90, north + margin), min(180, east + lon_margin)))
+    params = dict(TILE_PARAMS, mode=mode, bounds=[south, west, north, east],
+                  bin_deg=360 / 2 ** z / 32)
+    return cities, params
+
+def temperature_tile(z, x, y, mode='scatter'):
+    """Return (key, PNG bytes) of a tile, rendering it only when its stations changed"""
+    cities, params = tile_inputs(z, x, y, mode)
+    key = render_key(cities, params)
+    return key, tile_cache.get_or_render(key, lambda: render_pool.run('render_tile', cities, params))
+
+def seed_tiles(max_zoom=TILE_SEED_ZOOM, modes=MAP_MODES):
+    """Render every tile up to max_zoom that covers a station; returns how many"""
+    cities = current_cities()
+    if not cities:
+        return 0
+    lats = [city['lat'] for city in cities.values()]
+    lons = [city['lon'] for city in cities.values()]
+    rendered = 0
+    for z in range(max_zoom + 1):
+        n = 2 ** z
+        tile_x = lambda lon: min(n - 1, int((lon + 180) / 360 * n))
+        tile_y = lambda lat: min(n - 1, int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n))
+        for x in range(tile_x(min(lons)), tile_x(max(lons)) + 1):
+            for y in range(tile_y(max(lats)), tile_y(min(lats)) + 1):
+                for mode in modes:
+                    temperature_tile(z, x, y, mode)
+                    rendered += 1
+    return rendered
+
+def keep_tiles_seeded():
+    """Background loop: re-seed the low zoom tiles whenever the readings change"""
+    version = None
+    while True:
+        if temperature_store.version != version:
+            version = temperature_store.version
+            try:
+                seed_tiles()
+            except (RenderQueueFull, RenderTimeout, RenderError) as e:
+                app.logger.warning('Tile seeding interrupted: %s', e)
+                version = None
+        time.sleep(TILE_SEED_INTERVAL)
 
 def generate_temperature_stats():
-    """Generate temperature statistics"""
-    temps = [city_data['temp'] for city_data in INDIA_CITIES.values()]
-    
-    stats = {
-        'total_cities': len(INDIA_CITIES),
-        'avg_temp': round(np.mean(temps), 1),
-        'max_temp': max(temps),
-        'min_temp': min(temps),
-        'hottest_city': max(INDIA_CITIES.keys(), key=lambda x: INDIA_CITIES[x]['temp']),
-        'coolest_city': min(INDIA_CITIES.keys(), key=lambda x: INDIA_CITIES[x]['temp']),
-        'temp_range': round(max(temps) - min(temps), 1),
-        'cities_above_35': len([t for t in temps if t > 35]),
-        'cities_below_30': len([t for t in temps if t < 30])
-    }
-    
-    return stats
+    """Temperature statistics, precomputed by the store as readings arrive"""
+    return temperature_store.stats()
+
+def temperature_state():
+    """Store version and statistics, as streamed to dashboard clients"""
+    return {'version': temperature_store.version, 'stats': generate_temperature_stats()}
+
+# New readings are pushed to /api/stream clients; the store's version is
+# only polled while a client is connected
+change_hub = ChangeHub(max_clients=int(os.environ.get('STREAM_MAX_CLIENTS', 100)))
+change_hub.watch('temperature', lambda: temperature_store.version, temperature_state)
+
+# JSON API bodies per URL and store version, with their gzip/Brotli encodings
+response_cache = ResponseCache(max_entries=int(os.environ.get('TEMP_RESPONSE_CACHE_SIZE', 256)))
+
+def store_versioned(view):
+    """Serve a view's dict through response_cache, keyed by URL and versioned by the store
+
+    Clients revalidating with the ETag of the current store version get 304
+    without the view running; error responses pass through uncached.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        return response_cache.respond(key, temperature_store.version, lambda: view(*args, **kwargs))
+    return wrapper
 
 @app.route('/')
 def index():
@@ -118,43 +265,250 @@ def index():
     return render_template('temperature_dashboard.html')
 
 @app.route('/api/temperature-map')
+@store_versioned
 def get_temperature_map():
-    """API endpoint to get temperature map"""
+    """API endpoint to get temperature map
+
+    The image itself is served by /api/temperature-map.png; map_url carries
+    its content hash so browsers can cache it for good. With
+    bbox=south,west,north,east the map and cities cover only that viewport,
+    and mode=heatmap draws interpolated readings instead of points.
+    """
     try:
-        map_image = generate_temperature_map()
+        bounds, mode = map_viewport()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        cities, params = map_inputs(bounds, mode)
+        key = render_key(cities, params)
         stats = generate_temperature_stats()
         
-        return jsonify({
+        return {
             'success': True,
-            'map_image': map_image,
+            'map_url': url_for('get_temperature_map_png', v=key, bbox=request.args.get('bbox'),
+                               mode=request.args.get('mode')),
+            'map_etag': key,
             'stats': stats,
-            'cities': INDIA_CITIES,
+            'cities': cities,
             'timestamp': datetime.now().isoformat()
-        })
+        }
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/temperature-map.png')
+def get_temperature_map_png():
+    """Temperature map image, with ETag/If-None-Match support"""
+    try:
+        bounds, mode = map_viewport()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        key, png = temperature_map(bounds, mode)
+    except (RenderQueueFull, RenderTimeout, RenderError) as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    response = make_response(png)
+    response.mimetype = 'image/png'
+    response.set_etag(key)
+    if request.args.get('v') == key:
+        # The URL names this exact render, so it never changes
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/tiles/<int:z>/<int:x>/<int:y>.png')
+def get_tile(z, x, y):
+    """Map tile image (mode=scatter or heatmap), with ETag/If-None-Match support"""
+    mode = request.args.get('mode', 'scatter')
+    if mode not in MAP_MODES or not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'success': False, 'error': 'No such tile'}), 404
+    try:
+        key, png = temperature_tile(z, x, y, mode)
+    except (RenderQueueFull, RenderTimeout, RenderError) as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    response = make_response(png)
+    response.mimetype = 'image/png'
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = TILE_MAX_AGE
+    return response.make_conditional(request)
+
+@app.route('/api/stream')
+def stream_temperature():
+    """Server-Sent Events: statistics once, then a merge patch whenever readings change"""
+    try:
+        events = change_hub.stream(['temperature'], request.headers.get('Last-Event-ID'))
+    except HubFull as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    return Response(events, mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/api/city-data')
+@store_versioned
 def get_city_data():
     """API endpoint to get city temperature data"""
-    return jsonify({
+    return {
         'success': True,
-        'cities': INDIA_CITIES,
+        'cities': current_cities(),
         'timestamp': datetime.now().isoformat()
-    })
+    }
 
 @app.route('/api/stats')
+@store_versioned
 def get_stats():
     """API endpoint to get temperature statistics"""
     stats = generate_temperature_stats()
-    return jsonify({
+    return {
         'success': True,
         'stats': stats,
         'timestamp': datetime.now().isoformat()
-    })
+    }
+
+def station_list(names, distances=None):
+    """Latest readings of the named stations as a list, with distances if given"""
+    latest = current_cities()
+    stations = []
+    for i, name in enumerate(names):
+        if name in latest:
+            station = dict(latest[name], name=name)
+            if distances is not None:
+                station['distance_km'] = round(distances[i], 1)
+            stations.append(station)
+    return {
+        'success': True,
+        'count': len(stations),
+        'stations': stations,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def float_args(*names):
+    """The named query arguments as floats; raises ValueError if any is missing or invalid"""
+    try:
+        return [float(request.args[name]) for name in names]
+    except (KeyError, ValueError):
+        raise ValueError(f"{', '.join(names)} must be numbers") from None
+
+@app.route('/api/stations/bbox')
+@store_versioned
+def get_stations_bbox():
+    """API endpoint to get the stations inside bbox=south,west,north,east"""
+    try:
+        bounds = parse_bbox(request.args.get('bbox', ''))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return station_list(station_index().bbox(*bounds))
+
+@app.route('/api/stations/nearest')
+@store_versioned
+def get_stations_nearest():
+    """API endpoint to get the n (default 5, at most 100) stations nearest lat, lon"""
+    try:
+        lat, lon = float_args('lat', 'lon')
+        n = int(request.args.get('n', 5))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    nearest = station_index().nearest(lat, lon, max(0, min(n, 100)))
+    return station_list([name for name, _ in nearest], [km for _, km in nearest])
+
+@app.route('/api/stations/radius')
+@store_versioned
+def get_stations_radius():
+    """API endpoint to get the stations within km (at most 2000) of lat, lon"""
+    try:
+        lat, lon, km = float_args('lat', 'lon', 'km')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not 0 < km <= 2000:
+        return jsonify({'success': False, 'error': 'km must be between 0 and 2000'}), 400
+    within = station_index().radius(lat, lon, km)
+    return station_list([name for name, _ in within], [km for _, km in within])
+
+@app.route('/api/stats/rollups')
+@store_versioned
+def get_stats_rollups():
+    """API endpoint to get precomputed aggregates over a rolling window
+
+    Query parameters: freq ('h', 'D' or 'M'), window (how many of the newest
+    buckets, default 24) and city (default: all cities together).
+    """
+    freq = request.args.get('freq', 'h')
+    city = request.args.get('city') or None
+    if freq not in ('h', 'D', 'M'):
+        return jsonify({'success': False, 'error': 'freq must be h, D or M'}), 400
+    try:
+        window = int(request.args.get('window', 24))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'window must be a number'}), 400
+    if window < 1:
+        return jsonify({'success': False, 'error': 'window must be at least 1'}), 400
+    if city is not None and city not in current_cities():
+        return jsonify({'success': False, 'error': f'Unknown city: {city}'}), 404
+    rollup = temperature_store.rollup(freq, window, city)
+    if rollup is None:
+        return jsonify({'success': False, 'error': 'No readings yet'}), 404
+    buckets, count, mean, low, high, overall = rollup
+
+    def values(array):
+        return [None if v != v else round(float(v), 1) for v in array]
+
+    return {
+        'success': True,
+        'city': city,
+        'freq': freq,
+        'window': {key: value if key == 'readings' or value is None else round(value, 1)
+                   for key, value in overall.items()},
+        'buckets': buckets.astype(str).tolist(),
+        'count': count.tolist(),
+        'mean': values(mean),
+        'min': values(low),
+        'max': values(high),
+        'timestamp': datetime.now().isoformat()
+    }
+
+@app.route('/api/history/<city>')
+@store_versioned
+def get_city_history(city):
+    """API endpoint to get one city's readings, raw or per hour/day/month
+
+    Query parameters: start and end (ISO dates or times, end exclusive),
+    freq ('raw', 'h', 'D' or 'M') and how ('mean', 'min' or 'max').
+    """
+    if city not in current_cities():
+        return jsonify({'success': False, 'error': f'Unknown city: {city}'}), 404
+    start = request.args.get('start') or None
+    end = request.args.get('end') or None
+    freq = request.args.get('freq', 'raw')
+    how = request.args.get('how', 'mean')
+    if freq not in ('raw', 'h', 'D', 'M') or how not in ('mean', 'min', 'max'):
+        return jsonify({'success': False, 'error': 'freq must be raw, h, D or M and how mean, min or max'}), 400
+    try:
+        if freq == 'raw':
+            times, _, values = temperature_store.query([city], start, end)
+        else:
+            times, values = temperature_store.downsample(city, start, end, freq, how)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid start or end: {e}'}), 400
+    return {
+        'success': True,
+        'city': city,
+        'freq': freq,
+        'times': times.astype(str).tolist(),
+        'temps': [round(float(v), 1) for v in values],
+        'timestamp': datetime.now().isoformat()
+    }
 
 @app.route('/health')
 def health_check():
@@ -162,8 +516,42 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'temperature-dashboard',
+        'render_cache': render_cache.stats(),
+        'tile_cache': tile_cache.stats(),
+        'streams': change_hub.status(),
+        'responses': response_cache.stats(),
+        'render_pool': render_pool.status(),
+        'temperature_store': {'version': temperature_store.version,
+                              'cities': len(temperature_store.cities())},
         'timestamp': datetime.now().isoformat()
     }), 200
 
+def warm_up():
+    """Seed an empty store; run before serving, by __main__ and by host.py before it forks"""
+    if not temperature_store.exists():
+        seed_temperature_store(days=30)
+
+background_pid = None
+background_lock = threading.Lock()
+
+def start_background():
+    """Start the render workers and the tile seeder in this process, once
+
+    Threads and render processes do not survive a fork, so this runs in the
+    serving process: by __main__, and by host.py in each gunicorn worker
+    after it is forked. The first map request then finds the workers warm.
+    """
+    global background_pid
+    with background_lock:
+        if background_pid == os.getpid():
+            return
+        background_pid = os.getpid()
+    render_pool.start()
+    threading.Thread(target=keep_tiles_seeded, name='tile-seeder', daemon=True).start()
+
 if __name__ == '__main__':
+    warm_up()
+    # Under the debug reloader only the serving child process needs them
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background()
     app.run(debug=True, host='0.0.0.0', port=5002)
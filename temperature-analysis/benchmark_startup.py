@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the temperature dashboard
+Starts a fresh interpreter per endpoint with -X importtime, imports app.py
+and serves one request, then reports the import time, the time to the
+first response and which heavy modules (matplotlib, numpy, pandas) the web
+process ended up loading.
+
+Usage: python3 benchmark_startup.py [--endpoints /health /api/stats] [--runs 5] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DEFAULT_ENDPOINTS = ['/health', '/api/city-data', '/api/stats', '/api/temperature-map', '/']
+HEAVY_MODULES = ('matplotlib', 'numpy', 'pandas')
+
+# Runs in the child interpreter; prints one JSON line
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+done = time.perf_counter()
+app.render_pool.close()
+print(json.dumps({
+    'status': response.status_code,
+    'import_ms': (imported - start) * 1000,
+    'first_response_ms': (done - start) * 1000,
+    'heavy': [name for name in %r if name in sys.modules],
+}))
+''' % (HEAVY_MODULES,)
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$')
+
+
+def parse_importtime(stderr):
+    """Return {top-level package: cumulative ms} from -X importtime output
+
+    A package's cumulative time covers everything its first import pulled
+    in, wherever in the import tree that happened.
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and '.' not in match.group(3):
+            name = match.group(3)
+            packages[name] = max(packages.get(name, 0), int(match.group(2)) / 1000)
+    return packages
+
+
+def measure(endpoint):
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, endpoint],
+                            cwd=here, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['packages'] = parse_importtime(result.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest imported packages to list')
+    args = parser.parse_args()
+
+    print(f'{"Endpoint":<24} {"status":>6} {"import ms":>10} {"first resp ms":>14}  heavy modules')
+    print('-' * 76)
+    packages = {}
+    for endpoint in args.endpoints:
+        reports = [measure(endpoint) for _ in range(args.runs)]
+        import_ms = statistics.median(r['import_ms'] for r in reports)
+        response_ms = statistics.median(r['first_response_ms'] for r in reports)
+        heavy = sorted(set().union(*(r['heavy'] for r in reports))) or ['none']
+        print(f'{endpoint:<24} {reports[-1]["status"]:>6} {import_ms:>10.1f} {response_ms:>14.1f}  {", ".join(heavy)}')
+        for name, ms in reports[-1]['packages'].items():
+            packages[name] = max(packages.get(name, 0), ms)
+
+    print('\nSlowest imports (cumulative ms, worst endpoint):')
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {name:<24} {ms:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Temperature store benchmark
+Writes years of hourly readings for many cities into a scratch
+TemperatureStore, then times one-city range slices, all-city slices and
+daily/monthly downsampling against the memory-mapped columns, next to the
+same windows read from the precomputed rollups.
+
+Usage: python3 benchmark_store.py [--cities 500] [--days 730] [--dir /tmp/temperature_store_bench]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+# Modules shared by the apps live in the repository root's shared/ package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.temperature_store import TemperatureStore
+
+
+def timed(label, run, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    ms = (time.perf_counter() - start) / repeat * 1000
+    rows = len(result[0])
+    print(f'{label:<40} {rows:>12,} {ms:>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, default=500)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--dir', default='/tmp/temperature_store_bench')
+    parser.add_argument('--seed', type=int, default=2025)
+    args = parser.parse_args()
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    store = TemperatureStore(args.dir)
+    rng = np.random.default_rng(args.seed)
+    names = [f'City {i:05d}' for i in range(args.cities)]
+    store.add_cities({name: {'lat': 0.0, 'lon': 0.0} for name in names})
+
+    first = np.datetime64('2024-01-01T00', 'h')
+    times = first + np.arange(args.days * 24).astype('timedelta64[h]')
+    start = time.perf_counter()
+    # One month of every city per write keeps the writer's memory bounded
+    months = times.astype('datetime64[M]')
+    for month in np.unique(months):
+        month_times = times[months == month]
+        temps = rng.normal(30, 5, size=(args.cities, len(month_times)))
+        store.write(np.repeat(np.arange(args.cities), len(month_times)),
+                    np.tile(month_times, args.cities), temps.ravel())
+    readings = args.cities * len(times)
+    write_s = time.perf_counter() - start
+    print(f'Wrote {readings:,} readings in {write_s:.1f}s ({readings / write_s:,.0f} readings/s)')
+
+    # Live ingest: one new hour of every city per write, appended to the
+    # current month as a segment rather than rewriting it
+    start = time.perf_counter()
+    for hour in range(1, 25):
+        store.write(np.arange(args.cities), np.full(args.cities, times[-1] + np.timedelta64(hour, 'h')),
+                    rng.normal(30, 5, size=args.cities))
+    print(f'Appended 24 hourly writes of {args.cities} readings in '
+          f'{(time.perf_counter() - start) / 24 * 1000:.1f} ms per write\n')
+
+    print(f'{"Query":<40} {"rows":>12} {"ms":>10}')
+    print('-' * 64)
+    mid = str(times[len(times) // 2].astype('datetime64[D]'))
+    week_end = str(times[len(times) // 2].astype('datetime64[D]') + np.timedelta64(7, 'D'))
+    timed('one city, one week', lambda: store.query([names[7]], mid, week_end))
+    timed('one city, everything', lambda: store.query([names[7]]))
+    timed('all cities, one week', lambda: store.query(None, mid, week_end))
+    timed('one city, daily max', lambda: store.downsample(names[7], freq='D', how='max'))
+    timed('one city, monthly mean', lambda: store.downsample(names[7], freq='M'))
+    timed('rollup: all cities, last 24 hours', lambda: store.rollup('h', 24))
+    timed('rollup: all cities, last 30 days', lambda: store.rollup('D', 30))
+    timed('rollup: one city, last 30 days', lambda: store.rollup('D', 30, names[7]))
+    timed('latest statistics', lambda: [store.stats()])
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Chart rendering for the temperature dashboard
+Runs inside the render worker processes (see render_pool.py). Uses the
+object-oriented Figure API rather than pyplot, so no global figure state
+is shared between renders.
+
+The map is drawn either as a scatter of stations or, in heatmap mode, as
+one raster of readings interpolated onto a lat/lon grid (inverse distance
+weighting), whose cost depends on the grid size rather than the station
+count. Interpolated grids are cached per station data, and only as many
+stations are labelled as fit the viewport.
+"""
+
+import hashlib
+import io
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# Map extent (south, west, north, east) when the params give no viewport
+INDIA_BOUNDS = (6, 68, 37, 97)
+
+TILE_SIZE = 256
+
+# Interpolate from at most this many points; denser stations are first
+# averaged into bins, so the grid costs the same for 100 or 100,000 stations
+MAX_SOURCES = 1024
+IDW_POWER = 2
+GRID_CACHE_SIZE = 8
+
+_grids = OrderedDict()
+
+
+def station_arrays(city_data):
+    """(names, lats, lons, temps) of the stations as arrays"""
+    names = list(city_data)
+    lats = np.array([city_data[name]['lat'] for name in names], dtype=np.float64)
+    lons = np.array([city_data[name]['lon'] for name in names], dtype=np.float64)
+    temps = np.array([city_data[name]['temp'] for name in names], dtype=np.float64)
+    return names, lats, lons, temps
+
+
+def idw_sources(lats, lons, temps, cell_deg=None):
+    """(lats, lons, temps, weights) to interpolate from
+
+    Up to MAX_SOURCES stations are used as they are. Beyond that they are
+    averaged into bins, each weighted by its station count: a bins x bins
+    grid over their extent, or with cell_deg, cells of that many degrees
+    aligned to 0, which bins neighbouring tiles' stations the same way.
+    """
+    weights = np.ones_like(temps)
+    if len(temps) <= MAX_SOURCES:
+        return lats, lons, temps, weights
+    if cell_deg is None:
+        bins = int(np.sqrt(MAX_SOURCES))
+        row = np.clip(((lats - lats.min()) / max(np.ptp(lats), 1e-9) * bins).astype(int), 0, bins - 1)
+        col = np.clip(((lons - lons.min()) / max(np.ptp(lons), 1e-9) * bins).astype(int), 0, bins - 1)
+    else:
+        row = np.floor(lats / cell_deg).astype(np.int64)
+        col = np.floor(lons / cell_deg).astype(np.int64)
+    _, cell = np.unique(row * 1_000_000 + col, return_inverse=True)
+    counts = np.bincount(cell)
+    mean = lambda values: np.bincount(cell, values) / counts
+    return mean(lats), mean(lons), mean(temps), counts.astype(np.float64)
+
+
+def idw(grid_lat, grid_lon, sources, radius=None):
+    """Interpolate sources onto the grid of grid_lat rows x grid_lon columns
+
+    Plain inverse distance weighting, or with radius (degrees) the modified
+    Shepard method: stations farther than radius have no influence and
+    cells with no station in range are NaN.
+    """
+    src_lat, src_lon, src_temp, src_weight = sources
+    grid = np.full((len(grid_lat), len(grid_lon)), np.nan, dtype=np.float32)
+    if not len(src_temp):
+        return grid
+    # A band of rows at a time keeps the (cells, sources) distance matrix small
+    band = max(1, 2_000_000 // (len(grid_lon) * len(src_temp)))
+    for start in range(0, len(grid_lat), band):
+        lat = grid_lat[start:start + band, np.newaxis, np.newaxis]
+        lon = grid_lon[np.newaxis, :, np.newaxis]
+        # Degrees of longitude are shorter than degrees of latitude away from
+        # the equator; scaling by each row's own latitude keeps tiles seamless
+        scale = np.cos(np.radians(lat))
+        d2 = np.maximum((lat - src_lat) ** 2 + ((lon - src_lon) * scale) ** 2, 1e-12)
+        if radius is None:
+            w = src_weight / d2 ** (IDW_POWER / 2)
+        else:
+            d = np.sqrt(d2)
+            w = src_weight * (np.maximum(radius - d, 0) / (radius * d)) ** IDW_POWER
+        with np.errstate(invalid='ignore'):
+            grid[start:start + band] = (w * src_temp).sum(axis=2) / w.sum(axis=2)
+    return grid
+
+
+def interpolate_grid(lats, lons, temps, bounds, shape):
+    """Inverse-distance-weighted temperatures on a (rows, cols) grid over bounds"""
+    south, west, north, east = bounds
+    rows, cols = shape
+    return idw(np.linspace(south, north, rows), np.linspace(west, east, cols),
+               idw_sources(lats, lons, temps))
+
+
+def cached_grid(lats, lons, temps, bounds, shape):
+    """interpolate_grid, cached by a hash of the station data, bounds and shape"""
+    digest = hashlib.sha256()
+    for array in (lats, lons, temps):
+        digest.update(array.tobytes())
+    key = (digest.hexdigest(), tuple(bounds), tuple(shape))
+    if key in _grids:
+        _grids.move_to_end(key)
+        return _grids[key]
+    grid = interpolate_grid(lats, lons, temps, bounds, shape)
+    _grids[key] = grid
+    while len(_grids) > GRID_CACHE_SIZE:
+        _grids.popitem(last=False)
+    return grid
+
+
+def label_indexes(lats, lons, temps, bounds, max_labels):
+    """Indexes of the stations to label: every station in view if they fit,
+    else the most extreme reading in each cell of a coarse grid over the view"""
+    south, west, north, east = bounds
+    inside = np.flatnonzero((lats >= south) & (lats <= north) & (lons >= west) & (lons <= east))
+    if len(inside) <= max_labels:
+        return inside
+    side = max(1, int(np.sqrt(max_labels)))
+    row = np.minimum(((lats[inside] - south) / (north - south) * side).astype(int), side - 1)
+    col = np.minimum(((lons[inside] - west) / (east - west) * side).astype(int), side - 1)
+    cell = row * side + col
+    # Within each cell keep the station farthest from the mean reading
+    order = np.lexsort((-np.abs(temps[inside] - temps[inside].mean()), cell))
+    first = np.r_[True, cell[order][1:] != cell[order][:-1]]
+    return inside[order[first]]
+
+
+def generate_temperature_map(city_data, params):
+    """Render the temperature map and return it as PNG bytes"""
+    # Create figure and axis
+    fig = Figure(figsize=params['figsize'])
+    ax = fig.subplots()
+
+    # Extract data
+    cities, lats, lons, temps = station_arrays(city_data)
+    bounds = params.get('bounds', INDIA_BOUNDS)
+    south, west, north, east = bounds
+
+    if params.get('mode') == 'heatmap' and len(cities):
+        grid = cached_grid(lats, lons, temps, bounds, params['grid_shape'])
+        layer = ax.imshow(grid, extent=(west, east, south, north), origin='lower',
+                          cmap=params['cmap'], aspect='auto', interpolation='bilinear')
+        if len(cities) <= MAX_SOURCES:
+            # Beyond that the dots would cost more than the raster and hide it
+            ax.scatter(lons, lats, s=6, c='black', alpha=0.6)
+    else:
+        # Create scatter plot with temperature-based colors
+        layer = ax.scatter(lons, lats, c=temps, s=100, cmap=params['cmap'],
+                           alpha=0.7, edgecolors='black', linewidth=1)
+
+    # Add city labels, as many as fit the viewport
+    for i in label_indexes(lats, lons, temps, bounds, params.get('max_labels', 30)):
+        ax.annotate(f'{cities[i]}\n{temps[i]}°C',
+                   (lons[i], lats[i]),
+                   xytext=(5, 5),
+                   textcoords='offset points',
+                   fontsize=8,
+                   bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7))
+
+    # Customize the plot
+    ax.set_xlabel('Longitude', fontsize=12)
+    ax.set_ylabel('Latitude', fontsize=12)
+    ax.set_title(params['title'], fontsize=14, fontweight='bold')
+
+    # Add colorbar
+    cbar = fig.colorbar(layer, ax=ax)
+    cbar.set_label('Temperature (°C)', fontsize=12)
+
+    # Set map boundaries: the viewport if given, else India
+    ax.set_xlim(west, east)
+    ax.set_ylim(south, north)
+
+    # Add grid
+    ax.grid(True, alpha=0.3)
+
+    # Tight layout
+    fig.tight_layout()
+
+    # Convert plot to PNG bytes
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png', dpi=params['dpi'], bbox_inches='tight')
+
+    return img_buffer.getvalue()
+
+
+def mercator_y(lat):
+    """Web Mercator y (in degree-like units) of a latitude"""
+    return np.degrees(np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)))
+
+
+def render_tile(city_data, params):
+    """Render one 256x256 Web Mercator map tile and return it as PNG bytes
+
+    params carries the tile's bounds, the mode, a fixed temperature range
+    so colours match across tiles, and for heatmaps the interpolation
+    radius and grid size. Areas with no station in range stay transparent.
+    """
+    cities, lats, lons, temps = station_arrays(city_data)
+    south, west, north, east = params['bounds']
+    top, bottom = mercator_y(north), mercator_y(south)
+    vmin, vmax = params['temp_range']
+
+    fig = Figure(figsize=(TILE_SIZE / 100, TILE_SIZE / 100), dpi=100)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    ax.set_xlim(west, east)
+    ax.set_ylim(bottom, top)
+
+    if params['mode'] == 'heatmap':
+        cells = params['grid_size']
+        # Cell centres, evenly spaced in Mercator y like the tile's pixels
+        y = np.linspace(bottom, top, cells + 1)
+        y = (y[:-1] + y[1:]) / 2
+        grid_lat = np.degrees(2 * np.arctan(np.exp(np.radians(y))) - np.pi / 2)
+        x = np.linspace(west, east, cells + 1)
+        sources = idw_sources(lats, lons, temps, cell_deg=params['bin_deg'])
+        grid = idw(grid_lat, (x[:-1] + x[1:]) / 2, sources, radius=params['radius_deg'])
+        ax.imshow(grid, extent=(west, east, bottom, top), origin='lower', cmap=params['cmap'],
+                  vmin=vmin, vmax=vmax, aspect='auto', interpolation='bilinear', alpha=0.8)
+        if len(cities) <= MAX_SOURCES:
+            ax.scatter(lons, mercator_y(lats), s=4, c='black', alpha=0.6)
+    else:
+        ax.scatter(lons, mercator_y(lats), c=temps, s=40, cmap=params['cmap'],
+                   vmin=vmin, vmax=vmax, alpha=0.8, edgecolors='black', linewidth=0.5)
+
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png', dpi=100, transparent=True)
+    return img_buffer.getvalue()
+
+
+def warm_up():
+    """Load fonts and the Agg renderer before the first real render"""
+    fig = Figure(figsize=(1, 1))
+    ax = fig.subplots()
+    ax.annotate('warm up °C', (0, 0))
+    fig.savefig(io.BytesIO(), format='png')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Simulation and analysis benchmark
+Times the vectorized generator and array aggregations in temperature_sim.py
+at 10k cities x 365 days, next to the original per-cell loop with a pandas
+groupby/pivot (run on fewer cities, since it is much slower), and reports
+rows per second for each.
+
+Usage: python3 benchmark_simulation.py [--cities 10000] [--days 365] [--freq D|h] [--loop-cities 200]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from temperature_sim import time_index, random_cities, simulate_chunks, city_means, group_means, day_of_month
+
+
+def loop_simulation(names, base_temps, dates):
+    """The original implementation: one random.uniform and dict per cell"""
+    data = []
+    for city, base_temp in zip(names, base_temps):
+        for date in dates:
+            day_effect = (date.day - 1) * 0.2
+            actual_temp = base_temp + day_effect + random.uniform(-2, 2)
+            data.append({
+                'City': city,
+                'Date': date,
+                'Temperature': round(actual_temp, 1),
+                'Temp_Difference': round(actual_temp - base_temp, 1)
+            })
+    return pd.DataFrame(data)
+
+
+def loop_analysis(df):
+    avg = df.groupby('City')['Temp_Difference'].mean().round(1)
+    pivot = df.pivot_table(index='City', columns=df['Date'].dt.day, values='Temp_Difference')
+    return avg, pivot
+
+
+def vectorized(names, base_temps, times, seed, chunk_size):
+    """Return (simulate seconds, analyse seconds)"""
+    rng = np.random.default_rng(seed)
+    days = day_of_month(times)
+    simulate_s = analyse_s = 0.0
+    chunks = simulate_chunks(names, base_temps, times, rng, chunk_size=chunk_size)
+    while True:
+        start = time.perf_counter()
+        series = next(chunks, None)
+        simulate_s += time.perf_counter() - start
+        if series is None:
+            return simulate_s, analyse_s
+        start = time.perf_counter()
+        city_means(series.difference)
+        group_means(series.difference, days)
+        analyse_s += time.perf_counter() - start
+
+
+def report(name, rows, simulate_s, analyse_s):
+    total = simulate_s + analyse_s
+    print(f'{name:<12} {rows:>12,} {rows / simulate_s:>16,.0f} {rows / analyse_s:>16,.0f} {rows / total:>14,.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--freq', choices=['D', 'h'], default='D', help='daily or hourly readings')
+    parser.add_argument('--loop-cities', type=int, default=200, help='cities for the original loop')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='cities simulated per chunk')
+    parser.add_argument('--seed', type=int, default=2025)
+    args = parser.parse_args()
+
+    start_day = np.datetime64('2025-01-01')
+    times = time_index(start_day, start_day + np.timedelta64(args.days - 1, 'D'), args.freq)
+    names, _, _, base_temps = random_cities(args.cities, np.random.default_rng(args.seed))
+
+    print(f'{"Engine":<12} {"rows":>12} {"simulate rows/s":>16} {"analyse rows/s":>16} {"total rows/s":>14}')
+    print('-' * 74)
+
+    loop_names, loop_bases = names[:args.loop_cities], base_temps[:args.loop_cities]
+    dates = pd.date_range(str(times[0]), periods=len(times), freq=args.freq)
+    start = time.perf_counter()
+    df = loop_simulation(loop_names, loop_bases, dates)
+    simulate_s = time.perf_counter() - start
+    start = time.perf_counter()
+    loop_analysis(df)
+    analyse_s = time.perf_counter() - start
+    report('loop', len(df), simulate_s, analyse_s)
+
+    simulate_s, analyse_s = vectorized(names, base_temps, times, args.seed, args.chunk_size)
+    report('vectorized', len(names) * len(times), simulate_s, analyse_s)
+
+
+if __name__ == '__main__':
+    main()
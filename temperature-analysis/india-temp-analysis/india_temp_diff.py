@@ -1,27 +1,44 @@
 #!/usr/bin/env python3
 """
-India Temperature Difference Graph for June 2025
-This script generates a visualization of temperature differences across India for June 2025.
+India Temperature Difference Graphs
+Generates bar charts and heatmaps of simulated temperature differences across
+Indian cities for any date range, optionally one pair per month. Each chart
+is an independent job rendered in parallel, and charts whose inputs have not
+changed since the last run are skipped.
+
+Usage:
+  python india_temp_diff.py                                   # June 2025, PNG at 300 dpi
+  python india_temp_diff.py --start 2024-01-01 --end 2025-12-31 --monthly --formats png svg
+  python india_temp_diff.py --cities my_cities.csv --dpi 150 --output-dir charts
 """
 
-import pandas as pd
+import argparse
+import calendar
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
-import matplotlib.pyplot as plt
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+from matplotlib.figure import Figure
 import seaborn as sns
-from datetime import datetime, timedelta
-import random
 
-# Set the style for our plots
-sns.set(style="whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
+from temperature_sim import time_index, simulate, city_means, group_means, day_of_month
 
-# Create a date range for June 2025
-start_date = datetime(2025, 6, 1)
-end_date = datetime(2025, 6, 30)
-date_range = pd.date_range(start=start_date, end=end_date)
+# Fixed seed so the generated charts are reproducible
+SEED = 2025
+
+# Bump when the drawing code changes so existing charts are regenerated
+CHART_VERSION = 1
+
+MANIFEST = '.charts-manifest.json'
 
 # Major cities in India with their approximate coordinates
-cities = {
+DEFAULT_CITIES = {
     'New Delhi': {'lat': 28.6139, 'lon': 77.2090, 'base_temp': 38},
     'Mumbai': {'lat': 19.0760, 'lon': 72.8777, 'base_temp': 32},
     'Chennai': {'lat': 13.0827, 'lon': 80.2707, 'base_temp': 36},
@@ -35,105 +52,247 @@ cities = {
     'Bhubaneswar': {'lat': 20.2961, 'lon': 85.8245, 'base_temp': 35},
 }
 
-# Generate temperature data for each city
-data = []
-
-# Simulate temperature patterns with some randomness
-for city, info in cities.items():
-    base_temp = info['base_temp']
-    
-    # Add some randomness to create variations
-    for date in date_range:
-        # Day of month effect (temperatures tend to increase through June)
-        day_effect = (date.day - 1) * 0.2
-        
-        # Random daily fluctuation
-        daily_random = random.uniform(-2, 2)
-        
-        # Calculate actual temperature
-        actual_temp = base_temp + day_effect + daily_random
-        
-        # Calculate temperature difference from the city's average June temperature
-        temp_diff = actual_temp - base_temp
-        
-        data.append({
-            'City': city,
-            'Date': date,
-            'Temperature': round(actual_temp, 1),
-            'Temp_Difference': round(temp_diff, 1)
-        })
-
-# Create DataFrame
-df = pd.DataFrame(data)
-
-# Calculate average temperature difference for each city across the month
-avg_diff_by_city = df.groupby('City')['Temp_Difference'].mean().reset_index()
-avg_diff_by_city['Temp_Difference'] = avg_diff_by_city['Temp_Difference'].round(1)
-
-# Sort by temperature difference
-avg_diff_by_city = avg_diff_by_city.sort_values('Temp_Difference', ascending=False)
-
-# Create the plot
-plt.figure(figsize=(14, 10))
-
-# Create a bar plot for average temperature differences
-ax = sns.barplot(
-    x='City', 
-    y='Temp_Difference', 
-    data=avg_diff_by_city,
-    palette='coolwarm'
-)
-
-# Add a horizontal line at y=0
-plt.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-
-# Customize the plot
-plt.title('Projected Temperature Differences from Average in Indian Cities - June 2025', fontsize=16)
-plt.xlabel('City', fontsize=14)
-plt.ylabel('Temperature Difference (°C)', fontsize=14)
-plt.xticks(rotation=45, ha='right')
-
-# Add value labels on top of bars
-for i, v in enumerate(avg_diff_by_city['Temp_Difference']):
-    ax.text(i, v + (0.1 if v >= 0 else -0.3), str(v), ha='center', fontsize=10)
-
-# Add a note about the data
-plt.figtext(0.5, 0.01, 
-            'Note: Temperature differences are calculated from each city\'s historical June average.\n'
-            'Data is simulated for June 2025 based on historical patterns with projected climate trends.',
-            ha='center', fontsize=10, style='italic')
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-
-# Save the figure
-plt.savefig('india_temperature_diff_june_2025.png', dpi=300, bbox_inches='tight')
-
-# Create a heatmap showing daily temperature differences
-plt.figure(figsize=(16, 10))
-
-# Pivot the data for the heatmap
-heatmap_data = df.pivot_table(
-    index='City', 
-    columns=df['Date'].dt.day, 
-    values='Temp_Difference'
-)
-
-# Create the heatmap
-sns.heatmap(
-    heatmap_data, 
-    cmap='coolwarm', 
-    center=0,
-    annot=False, 
-    fmt=".1f",
-    linewidths=.5
-)
-
-plt.title('Daily Temperature Differences from Average in Indian Cities - June 2025', fontsize=16)
-plt.xlabel('Day of June 2025', fontsize=14)
-plt.ylabel('City', fontsize=14)
-plt.tight_layout()
-
-# Save the heatmap
-plt.savefig('india_temperature_diff_heatmap_june_2025.png', dpi=300, bbox_inches='tight')
-
-print("Analysis complete! Graphs have been saved.")
+
+def load_cities(path):
+    """Read cities from a JSON object like DEFAULT_CITIES or a CSV with
+    name, lat, lon and base_temp columns"""
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    with open(path, newline='', encoding='utf-8') as f:
+        return {
+            row['name']: {'lat': float(row['lat']), 'lon': float(row['lon']),
+                          'base_temp': float(row['base_temp'])}
+            for row in csv.DictReader(f)
+        }
+
+
+class Period:
+    """A date range the charts cover, with its title and file name labels"""
+
+    def __init__(self, start, end):
+        self.start = np.datetime64(start, 'D')
+        self.end = np.datetime64(end, 'D')
+        first = self.start.astype(object)
+        last = self.end.astype(object)
+        self.whole_month = (first.day == 1 and (first.year, first.month) == (last.year, last.month)
+                            and last.day == calendar.monthrange(last.year, last.month)[1])
+        if self.whole_month:
+            self.title = first.strftime('%B %Y')
+            self.slug = first.strftime('%B_%Y').lower()
+            self.average_label = first.strftime('%B')
+        else:
+            self.title = f'{first} to {last}'
+            self.slug = f'{first}_{last}'
+            self.average_label = 'seasonal'
+
+    def rng(self, seed):
+        # Seeded per period so a month's data is the same however the range is split
+        return np.random.default_rng([seed, self.start.astype(object).toordinal()])
+
+
+def periods(start, end, monthly=False):
+    """The whole range as one Period, or one Period per calendar month"""
+    if not monthly:
+        return [Period(start, end)]
+    start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    result = []
+    month = start.astype('datetime64[M]')
+    while month <= end.astype('datetime64[M]'):
+        next_month = month + np.timedelta64(1, 'M')
+        result.append(Period(max(start, month.astype('datetime64[D]')),
+                             min(end, next_month.astype('datetime64[D]') - np.timedelta64(1, 'D'))))
+        month = next_month
+    return result
+
+
+def simulate_period(cities, period, seed):
+    """Return (city names, dates, TemperatureSeries) for one period"""
+    names = np.array(list(cities))
+    base_temps = np.array([info['base_temp'] for info in cities.values()])
+    dates = time_index(period.start, period.end)
+    return names, dates, simulate(names, base_temps, dates, period.rng(seed))
+
+
+def render_bar_chart(cities, period, seed, path, dpi):
+    """Bar chart of each city's average temperature difference over the period"""
+    names, _, series = simulate_period(cities, period, seed)
+
+    # Calculate average temperature difference for each city, largest first
+    avg_diff = city_means(series.difference)
+    order = np.argsort(-avg_diff, kind='stable')
+    avg_diff_by_city = pd.DataFrame({'City': names[order], 'Temp_Difference': avg_diff[order]})
+
+    with sns.axes_style('whitegrid'):
+        fig = Figure(figsize=(14, 10))
+        ax = fig.subplots()
+
+        # Create a bar plot for average temperature differences
+        sns.barplot(x='City', y='Temp_Difference', hue='City', data=avg_diff_by_city,
+                    palette='coolwarm', legend=False, ax=ax)
+
+    # Add a horizontal line at y=0
+    ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+
+    # Customize the plot
+    ax.set_title(f'Projected Temperature Differences from Average in Indian Cities - {period.title}', fontsize=16)
+    ax.set_xlabel('City', fontsize=14)
+    ax.set_ylabel('Temperature Difference (°C)', fontsize=14)
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+
+    # Add value labels on top of bars
+    for i, v in enumerate(avg_diff_by_city['Temp_Difference']):
+        ax.text(i, v + (0.1 if v >= 0 else -0.3), str(v), ha='center', fontsize=10)
+
+    # Add a note about the data
+    fig.text(0.5, 0.01,
+             f'Note: Temperature differences are calculated from each city\'s historical {period.average_label} average.\n'
+             f'Data is simulated for {period.title} based on historical patterns with projected climate trends.',
+             ha='center', fontsize=10, style='italic')
+
+    fig.tight_layout(rect=[0, 0.03, 1, 0.97])
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+
+
+def render_heatmap(cities, period, seed, path, dpi):
+    """Heatmap of each city's daily temperature difference over the period"""
+    names, dates, series = simulate_period(cities, period, seed)
+
+    # Pivot the data for the heatmap: mean difference per city and day
+    if period.whole_month:
+        columns, daily_diff = group_means(series.difference, day_of_month(dates))
+        xlabel = f'Day of {period.title}'
+    else:
+        columns, daily_diff = group_means(series.difference, dates)
+        columns = columns.astype(str)
+        xlabel = 'Date'
+    heatmap_data = pd.DataFrame(daily_diff, index=pd.Index(names, name='City'),
+                                columns=pd.Index(columns, name='Date')).sort_index()
+
+    with sns.axes_style('whitegrid'):
+        fig = Figure(figsize=(16, 10))
+        ax = fig.subplots()
+        sns.heatmap(heatmap_data, cmap='coolwarm', center=0, annot=False, fmt='.1f',
+                    linewidths=.5, ax=ax)
+
+    ax.set_title(f'Daily Temperature Differences from Average in Indian Cities - {period.title}', fontsize=16)
+    ax.set_xlabel(xlabel, fontsize=14)
+    ax.set_ylabel('City', fontsize=14)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+
+
+CHARTS = {
+    'bar': ('india_temperature_diff_{slug}.{fmt}', render_bar_chart),
+    'heatmap': ('india_temperature_diff_heatmap_{slug}.{fmt}', render_heatmap),
+}
+
+
+def inputs_hash(cities, period, seed, kind, dpi):
+    """Hash of everything a chart is drawn from"""
+    raw = json.dumps([CHART_VERSION, kind, cities, str(period.start), str(period.end), seed, dpi],
+                     sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def chart_jobs(cities, chart_periods, formats, dpi, seed, output_dir):
+    """Every (kind, period, path, hash) the run should produce"""
+    jobs = []
+    for period in chart_periods:
+        for kind, (pattern, _) in CHARTS.items():
+            digest = inputs_hash(cities, period, seed, kind, dpi)
+            for fmt in formats:
+                path = os.path.join(output_dir, pattern.format(slug=period.slug, fmt=fmt))
+                jobs.append((kind, period, path, digest))
+    return jobs
+
+
+def render_job(kind, cities, period, seed, path, dpi):
+    CHARTS[kind][1](cities, period, seed, path, dpi)
+    return path
+
+
+def read_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def generate(cities, chart_periods, formats=('png',), dpi=300, seed=SEED, output_dir='.',
+             workers=None, force=False):
+    """Render every chart whose inputs changed; return (written paths, skipped paths)
+
+    A chart that fails does not stop the others. The manifest records every
+    chart that was written, and RuntimeError is raised afterwards naming
+    the ones that failed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(output_dir)
+    todo, skipped = [], []
+    for kind, period, path, digest in chart_jobs(cities, chart_periods, formats, dpi, seed, output_dir):
+        name = os.path.basename(path)
+        if not force and manifest.get(name) == digest and os.path.exists(path):
+            skipped.append(path)
+        else:
+            todo.append((kind, period, path, digest))
+
+    written, failed = [], []
+    if todo:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(render_job, kind, cities, period, seed, path, dpi): (path, digest)
+                           for kind, period, path, digest in todo}
+                for future in as_completed(futures):
+                    path, digest = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed.append((path, e))
+                        continue
+                    manifest[os.path.basename(path)] = digest
+                    written.append(path)
+        finally:
+            # Charts written before a failure or interruption are not redrawn next run
+            write_manifest(output_dir, manifest)
+    if failed:
+        failed.sort(key=lambda item: item[0])
+        details = '; '.join(f'{os.path.basename(path)}: {e}' for path, e in failed)
+        raise RuntimeError(f'{len(failed)} of {len(todo)} charts failed: {details}') from failed[0][1]
+    return written, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--start', default='2025-06-01', help='first day (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2025-06-30', help='last day (YYYY-MM-DD)')
+    parser.add_argument('--monthly', action='store_true', help='one bar chart and heatmap per month')
+    parser.add_argument('--cities', help='JSON or CSV file of cities (default: 11 major cities)')
+    parser.add_argument('--formats', nargs='+', default=['png'], help='e.g. png svg pdf')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='charts rendered in parallel')
+    parser.add_argument('--force', action='store_true', help='re-render charts that are up to date')
+    args = parser.parse_args()
+
+    cities = load_cities(args.cities) if args.cities else DEFAULT_CITIES
+    written, skipped = generate(cities, periods(args.start, args.end, args.monthly), args.formats,
+                                args.dpi, args.seed, args.output_dir, args.workers, args.force)
+    for path in sorted(written):
+        print(f'Saved {path}')
+    print(f"Analysis complete! {len(written)} graphs saved, {len(skipped)} already up to date.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+from india_temp_diff import DEFAULT_CITIES, MANIFEST, generate, periods
+
+CITIES = {name: DEFAULT_CITIES[name] for name in ('New Delhi', 'Mumbai', 'Chennai')}
+
+
+def run(output_dir, formats=('png',)):
+    return generate(CITIES, periods('2025-06-01', '2025-06-03'), formats, dpi=20,
+                    output_dir=str(output_dir), workers=2)
+
+
+def manifest(output_dir):
+    with open(os.path.join(output_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+def test_unchanged_charts_are_skipped(tmp_path):
+    written, skipped = run(tmp_path)
+    assert len(written) == 2 and skipped == []
+    assert sorted(manifest(tmp_path)) == sorted(os.path.basename(path) for path in written)
+
+    written, skipped = run(tmp_path)
+    assert written == [] and len(skipped) == 2
+
+
+def test_charts_written_before_a_failure_are_recorded(tmp_path):
+    # matplotlib cannot save the second format, so half of the charts fail
+    with pytest.raises(RuntimeError, match='2 of 4 charts failed'):
+        run(tmp_path, formats=('png', 'nosuchformat'))
+
+    charts = sorted(name for name in os.listdir(tmp_path) if name.endswith('.png'))
+    assert len(charts) == 2 and sorted(manifest(tmp_path)) == charts
+    written, skipped = run(tmp_path)
+    assert written == [] and len(skipped) == 2
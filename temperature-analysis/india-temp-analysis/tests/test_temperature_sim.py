@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from temperature_sim import day_of_month, group_means
+
+
+def naive_group_means(values, keys):
+    unique = sorted(set(keys.tolist()))
+    return np.array(unique), np.stack([values[:, keys == key].mean(axis=1) for key in unique], axis=1)
+
+
+@pytest.mark.parametrize('keys', [
+    np.array([0, 0, 1, 1, 1, 2]),        # already grouped
+    np.array([2, 0, 1, 0, 2, 1]),        # interleaved
+    np.array([5, 5, 5, 5, 5, 5]),        # one group
+])
+def test_group_means_matches_a_per_group_mean(keys):
+    values = np.arange(18, dtype=np.float32).reshape(3, 6) ** 1.5
+    unique, means = group_means(values, keys)
+    expected_keys, expected = naive_group_means(values, keys)
+
+    assert unique.tolist() == expected_keys.tolist()
+    assert means == pytest.approx(expected)
+
+
+def test_group_means_of_hourly_data_by_day():
+    times = np.arange('2025-01-30T00', '2025-02-03T00', dtype='datetime64[h]')
+    values = np.random.default_rng(1).normal(30, 5, size=(4, len(times))).astype(np.float32)
+
+    days, daily = group_means(values, times.astype('datetime64[D]'))
+    assert [str(day) for day in days] == ['2025-01-30', '2025-01-31', '2025-02-01', '2025-02-02']
+    assert daily == pytest.approx(values.reshape(4, 4, 24).mean(axis=2), abs=1e-4)
+
+    days, by_day = group_means(values, day_of_month(times))
+    assert days.tolist() == [1, 2, 30, 31]
+    assert by_day[:, 0] == pytest.approx(values[:, 48:72].mean(axis=1), abs=1e-4)
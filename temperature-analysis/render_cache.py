@@ -0,0 +1,124 @@
+"""
+Render cache for the temperature dashboard charts
+Rendered PNGs are stored under a hash of the data and render parameters
+that produced them, so a chart is drawn once per distinct input and every
+later request is a dictionary lookup. An optional directory keeps renders
+across restarts and between worker processes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def render_key(*parts):
+    """Content hash of JSON-serializable render inputs"""
+    raw = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class RenderCache:
+    """LRU of rendered images keyed by render_key, with an optional disk tier"""
+
+    def __init__(self, max_entries=32, disk_dir=None, max_disk_entries=256):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_locks = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.png')
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached bytes for key, or None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            self.disk_hits += 1
+            self._remember(key, data)
+            return data
+        return None
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if self.disk_dir:
+            self._write_disk(key, data)
+
+    def _write_disk(self, key, data):
+        # Write then rename so readers in other processes never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        self._prune_disk()
+
+    def _prune_disk(self):
+        paths = [entry.path for entry in os.scandir(self.disk_dir) if entry.name.endswith('.png')]
+        if len(paths) <= self.max_disk_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_disk_entries]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def get_or_render(self, key, render):
+        """Return the bytes for key, calling render() at most once per key at a time"""
+        data = self.get(key)
+        if data is not None:
+            return data
+        with self._lock:
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+        with render_lock:
+            # Another request may have rendered it while we waited
+            data = self.get(key)
+            if data is None:
+                with self._lock:
+                    self.misses += 1
+                data = render()
+                self.put(key, data)
+        with self._lock:
+            self._render_locks.pop(key, None)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'disk_dir': self.disk_dir,
+            }
@@ -0,0 +1,234 @@
+"""
+Process pool for chart rendering
+Matplotlib renders run in long-lived worker processes that import the
+charting module once at startup, so request threads never touch
+matplotlib, a slow render cannot block other requests, and a render that
+runs past its timeout is stopped by replacing its worker.
+"""
+
+import importlib
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future
+
+
+class RenderQueueFull(Exception):
+    """Raised when too many renders are already waiting for a worker"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render runs longer than the pool's timeout"""
+
+
+class RenderError(Exception):
+    """Raised when a render fails inside the worker, or its worker fails"""
+
+
+def _main_importable():
+    """Whether a spawned process can re-import __main__ as it starts
+
+    Not when it was read from stdin: multiprocessing would look for a
+    file named '<stdin>'. Without a file at all (-c, an embedding host)
+    it is skipped, which is fine.
+    """
+    main = sys.modules.get('__main__')
+    if getattr(getattr(main, '__spec__', None), 'name', None):
+        return True
+    path = getattr(main, '__file__', None)
+    return path is None or os.path.exists(path)
+
+
+def _worker_main(module_name, conn):
+    """Worker process: import the chart module, then run jobs until told to stop"""
+    module = importlib.import_module(module_name)
+    warm_up = getattr(module, 'warm_up', None)
+    if warm_up:
+        warm_up()
+    conn.send(('ready', None))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        name, args = job
+        try:
+            conn.send(('ok', getattr(module, name)(*args)))
+        except Exception as e:
+            conn.send(('error', f'{type(e).__name__}: {e}'))
+
+
+class _Worker:
+    def __init__(self, context, module_name):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(module_name, child_conn),
+                                       name='render-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout):
+        if not self.ready and self.conn.poll(timeout):
+            self.ready = self.conn.recv()[0] == 'ready'
+        return self.ready
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class RenderPool:
+    """Fixed set of render processes fed from a bounded queue.
+
+    Jobs name a function in module_name and pass picklable arguments; the
+    function returns the rendered bytes. Workers start in the background
+    when start() is called, so the web process does not wait for them.
+    """
+
+    def __init__(self, module_name, workers=2, max_queue=8, timeout=30.0, start_method='forkserver'):
+        self.module_name = module_name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = 'spawn'
+        if start_method != 'fork' and not _main_importable():
+            start_method = 'fork'
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            # Workers forked from the server start with the chart module already
+            # imported. Only importable modules: '__main__' may have no file
+            # (stdin, an embedding host), and then every worker would fail to start.
+            self._context.set_forkserver_preload([__name__, module_name])
+        self._jobs = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.busy = 0
+
+    def start(self):
+        """Start the worker processes and their dispatcher threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._dispatch, name=f'render-dispatch-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, name, *args):
+        """Queue module_name.name(*args) and return a Future for its result"""
+        self.start()
+        future = Future()
+        try:
+            self._jobs.put_nowait((future, name, args))
+        except queue.Full:
+            raise RenderQueueFull(f'{self.max_queue} renders already waiting') from None
+        return future
+
+    def run(self, name, *args):
+        """Render and wait for the result
+
+        Waits at most as long as the worker may take to start, plus one
+        timeout for this render and for each render queued ahead of it.
+        """
+        future = self.submit(name, *args)
+        try:
+            return future.result(timeout=self.timeout * (2 + math.ceil(self.max_queue / self.workers)))
+        except TimeoutError:
+            future.cancel()
+            raise RenderTimeout(f'{name} did not finish in time') from None
+
+    def _dispatch(self):
+        """Feed jobs to one worker process, replacing it when it hangs or dies"""
+        try:
+            worker = _Worker(self._context, self.module_name)
+        except OSError:
+            worker = None  # Retried for the first job, which then fails with RenderError
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                future, name, args = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                with self._lock:
+                    self.busy += 1
+                try:
+                    if worker is None:
+                        worker = _Worker(self._context, self.module_name)
+                    # Importing matplotlib can take a few seconds on a cold start
+                    if not worker.wait_ready(self.timeout):
+                        raise RenderTimeout('render worker did not start')
+                    future.set_result(self._call(worker, name, args))
+                    with self._lock:
+                        self.completed += 1
+                except Exception as e:
+                    with self._lock:
+                        if isinstance(e, RenderTimeout):
+                            self.timed_out += 1
+                        else:
+                            self.failed += 1
+                    replace = isinstance(e, (RenderTimeout, EOFError, OSError))
+                    if isinstance(e, (EOFError, OSError)):
+                        # The worker died or could not be started
+                        e = RenderError(f'render worker failed: {type(e).__name__}: {e}')
+                    future.set_exception(e)
+                    if replace:
+                        # A new worker is started for the next job
+                        if worker is not None:
+                            worker.stop(kill=True)
+                        worker = None
+                finally:
+                    with self._lock:
+                        self.busy -= 1
+        finally:
+            if worker is not None:
+                worker.stop()
+
+    def _call(self, worker, name, args):
+        worker.conn.send((name, args))
+        if not worker.conn.poll(self.timeout):
+            raise RenderTimeout(f'{name} took longer than {self.timeout:g}s')
+        status, value = worker.conn.recv()
+        if status == 'error':
+            raise RenderError(value)
+        return value
+
+    def status(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'started': bool(self._threads),
+                'busy': self.busy,
+                'queued': self._jobs.qsize(),
+                'max_queue': self.max_queue,
+                'timeout': self.timeout,
+                'completed': self.completed,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+            }
+
+    def close(self):
+        """Stop the workers once they finish their current job"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join(timeout=self.timeout)
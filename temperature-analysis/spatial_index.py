@@ -0,0 +1,138 @@
+"""
+Grid spatial index over weather station coordinates
+Stations are bucketed into fixed-size lat/lon cells, so bounding-box,
+radius and nearest-N queries look only at the cells around the query
+instead of every station. Pure Python, so the web process can use it
+without importing NumPy.
+"""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0
+# Degrees of latitude per kilometre
+KM_LAT = 1 / 111.195
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_bbox(value):
+    """(south, west, north, east) from 'south,west,north,east'; raises ValueError"""
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be south,west,north,east')
+    south, west, north, east = parts
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise ValueError('bbox needs -90 <= south < north <= 90 and -180 <= west < east <= 180')
+    return south, west, north, east
+
+
+class GridIndex:
+    """Stations bucketed into cell_deg x cell_deg cells.
+
+    points is a list of (name, lat, lon). Queries return names; a cell
+    holds indexes into points.
+    """
+
+    def __init__(self, points, cell_deg=1.0):
+        self.cell_deg = cell_deg
+        self.points = list(points)
+        self.cells = {}
+        for i, (_, lat, lon) in enumerate(self.points):
+            self.cells.setdefault(self._cell(lat, lon), []).append(i)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _in_cells(self, south, west, north, east):
+        row0, col0 = self._cell(south, west)
+        row1, col1 = self._cell(north, east)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self.cells):
+            # Box covers more cells than are occupied; walk the occupied ones
+            for (row, col), members in self.cells.items():
+                if row0 <= row <= row1 and col0 <= col <= col1:
+                    yield from members
+            return
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                yield from self.cells.get((row, col), ())
+
+    def bbox(self, south, west, north, east):
+        """Names of the stations inside the box"""
+        return [self.points[i][0] for i in self._in_cells(south, west, north, east)
+                if south <= self.points[i][1] <= north and west <= self.points[i][2] <= east]
+
+    def radius(self, lat, lon, km):
+        """[(name, distance km)] of the stations within km, nearest first"""
+        dlat = km * KM_LAT
+        # Longitude degrees shrink towards the poles; widen the box to match
+        dlon = dlat / max(math.cos(math.radians(min(89.0, abs(lat) + dlat))), 1e-6)
+        found = []
+        for i in self._in_cells(max(-90.0, lat - dlat), max(-180.0, lon - dlon),
+                                min(90.0, lat + dlat), min(180.0, lon + dlon)):
+            name, plat, plon = self.points[i]
+            distance = haversine_km(lat, lon, plat, plon)
+            if distance <= km:
+                found.append((name, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def _ring(self, row, col, ring):
+        """Cells exactly `ring` cells away from (row, col) in either direction"""
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def _distances(self, lat, lon, members):
+        for i in members:
+            name, plat, plon = self.points[i]
+            yield name, haversine_km(lat, lon, plat, plon)
+
+    def nearest(self, lat, lon, n):
+        """[(name, distance km)] of the n stations nearest the point
+
+        Searches rings of cells outward from the point's cell and stops once
+        the next ring is farther than the n-th best station found so far, or
+        once a ring would cover more cells than are occupied; the stations
+        not yet seen are then taken from the occupied cells directly.
+        """
+        n = min(n, len(self.points))
+        if n <= 0:
+            return []
+        row, col = self._cell(lat, lon)
+        best = []
+        ring = 0
+        while True:
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                for (r, c), members in self.cells.items():
+                    if max(abs(r - row), abs(c - col)) >= ring:
+                        best.extend(self._distances(lat, lon, members))
+                break
+            for cell in self._ring(row, col, ring):
+                best.extend(self._distances(lat, lon, self.cells.get(cell, ())))
+            if len(best) >= n:
+                best.sort(key=lambda item: item[1])
+                best = best[:n]
+                # Unvisited cells are at least `ring` whole cells away; east-west
+                # that is shortest at the highest latitude they could reach
+                widest = math.radians(min(89.0, abs(lat) + (ring + 1) * self.cell_deg))
+                if best[-1][1] <= ring * self.cell_deg / KM_LAT * math.cos(widest):
+                    break
+            ring += 1
+        best.sort(key=lambda item: item[1])
+        return best[:n]
@@ -0,0 +1,88 @@
+import struct
+
+import numpy as np
+import pytest
+
+import charts
+
+CITY_DATA = {
+    'Delhi': {'lat': 28.6, 'lon': 77.2, 'temp': 36.0},
+    'Mumbai': {'lat': 19.1, 'lon': 72.9, 'temp': 29.5},
+    'Chennai': {'lat': 13.1, 'lon': 80.3, 'temp': 33.1},
+}
+
+
+def png_size(data):
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    return struct.unpack('>II', data[16:24])
+
+
+def test_idw_reproduces_stations_and_stays_within_their_range():
+    _, lats, lons, temps = charts.station_arrays(CITY_DATA)
+    grid = charts.idw(lats, lons, charts.idw_sources(lats, lons, temps))
+
+    # A grid point on a station takes its reading
+    assert np.diag(grid) == pytest.approx(temps, abs=1e-3)
+    assert temps.min() <= np.nanmin(grid) and np.nanmax(grid) <= temps.max()
+
+
+def test_idw_with_a_radius_leaves_cells_out_of_range_empty():
+    sources = charts.idw_sources(np.array([20.0]), np.array([75.0]), np.array([30.0]))
+    grid = charts.idw(np.array([20.0, 20.5, 30.0]), np.array([75.0]), sources, radius=1.0)
+
+    assert grid[:2, 0].tolist() == pytest.approx([30.0, 30.0])
+    assert np.isnan(grid[2, 0])
+
+
+@pytest.mark.parametrize('cell_deg', [None, 0.5])
+def test_idw_sources_bins_dense_stations_by_count(cell_deg, monkeypatch):
+    monkeypatch.setattr(charts, 'MAX_SOURCES', 16)
+    rng = np.random.default_rng(3)
+    lats, lons = rng.uniform(8, 30, 500), rng.uniform(70, 90, 500)
+    temps = rng.uniform(20, 40, 500)
+
+    src_lat, src_lon, src_temp, weights = charts.idw_sources(lats, lons, temps, cell_deg)
+
+    assert len(src_temp) < len(temps)
+    assert weights.sum() == len(temps)
+    assert (weights * src_temp).sum() == pytest.approx(temps.sum())
+    assert (weights * src_lat).sum() == pytest.approx(lats.sum())
+
+
+def test_label_indexes_thins_stations_to_the_viewport_and_limit():
+    rng = np.random.default_rng(5)
+    lats, lons = rng.uniform(0, 40, 2000), rng.uniform(60, 100, 2000)
+    temps = rng.uniform(20, 40, 2000)
+    bounds = (10, 70, 30, 90)
+
+    inside = (lats >= 10) & (lats <= 30) & (lons >= 70) & (lons <= 90)
+    labelled = charts.label_indexes(lats, lons, temps, bounds, 25)
+    assert 0 < len(labelled) <= 25
+    assert inside[labelled].all()
+    few = charts.label_indexes(lats[:5], lons[:5], temps[:5], (0, 60, 40, 100), 25)
+    assert sorted(few) == [0, 1, 2, 3, 4]
+
+
+def test_cached_grid_is_reused_for_the_same_stations():
+    _, lats, lons, temps = charts.station_arrays(CITY_DATA)
+    first = charts.cached_grid(lats, lons, temps, charts.INDIA_BOUNDS, (20, 20))
+
+    assert charts.cached_grid(lats.copy(), lons.copy(), temps.copy(), charts.INDIA_BOUNDS, (20, 20)) is first
+    assert charts.cached_grid(lats, lons, temps + 1, charts.INDIA_BOUNDS, (20, 20)) is not first
+
+
+@pytest.mark.parametrize('mode', ['scatter', 'heatmap'])
+def test_render_tile_is_a_tile_sized_png(mode):
+    params = {'bounds': (11.2, 78.75, 21.9, 90.0), 'mode': mode, 'temp_range': (20, 40),
+              'cmap': 'coolwarm', 'grid_size': 16, 'bin_deg': 0.5, 'radius_deg': 4.0}
+
+    assert png_size(charts.render_tile(CITY_DATA, params)) == (charts.TILE_SIZE, charts.TILE_SIZE)
+
+
+@pytest.mark.parametrize('mode', ['scatter', 'heatmap'])
+def test_generate_temperature_map_is_a_png(mode):
+    params = {'figsize': (4, 3), 'dpi': 50, 'cmap': 'coolwarm', 'title': 'Test', 'mode': mode,
+              'grid_shape': (20, 20)}
+
+    width, height = png_size(charts.generate_temperature_map(CITY_DATA, params))
+    assert width > 0 and height > 0
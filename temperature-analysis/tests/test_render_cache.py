@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+from render_cache import RenderCache, render_key
+
+
+def test_render_key_depends_on_content_not_order():
+    assert render_key({'a': 1, 'b': 2}, 'map') == render_key({'b': 2, 'a': 1}, 'map')
+    assert render_key({'a': 1}, 'map') != render_key({'a': 2}, 'map')
+    assert render_key({'a': 1}, 'map') != render_key({'a': 1}, 'tile')
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = RenderCache(max_entries=2)
+    cache.put('a', b'A')
+    cache.put('b', b'B')
+    assert cache.get('a') == b'A'
+    cache.put('c', b'C')
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (b'A', b'C')
+    assert cache.stats()['entries'] == 2
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    writer = RenderCache(disk_dir=str(tmp_path))
+    writer.put('k', b'png')
+    reader = RenderCache(disk_dir=str(tmp_path))
+
+    assert reader.get('k') == b'png'
+    assert reader.get('k') == b'png'
+    assert reader.get('missing') is None
+    assert (reader.stats()['disk_hits'], reader.stats()['hits']) == (1, 1)
+    assert [name for name in os.listdir(tmp_path) if not name.endswith('.png')] == []
+
+
+def test_disk_tier_keeps_the_newest_entries(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path), max_disk_entries=2)
+    for i, key in enumerate('abc'):
+        cache.put(key, key.encode())
+        os.utime(tmp_path / f'{key}.png', (1000 + i, 1000 + i))
+    cache.put('d', b'd')
+
+    assert sorted(os.listdir(tmp_path)) == ['c.png', 'd.png']
+
+
+def test_get_or_render_renders_each_key_once():
+    cache = RenderCache()
+    calls = []
+
+    def render():
+        calls.append(1)
+        time.sleep(0.05)
+        return b'png'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_render('k', render)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b'png'] * 8
+    assert len(calls) == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.get_or_render('k', render) == b'png' and len(calls) == 1
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from spatial_index import GridIndex, haversine_km, parse_bbox
+
+
+@pytest.fixture(scope='module')
+def points():
+    rng = random.Random(7)
+    return [(f's{i}', rng.uniform(-70, 70), rng.uniform(-120, 120)) for i in range(500)]
+
+
+def brute_radius(points, lat, lon, km):
+    found = [(name, haversine_km(lat, lon, plat, plon)) for name, plat, plon in points]
+    return sorted((item for item in found if item[1] <= km), key=lambda item: item[1])
+
+
+def test_haversine_km():
+    assert haversine_km(28.61, 77.21, 28.61, 77.21) == 0
+    # Delhi to Mumbai
+    assert haversine_km(28.61, 77.21, 19.08, 72.88) == pytest.approx(1147, abs=2)
+    assert haversine_km(0, 0, 0, 180) == pytest.approx(20015, abs=1)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('8,68,37,97', (8.0, 68.0, 37.0, 97.0)),
+    (' -10.5, -20 ,10,20', (-10.5, -20.0, 10.0, 20.0)),
+])
+def test_parse_bbox(value, expected):
+    assert parse_bbox(value) == expected
+
+
+@pytest.mark.parametrize('value', ['1,2,3', '37,68,8,97', '8,97,37,68', '8,68,91,97', 'a,b,c,d'])
+def test_parse_bbox_rejects(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
+
+
+@pytest.mark.parametrize('cell_deg', [0.5, 1.0, 5.0])
+def test_bbox_matches_a_linear_scan(points, cell_deg):
+    index = GridIndex(points, cell_deg)
+    boxes = [(8, 68, 37, 97), (-70, -120, 70, 120), (10.2, 10.2, 10.3, 10.3), (-5, -60, 40, 60)]
+    for south, west, north, east in boxes:
+        expected = {name for name, lat, lon in points if south <= lat <= north and west <= lon <= east}
+        found = index.bbox(south, west, north, east)
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+
+
+@pytest.mark.parametrize('cell_deg', [0.5, 1.0, 5.0])
+def test_radius_matches_a_linear_scan(points, cell_deg):
+    index = GridIndex(points, cell_deg)
+    rng = random.Random(cell_deg)
+    for _ in range(30):
+        lat, lon, km = rng.uniform(-80, 80), rng.uniform(-110, 110), rng.choice([50, 500, 2000])
+        assert index.radius(lat, lon, km) == brute_radius(points, lat, lon, km)
+
+
+@pytest.mark.parametrize('cell_deg', [0.5, 1.0, 5.0])
+def test_nearest_matches_a_linear_scan(points, cell_deg):
+    index = GridIndex(points, cell_deg)
+    rng = random.Random(cell_deg)
+    for _ in range(30):
+        lat, lon, n = rng.uniform(-85, 85), rng.uniform(-110, 110), rng.choice([1, 5, 20])
+        expected = brute_radius(points, lat, lon, float('inf'))[:n]
+        found = index.nearest(lat, lon, n)
+        assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected])
+
+
+def test_nearest_edge_cases(points):
+    index = GridIndex(points)
+    assert index.nearest(0, 0, 0) == []
+    assert len(index.nearest(0, 0, 1000)) == len(points)
+    assert GridIndex([]).nearest(0, 0, 3) == []
+    assert GridIndex([('only', 60.0, 100.0)]).nearest(-60, -100, 1)[0][0] == 'only'
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from shared.temperature_store import TemperatureStore
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('matplotlib', 'numpy', 'pandas')
+
+# Runs in a fresh interpreter, as a web process serving its first request
+CHILD = '''
+import json, sys
+import app
+response = app.app.test_client().get(sys.argv[1])
+app.render_pool.close()
+print(json.dumps({'status': response.status_code,
+                  'heavy': [name for name in %r if name in sys.modules]}))
+''' % (HEAVY_MODULES,)
+
+
+def first_request(path, store):
+    env = dict(os.environ, TEMPERATURE_STORE=store)
+    result = subprocess.run([sys.executable, '-c', CHILD, path], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True, timeout=60, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.fixture(params=['empty', 'seeded'])
+def store(request, tmp_path):
+    path = str(tmp_path / 'store')
+    if request.param == 'seeded':
+        store = TemperatureStore(path)
+        store.add_cities({'Delhi': {'lat': 28.6, 'lon': 77.2}, 'Mumbai': {'lat': 19.1, 'lon': 72.9}})
+        store.write([0, 1], np.array(['2025-03-01T00:00'] * 2, dtype='datetime64[s]'), [36.0, 29.5])
+    return path
+
+
+@pytest.mark.parametrize('path', ['/health', '/api/city-data', '/api/stats'])
+def test_web_process_serves_without_heavy_imports(path, store):
+    assert first_request(path, store) == {'status': 200, 'heavy': []}
@@ -0,0 +1,86 @@
+import gc
+import os
+import sys
+
+import pytest
+from werkzeug.test import Client
+
+import host
+
+
+@pytest.fixture(scope='module')
+def application(tmp_path_factory):
+    """create_app() with every app's data in a temporary directory"""
+    data = tmp_path_factory.mktemp('host')
+    saved_path, saved_modules = list(sys.path), set(sys.modules)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(host, 'mounted', [])
+        monkeypatch.setattr(host, 'startup_memory', {})
+        monkeypatch.setenv('SNAKE__DATABASE_URL', f'sqlite:///{data / "snake_game.db"}')
+        monkeypatch.setenv('BIKE_RACE__DATABASE_URL', f'sqlite:///{data / "bike_race.db"}')
+        monkeypatch.setenv('TEMPERATURE__TEMPERATURE_STORE', str(data / 'temperature_store'))
+        monkeypatch.setenv('TEMPERATURE__TEMP_MAP_CACHE_DIR', str(data / 'map_cache'))
+        monkeypatch.setenv('TEMPERATURE__TILE_CACHE_DIR', str(data / 'tile_cache'))
+        try:
+            yield host.create_app()
+        finally:
+            gc.unfreeze()
+            for app in host.mounted:
+                db = getattr(app.module, 'db', None)
+                if db is not None:
+                    with app.module.app.app_context():
+                        db.engine.dispose()
+            sys.path[:] = saved_path
+            for name in set(sys.modules) - saved_modules:
+                if os.path.dirname(getattr(sys.modules[name], '__file__', None) or '') != host.ROOT:
+                    sys.modules.pop(name)
+
+
+def test_every_app_is_mounted_under_its_prefix(application):
+    client = Client(application)
+
+    health = client.get('/health').json
+    assert health['apps'] == {prefix: directory for prefix, directory, _ in host.MOUNTS}
+    index = client.get('/').get_data(as_text=True)
+    for prefix, directory, _ in host.MOUNTS:
+        assert f'href="{prefix}/"' in index
+        response = client.get(f'{prefix}/')
+        assert response.status_code in (200, 302), directory
+        if response.status_code == 302:
+            # Redirects stay under the app's own prefix
+            assert response.location.startswith(f'{prefix}/'), directory
+    assert client.get('/database-viewer/health').json['status'] == 'healthy'
+    assert client.get('/temperature/api/stats').json['stats']['total_cities'] > 0
+
+
+def test_each_app_reads_its_own_settings(application):
+    apps = {app.directory: app for app in host.mounted}
+    snake, bike = apps['snake-game'].sqlite_path(), apps['bike-race-game'].sqlite_path()
+    assert os.path.basename(snake) == 'snake_game.db' and os.path.basename(bike) == 'bike_race.db'
+    # The viewer reads the databases of the games hosted with it
+    viewer = apps['database-viewer'].module
+    assert (viewer.SNAKE_GAME_DB, viewer.BIKE_RACE_DB) == (snake, bike)
+    assert apps['snake-game'].module.app.config['SESSION_COOKIE_PATH'] == '/snake'
+
+
+def test_check_workers_refuses_several_workers_off_sqlite(application, monkeypatch):
+    host.check_workers(2)
+    bike = next(app for app in host.mounted if app.directory == 'bike-race-game')
+    monkeypatch.setattr(bike, 'sqlite_path', lambda: None)
+
+    host.check_workers(1)
+    with pytest.raises(RuntimeError, match='bike-race-game not on SQLite: serve with HOST_WORKERS=1, not 2'):
+        host.check_workers(2)
+
+
+def test_startup_report_and_memory(application):
+    report = host.startup_report().splitlines()
+    assert report[0].split() == ['app', 'RSS', 'MB', 'load', 's', 'modules']
+    assert [line.split()[0] for line in report[2:-1]] == [prefix for prefix, _, _ in host.MOUNTS]
+    assert report[-1].startswith('total')
+
+    memory = Client(application).get('/memory').json
+    assert memory['pid'] == os.getpid()
+    assert memory['worker']['rss'] > 0
+    assert set(memory['startup']['apps']) == {prefix for prefix, _, _ in host.MOUNTS}
+    assert memory['startup']['total'] >= memory['startup']['host']